@@ -0,0 +1,34 @@
+"""
+Busca automática de jurisprudência: extração da query por LLM e busca nos tribunais.
+
+Os nomes exportados são importados no primeiro acesso: `import busca` não carrega os
+agentes, e o CrewAI só é importado quando uma etapa chama o LLM pela primeira vez.
+"""
+from importlib import import_module
+
+# Nome exportado -> módulo que o define
+_EXPORTS = {
+    "KeywordExtractionAgent": "agent_query",
+    "LegalSearchAgent": "agent_busca",
+    "Pipeline": "pipeline",
+    "OutputFormat": "pipeline",
+    "OUTPUT_FORMATS": "pipeline",
+    "get_output_format": "pipeline",
+    "PromptVariant": "prompts",
+    "PROMPT_VARIANTS": "prompts",
+    "get_prompt_variant": "prompts",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(f".{_EXPORTS[name]}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted([*globals(), *__all__])
@@ -1,92 +1,594 @@
-from typing import Dict
-import os
-from dotenv import load_dotenv
-import requests
-
-
-class LegalSearchAgent:
-    def __init__(self):
-        #Mapeamento de tribunais
-        self.tribunal_mapping = {
-            'stf': 'STFCustomVector_e5large',
-            'stj': 'STJCustomVector_e5large'
-        }
-
-        #Mapeamento de features por tribunal
-        self.feature_mapping = {
-            'STFCustomVector_e5large': ["id_documento", "ministroRelator", "ementa", "url_download"],
-            'STJCustomVector_e5large': ["id_documento", "ministroRelator", "ementa", "url"]
-        }
-
-    def _get_tribunal_from_query(self, query: str) -> str:
-        """Identifica o tribunal com base na query"""
-        query_lower = query.lower()
-        if 'stf' in query_lower:
-            return self.tribunal_mapping['stf']
-        elif 'stj' in query_lower:
-            return self.tribunal_mapping['stj']
-        return 'STFCustomVector_e5large'  # tribunal padrão
-
-    def search(self, query: str, base_url: str = 'https://jurisprudencias.corejur.com.br') -> Dict:
-        """
-        Executa a busca na API usando a query fornecida
-
-        Args:
-            query: Query em linguagem natural (já processada pelo KeywordExtractionAgent)
-            base_url: URL base da API (default: https://jurisprudencias.corejur.com.br)
-
-        Returns:
-            Dict com os resultados da busca
-        """
-        #Identifica o tribunal
-        tribunal = self._get_tribunal_from_query(query)
-        
-        #Seleciona as features corretas com base no tribunal
-        features = self.feature_mapping.get(tribunal, ["id_documento", "ministroRelator", "ementa"])
-
-        #Estrutura da query para a API
-        data = {
-            "query_text": query,
-            "query_type": "bm25",
-            "target_vector": "inteiro_teor",
-            "limit": 5,
-            "features": features,
-            "filters": []
-        }
-
-        try:
-            #Faz a chamada à API
-            response = requests.post(
-                url=f'{base_url}/query',
-                params={'tribunal': tribunal},
-                json=data
-            )
-
-            #Verifica se a chamada foi bem sucedida
-            response.raise_for_status()
-
-            #Retorna os resultados
-            return response.json()
-
-        except requests.exceptions.RequestException as e:
-            print(f"\nErro ao fazer a chamada à API: {str(e)}")
-            return None
-
-
-#Exemplo de uso
-'''
-if __name__ == "__main__":
-    #A query já deve vir processada do agent_query
-    #Para testar, você pode rodar primeiro o .py e copiar a query gerada
-    query = "decisões sobre cobrança abusiva de tarifas bancárias e direito à informação do consumidor"
-    
-    #Inicializa o agente de busca
-    search_agent = LegalSearchAgent()
-    
-    #Executa a busca
-    results = search_agent.search(query)
-    
-    if results:
-        print("\nResultados da busca:")
-        print(results) 
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+import asyncio
+import os
+from contextlib import aclosing
+from dotenv import load_dotenv
+import httpx
+import requests
+from .http_client import create_async_client, get_shared_session, post_with_retry, post_with_retry_async, search_stats
+from .search_cache import SearchCache
+from .documents import DocumentCache
+from .catalog import TribunalCatalog
+from .routing import TribunalRouter
+from .rerank import HybridReranker
+from .fusion import fuse_expanded_results, reciprocal_rank_fusion
+from .metrics import stage
+from .deadline import SEARCH_TIMEOUT, current_deadline, record_degradation
+
+load_dotenv()
+
+#URL base da API de jurisprudência (JURISPRUDENCE_API_URL aponta para outro ambiente, ex: um stub local)
+DEFAULT_BASE_URL = os.getenv("JURISPRUDENCE_API_URL", 'https://jurisprudencias.corejur.com.br')
+
+#Prioridade dos status ao resumir várias buscas de um mesmo tribunal ou query (menor prevalece)
+STATUS_PRIORITY = {"ok": 0, "timeout": 1, "erro": 2}
+
+#Coleção consultada para cada nome curto de tribunal (também usado pelo catálogo para traduzir o /tribunais)
+TRIBUNAL_COLLECTIONS = {
+    'stf': 'STFCustomVector_e5large',
+    'stj': 'STJCustomVector_e5large'
+}
+
+def merge_status(items: Iterable[Tuple[str, str]]) -> Dict[str, str]:
+    """
+    Status de cada chave a partir do status das suas buscas: "ok" se alguma respondeu,
+    senão "timeout" se alguma esgotou o prazo, senão "erro"
+    """
+    merged: Dict[str, str] = {}
+    for key, search_status in items:
+        current = merged.get(key)
+        if current is None or STATUS_PRIORITY[search_status] < STATUS_PRIORITY[current]:
+            merged[key] = search_status
+    return merged
+
+
+def expansion_status(queries: List[str],
+                     statuses: Iterable[Tuple[str, str, str]]) -> Tuple[Dict[str, str], Dict[str, str]]:
+    """
+    Status de cada tribunal e de cada query da busca expandida a partir do status de
+    cada busca (coleção, query, status); queries que não foram executadas ficam "descartada"
+
+    Returns:
+        Tupla (status por tribunal, status por query)
+    """
+    statuses = list(statuses)
+    query_status = {query: "descartada" for query in queries}
+    query_status.update(merge_status((query, search_status) for _, query, search_status in statuses))
+    return merge_status((tribunal, search_status) for tribunal, _, search_status in statuses), query_status
+
+
+class LegalSearchAgent:
+    def __init__(self, async_client: Optional[httpx.AsyncClient] = None,
+                 session: Optional[requests.Session] = None,
+                 search_cache: Optional[SearchCache] = None,
+                 document_cache: Optional[DocumentCache] = None,
+                 catalog: Optional[TribunalCatalog] = None,
+                 reranker: Optional[HybridReranker] = None,
+                 router: Optional[TribunalRouter] = None):
+        #Cliente HTTP assíncrono compartilhado (pool de conexões criado pela API)
+        self.async_client = async_client
+
+        #Session keep-alive compartilhada pelas buscas síncronas
+        self.session = session or get_shared_session()
+        self.stats = search_stats
+
+        #Cache de resultados compartilhado entre os agentes (apenas na busca assíncrona)
+        self.search_cache = search_cache
+
+        #Documentos já recebidos da API, para hidratar resultados resumidos sem nova chamada
+        self.document_cache = document_cache
+
+        #Tribunais e propriedades descobertos na API (complementa os mapeamentos abaixo)
+        self.catalog = catalog
+
+        #Reordenação local dos candidatos (BM25 + vetorial) compartilhada entre os agentes (apenas na busca assíncrona)
+        self.reranker = reranker
+
+        #Mapeamento de tribunais
+        self.tribunal_mapping = dict(TRIBUNAL_COLLECTIONS)
+
+        #Tribunais consultados quando não informados, pelos nomes do catálogo (siglas e nomes por extenso)
+        self.router = router or TribunalRouter(TRIBUNAL_COLLECTIONS, catalog)
+
+        #Mapeamento de features por tribunal
+        self.feature_mapping = {
+            'STFCustomVector_e5large': ["id_documento", "ministroRelator", "ementa", "url_download"],
+            'STJCustomVector_e5large': ["id_documento", "ministroRelator", "ementa", "url"]
+        }
+
+    def _get_tribunal_from_query(self, query: str) -> str:
+        """Identifica o tribunal com base na query (o primeiro citado, ou o tribunal padrão)"""
+        return self.route_tribunals(query)[0]
+
+    def route_tribunals(self, query: str, tribunal: Optional[str] = None,
+                        requested: Optional[List[str]] = None) -> List[str]:
+        """
+        Coleções consultadas quando o cliente não informa os tribunais: as pedidas no texto,
+        senão a do tribunal extraído pelo LLM, senão as citadas na query, senão a padrão
+
+        Args:
+            query: Query gerada
+            tribunal: Tribunal extraído pelo LLM (nome curto ou por extenso), se houver
+            requested: Coleções dos tribunais pedidos no texto original, se houver
+        """
+        return self.router.route(query, tribunal, requested) or ['STFCustomVector_e5large']
+
+    def resolve_tribunal(self, name: str) -> str:
+        """Converte o nome curto do tribunal (ex: "stf") no nome da coleção; nomes de coleção são mantidos"""
+        collection = self.catalog.resolve(name) if self.catalog is not None else None
+        return collection or self.tribunal_mapping.get(name.lower(), name)
+
+    def collections(self) -> List[str]:
+        """Coleções consultadas no modo multi-tribunal sem tribunais informados: as do catálogo ou as mapeadas"""
+        if self.catalog is not None and self.catalog.loaded:
+            return self.catalog.collections()
+        return list(dict.fromkeys(self.tribunal_mapping.values()))
+
+    def _features_for(self, tribunal: str, features: Optional[List[str]] = None) -> List[str]:
+        """
+        Features pedidas (default: as do tribunal), sempre com o id_documento, que identifica
+        o documento; com o catálogo, apenas as que existem na coleção
+        """
+        if not features:
+            features = self.feature_mapping.get(tribunal, ["id_documento", "ministroRelator", "ementa"])
+        features = list(dict.fromkeys(["id_documento", *features]))
+        if self.catalog is None:
+            return features
+        return [feature for feature in features
+                if feature == "id_documento" or self.catalog.has_property(tribunal, feature)]
+
+    def _build_request(self, query: str, tribunal: Optional[str] = None, limit: int = 5,
+                       features: Optional[List[str]] = None,
+                       filters: Optional[List[Dict]] = None) -> Tuple[str, Dict]:
+        """
+        Monta o tribunal e o corpo da requisição para a API de jurisprudência
+
+        Args:
+            query: Query em linguagem natural
+            tribunal: Coleção a consultar (se None, identificada a partir da query)
+            limit: Quantidade de documentos pedidos à API
+            features: Metadados retornados (default: os do tribunal)
+            filters: Filtros da API ({"content", "query_type", "collection_field"})
+
+        Returns:
+            Tupla (tribunal, corpo da requisição)
+        """
+        #Identifica o tribunal
+        if tribunal is None:
+            tribunal = self._get_tribunal_from_query(query)
+
+        #Estrutura da query para a API
+        data = {
+            "query_text": query,
+            "query_type": "bm25",
+            "target_vector": "inteiro_teor",
+            "limit": limit,
+            "features": self._features_for(tribunal, features),
+            "filters": list(filters or [])
+        }
+
+        return tribunal, data
+
+    def search(self, query: str, base_url: str = DEFAULT_BASE_URL, limit: int = 5,
+               features: Optional[List[str]] = None, filters: Optional[List[Dict]] = None,
+               tribunal: Optional[str] = None) -> Dict:
+        """
+        Executa a busca na API usando a query fornecida
+
+        Args:
+            query: Query em linguagem natural (já processada pelo KeywordExtractionAgent)
+            base_url: URL base da API (default: JURISPRUDENCE_API_URL ou https://jurisprudencias.corejur.com.br)
+            limit: Quantidade de resultados
+            features: Metadados retornados (default: os do tribunal)
+            filters: Filtros da API ({"content", "query_type", "collection_field"})
+            tribunal: Coleção a consultar (se None, identificada a partir da query)
+
+        Returns:
+            Dict com os resultados da busca
+        """
+        tribunal, data = self._build_request(query, tribunal, limit=limit, features=features, filters=filters)
+
+        try:
+            #Faz a chamada à API
+            with stage("search", tribunal):
+                response = post_with_retry(
+                    self.session,
+                    f'{base_url}/query',
+                    stats=self.stats,
+                    params={'tribunal': tribunal},
+                    json=data
+                )
+
+            #Verifica se a chamada foi bem sucedida
+            response.raise_for_status()
+
+            #Retorna os resultados
+            return response.json()
+
+        except requests.exceptions.RequestException as e:
+            print(f"\nErro ao fazer a chamada à API: {str(e)}")
+            return None
+
+    async def search_async(self, query: str, base_url: str = DEFAULT_BASE_URL, limit: int = 5,
+                           features: Optional[List[str]] = None, offset: int = 0,
+                           filters: Optional[List[Dict]] = None, elements: Optional[Dict] = None,
+                           tribunal: Optional[str] = None) -> Dict:
+        """
+        Versão assíncrona de search, que não bloqueia o event loop da API e respeita
+        o orçamento de latência da requisição (sem resposta no prazo, retorna None)
+
+        Args:
+            query: Query em linguagem natural (já processada pelo KeywordExtractionAgent)
+            base_url: URL base da API (default: JURISPRUDENCE_API_URL ou https://jurisprudencias.corejur.com.br)
+            limit: Quantidade de resultados da página
+            features: Metadados retornados (default: os do tribunal)
+            offset: Resultados pulados antes da página (a API não pagina: são pedidos offset + limit)
+            filters: Filtros da API ({"content", "query_type", "collection_field"})
+            elements: Elementos extraídos do texto (conceitos_chave, area_direito), usados na reordenação
+            tribunal: Coleção a consultar (se None, identificada a partir da query)
+
+        Returns:
+            Dict com os resultados da busca
+        """
+        tribunal, data = self._build_request(query, tribunal, limit=offset + limit, features=features, filters=filters)
+        response = await self._search_tribunal_within_deadline_async(tribunal, data, base_url, elements)
+        if not response or not offset:
+            return response
+        #A resposta pode ter vindo do cache: a página é uma cópia
+        return {**response, "results": response.get('results', [])[offset:]}
+
+    async def _search_tribunal_within_deadline_async(self, tribunal: str, data: Dict, base_url: str,
+                                                     elements: Optional[Dict] = None) -> Dict:
+        """
+        Consulta uma coleção dentro do orçamento de latência da requisição (se houver):
+        sem resposta no prazo, retorna None (degradação "busca_expirada")
+        """
+        deadline = current_deadline()
+        if deadline is None:
+            return await self._search_ranked_async(tribunal, data, base_url, elements)
+        try:
+            return await asyncio.wait_for(self._search_ranked_async(tribunal, data, base_url, elements),
+                                          deadline.remaining())
+        except asyncio.TimeoutError:
+            record_degradation(SEARCH_TIMEOUT)
+            return None
+
+    async def _search_ranked_async(self, tribunal: str, data: Dict, base_url: str,
+                                   elements: Optional[Dict] = None) -> Dict:
+        """
+        Consulta uma coleção; com o reranker, pede mais candidatos à busca BM25 e à
+        busca vetorial (em paralelo), reordena localmente e devolve os `limit` melhores
+        """
+        if self.reranker is None:
+            return await self._search_tribunal_async(tribunal, data, base_url)
+
+        #O texto dos candidatos (ementa) é necessário para a reordenação, mesmo que o cliente não o tenha pedido
+        text_fields = [field for field in self.reranker.text_fields
+                       if self.catalog is None or self.catalog.has_property(tribunal, field)]
+        candidates = {
+            **data,
+            "limit": max(self.reranker.candidates, data["limit"]),
+            "features": list(dict.fromkeys([*data["features"], *text_fields]))
+        }
+        searches = [self._search_tribunal_async(tribunal, candidates, base_url)]
+        dense_enabled = self.reranker.dense_enabled(tribunal)
+        if dense_enabled:
+            dense_data = {**candidates, "query_type": self.reranker.dense_query_type}
+            searches.append(self._search_tribunal_async(tribunal, dense_data, base_url, "search_dense"))
+        responses = await asyncio.gather(*searches, return_exceptions=True)
+
+        lexical, dense = responses[0], responses[1] if dense_enabled else None
+        if isinstance(dense, BaseException) or (dense_enabled and dense is None):
+            #Coleção sem busca vetorial (ou fora do ar): segue só com a léxica e tenta de novo mais tarde
+            self.reranker.record_dense_failure(tribunal)
+            dense = None
+        if isinstance(lexical, BaseException):
+            if dense is None:
+                raise lexical
+            lexical = None
+        if not lexical and not dense:
+            return None
+
+        with stage("rerank"):
+            results = self.reranker.rerank(
+                data["query_text"],
+                (lexical or {}).get('results', []),
+                (dense or {}).get('results') or None,
+                elements,
+                limit=data["limit"]
+            )
+        extra = set(candidates["features"]) - set(data["features"])
+        if extra:
+            results = [{key: value for key, value in result.items() if key not in extra} for result in results]
+        return {"results": results}
+
+    async def _search_tribunal_async(self, tribunal: str, data: Dict, base_url: str,
+                                     stage_name: str = "search") -> Dict:
+        """Consulta uma coleção, passando pelo cache de resultados quando configurado"""
+        async def fetch():
+            #Sem cliente compartilhado, abre um cliente apenas para esta chamada
+            if self.async_client is None:
+                async with create_async_client() as client:
+                    return await self._post_async(client, base_url, tribunal, data)
+            return await self._post_async(self.async_client, base_url, tribunal, data)
+
+        with stage(stage_name, tribunal):
+            if self.search_cache is None:
+                response = await fetch()
+            else:
+                key = self.search_cache.make_key(base_url, tribunal, data)
+                response = await self.search_cache.get_or_fetch(key, tribunal, fetch)
+
+        if response and self.document_cache is not None:
+            self.document_cache.store_many(tribunal, response.get('results', []))
+        return response
+
+    async def fetch_documents_async(self, tribunal: str, ids: List[str], features: Optional[List[str]] = None,
+                                    base_url: str = DEFAULT_BASE_URL) -> Tuple[List[Dict], List[str]]:
+        """
+        Hidrata documentos pelos ids: os que estão no cache com todos os campos pedidos
+        são servidos dele e os demais vêm da API em uma única consulta (filtro ContainsAny
+        no id_documento)
+
+        Args:
+            tribunal: Tribunal, por nome curto ou coleção
+            ids: Valores de id_documento
+            features: Metadados retornados (default: os do tribunal)
+            base_url: URL base da API
+
+        Returns:
+            Tupla (documentos na ordem dos ids, ids não encontrados)
+        """
+        tribunal = self.resolve_tribunal(tribunal)
+        features = self._features_for(tribunal, features)
+        ids = list(dict.fromkeys(ids))
+
+        found, missing = {}, ids
+        if self.document_cache is not None:
+            found, missing = self.document_cache.get_many(tribunal, ids, features)
+
+        if missing:
+            data = {
+                "query_text": "",
+                "query_type": "bm25",
+                "limit": len(missing),
+                "features": features,
+                "filters": [{"content": missing, "query_type": "ContainsAny", "collection_field": "id_documento"}]
+            }
+            with stage("documents", tribunal):
+                if self.async_client is None:
+                    async with create_async_client() as client:
+                        response = await self._post_async(client, base_url, tribunal, data)
+                else:
+                    response = await self._post_async(self.async_client, base_url, tribunal, data)
+            fetched = (response or {}).get('results', [])
+            if self.document_cache is not None:
+                self.document_cache.store_many(tribunal, fetched)
+            for document in fetched:
+                if document.get("id_documento") in missing:
+                    found[document["id_documento"]] = {field: document.get(field) for field in features}
+
+        return [found[doc_id] for doc_id in ids if doc_id in found], [doc_id for doc_id in ids if doc_id not in found]
+
+    async def search_multi_async(self, query: str, tribunais: Optional[List[str]] = None,
+                                 base_url: str = DEFAULT_BASE_URL, deadline: float = 8.0,
+                                 limit: int = 5, rrf_k: int = 60, features: Optional[List[str]] = None,
+                                 offset: int = 0, filters: Optional[List[Dict]] = None,
+                                 elements: Optional[Dict] = None) -> Dict:
+        """
+        Consulta vários tribunais em paralelo e combina os resultados por
+        Reciprocal Rank Fusion, removendo documentos repetidos (id_documento).
+
+        Args:
+            query: Query em linguagem natural (já processada pelo KeywordExtractionAgent)
+            tribunais: Tribunais a consultar, por nome curto ou coleção (default: todos os do catálogo)
+            base_url: URL base da API
+            deadline: Tempo máximo (s) aguardando as coleções; as que não responderem são descartadas
+            limit: Quantidade de resultados após a fusão (página)
+            rrf_k: Constante de suavização do RRF
+            features: Metadados retornados (default: os de cada tribunal)
+            offset: Resultados fundidos pulados antes da página
+            filters: Filtros da API, aplicados em todos os tribunais
+            elements: Elementos extraídos do texto (conceitos_chave, area_direito), usados na reordenação
+
+        Returns:
+            Dict com os resultados combinados e o status de cada tribunal ("ok", "erro" ou "timeout")
+        """
+        status = {}
+        result_lists = {}
+        async for tribunal, tribunal_status, results in self.iter_search_multi_async(
+            query, tribunais, base_url, deadline, limit=offset + limit, features=features, filters=filters,
+            elements=elements
+        ):
+            status[tribunal] = tribunal_status
+            if tribunal_status == "ok":
+                result_lists[tribunal] = results
+
+        return {
+            "results": reciprocal_rank_fusion(result_lists, k=rrf_k, limit=offset + limit)[offset:],
+            "tribunais": status
+        }
+
+    async def iter_search_multi_async(self, query: str, tribunais: Optional[List[str]] = None,
+                                      base_url: str = DEFAULT_BASE_URL,
+                                      deadline: Optional[float] = 8.0, limit: int = 5,
+                                      features: Optional[List[str]] = None,
+                                      filters: Optional[List[Dict]] = None,
+                                      elements: Optional[Dict] = None) -> AsyncIterator[Tuple[str, str, List[Dict]]]:
+        """
+        Consulta vários tribunais em paralelo, entregando os resultados de cada um
+        na ordem em que as respostas chegam.
+
+        Args:
+            query: Query em linguagem natural (já processada pelo KeywordExtractionAgent)
+            tribunais: Tribunais a consultar, por nome curto ou coleção (default: todos os do catálogo)
+            base_url: URL base da API
+            deadline: Tempo máximo (s) aguardando as coleções (None = sem prazo); o orçamento
+                      de latência da requisição, se menor, prevalece
+            limit: Quantidade de resultados pedidos a cada tribunal
+            features: Metadados retornados (default: os de cada tribunal)
+            filters: Filtros da API, aplicados em todos os tribunais
+            elements: Elementos extraídos do texto (conceitos_chave, area_direito), usados na reordenação
+
+        Yields:
+            (coleção, status, resultados) com status "ok", "erro" ou "timeout"
+        """
+        tasks = {}
+        for tribunal in self._target_collections(tribunais):
+            _, data = self._build_request(query, tribunal, limit=limit, features=features, filters=filters)
+            tasks[asyncio.ensure_future(self._search_ranked_async(tribunal, data, base_url, elements))] = tribunal
+
+        async with aclosing(self._iter_completed(tasks, deadline)) as completed:
+            async for tribunal, tribunal_status, results in completed:
+                yield tribunal, tribunal_status, results
+
+    def _target_collections(self, tribunais: Optional[List[str]] = None) -> List[str]:
+        """Coleções dos tribunais pedidos, sem repetição (default: todas as do catálogo)"""
+        if tribunais:
+            return list(dict.fromkeys(self.resolve_tribunal(name) for name in tribunais))
+        return self.collections()
+
+    async def _iter_completed(self, tasks: Dict[asyncio.Future, Any],
+                              deadline: Optional[float]) -> AsyncIterator[Tuple[Any, str, List[Dict]]]:
+        """
+        Aguarda as buscas em paralelo sob o prazo global, entregando (chave, status, resultados)
+        na ordem em que terminam; as que não terminam no prazo saem com status "timeout" e são canceladas
+        """
+        #O orçamento de latência da requisição encurta o prazo global
+        request_deadline = current_deadline()
+        if request_deadline is not None:
+            deadline = request_deadline.timeout(deadline)
+
+        loop = asyncio.get_running_loop()
+        expires_at = loop.time() + deadline if deadline is not None else None
+        pending = set(tasks)
+        try:
+            while pending:
+                #Prazo global: uma coleção lenta não segura a resposta das demais
+                timeout = max(expires_at - loop.time(), 0) if expires_at is not None else None
+                done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    break
+                for task in done:
+                    #Uma busca cancelada (ex: a requisição que a iniciou esgotou o prazo) conta como erro do tribunal
+                    if task.cancelled() or task.exception() is not None or not task.result():
+                        yield tasks[task], "erro", []
+                    else:
+                        yield tasks[task], "ok", task.result().get('results', [])
+
+            if pending and request_deadline is not None and request_deadline.expired():
+                record_degradation(SEARCH_TIMEOUT)
+            for task in pending:
+                yield tasks[task], "timeout", []
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def search_expanded_async(self, queries: List[str], tribunais: Optional[List[str]] = None,
+                                    base_url: str = DEFAULT_BASE_URL, deadline: float = 5.0,
+                                    limit: int = 5, rrf_k: int = 60, features: Optional[List[str]] = None,
+                                    offset: int = 0, filters: Optional[List[Dict]] = None,
+                                    elements: Optional[Dict] = None, max_fanout: int = 8) -> Dict:
+        """
+        Busca expandida: executa a query principal e as alternativas em paralelo em cada
+        tribunal e combina os resultados (RRF em dois níveis, sem documentos repetidos).
+
+        Args:
+            queries: Query principal seguida das alternativas
+            tribunais: Tribunais a consultar, por nome curto ou coleção (default: todos os do catálogo)
+            base_url: URL base da API
+            deadline: Tempo máximo (s) aguardando as buscas; as que não responderem são descartadas
+            limit: Quantidade de resultados após a fusão (página)
+            rrf_k: Constante de suavização do RRF
+            features: Metadados retornados (default: os de cada tribunal)
+            offset: Resultados fundidos pulados antes da página
+            filters: Filtros da API, aplicados em todas as buscas
+            elements: Elementos extraídos do texto (conceitos_chave, area_direito), usados na reordenação
+            max_fanout: Máximo de buscas (queries x tribunais); as últimas alternativas são descartadas
+
+        Returns:
+            Dict com os resultados combinados e o status de cada tribunal e de cada query
+            ("ok", "erro", "timeout" ou, para as queries além do limite, "descartada")
+        """
+        result_lists = {}
+        statuses = []
+        async for tribunal, query, search_status, results in self.iter_search_expanded_async(
+            queries, tribunais, base_url, deadline, limit=offset + limit, features=features, filters=filters,
+            elements=elements, max_fanout=max_fanout
+        ):
+            statuses.append((tribunal, query, search_status))
+            if search_status == "ok":
+                result_lists[(tribunal, query)] = results
+
+        tribunal_status, query_status = expansion_status(queries, statuses)
+        return {
+            "results": fuse_expanded_results(result_lists, k=rrf_k, limit=offset + limit)[offset:],
+            "tribunais": tribunal_status,
+            "consultas": query_status
+        }
+
+    async def iter_search_expanded_async(self, queries: List[str], tribunais: Optional[List[str]] = None,
+                                         base_url: str = DEFAULT_BASE_URL,
+                                         deadline: Optional[float] = 5.0, limit: int = 5,
+                                         features: Optional[List[str]] = None,
+                                         filters: Optional[List[Dict]] = None,
+                                         elements: Optional[Dict] = None,
+                                         max_fanout: int = 8) -> AsyncIterator[Tuple[str, str, str, List[Dict]]]:
+        """
+        Executa cada query em cada tribunal em paralelo (pelo cliente HTTP compartilhado),
+        entregando os resultados na ordem em que as respostas chegam. Todas as queries
+        mantidas consultam todos os tribunais: com mais combinações que `max_fanout`,
+        as últimas alternativas são descartadas (a query principal sempre é executada).
+
+        Yields:
+            (coleção, query, status, resultados) com status "ok", "erro" ou "timeout"
+        """
+        collections = self._target_collections(tribunais)
+        queries = list(dict.fromkeys(queries))[:max(1, max_fanout // max(len(collections), 1))]
+
+        tasks = {}
+        for query in queries:
+            for tribunal in collections:
+                _, data = self._build_request(query, tribunal, limit=limit, features=features, filters=filters)
+                task = asyncio.ensure_future(self._search_ranked_async(tribunal, data, base_url, elements))
+                tasks[task] = (tribunal, query)
+
+        async with aclosing(self._iter_completed(tasks, deadline)) as completed:
+            async for (tribunal, query), search_status, results in completed:
+                yield tribunal, query, search_status, results
+
+    async def _post_async(self, client: httpx.AsyncClient, base_url: str, tribunal: str, data: Dict) -> Dict:
+        """Faz a chamada assíncrona ao endpoint /query"""
+        try:
+            response = await post_with_retry_async(
+                client,
+                f'{base_url}/query',
+                stats=self.stats,
+                params={'tribunal': tribunal},
+                json=data
+            )
+            response.raise_for_status()
+            return response.json()
+
+        except httpx.HTTPError as e:
+            print(f"\nErro ao fazer a chamada à API: {str(e)}")
+            return None
+
+
+#Exemplo de uso
+'''
+if __name__ == "__main__":
+    #A query já deve vir processada do agent_query
+    #Para testar, você pode rodar primeiro o .py e copiar a query gerada
+    query = "decisões sobre cobrança abusiva de tarifas bancárias e direito à informação do consumidor"
+    
+    #Inicializa o agente de busca
+    search_agent = LegalSearchAgent()
+    
+    #Executa a busca
+    results = search_agent.search(query)
+    
+    if results:
+        print("\nResultados da busca:")
+        print(results) 
 '''
\ No newline at end of file
@@ -1,205 +1,837 @@
-from crewai import Agent, Task, LLM
-from typing import Dict, List
-import os
-from dotenv import load_dotenv
-import json
-import re
-
-
-class KeywordExtractionAgent:
-    def __init__(self, api_key: str = None):
-        # Carrega a chave da API
-        if api_key is None:
-            load_dotenv()  #Carrega do arquivo .env padrao
-            api_key = os.getenv("OPENAI_API_KEY")
-
-            if api_key is None:
-                raise ValueError("API key não encontrada. Por favor, forneça a chave como parâmetro ou configure no arquivo .env")
-
-        #Inicializa o LLM do CrewAI
-        self.llm = LLM(
-            model="gpt-4o-mini",
-            temperature=0.2,  # Redução da temperatura para respostas mais diretas e rápidas
-            api_key=api_key
-        )
-
-        #Cria o agente que faz a extração de palavras-chave
-        self.agent = Agent(
-            role='Especialista jurídico',
-            goal='''Gerar queries de busca jurisprudencial eficientes a partir de textos jurídicos''',
-            backstory="""Especialista em análise de textos jurídicos e formulação de queries 
-                      com foco em termos técnicos e linguagem jurídica adequada.""",
-            llm=self.llm,
-            verbose=False
-        )
-
-    def extract_json_from_text(self, text: str) -> str:
-        """
-        Extrai um objeto JSON de um texto. Versão super otimizada.
-        
-        Args:
-            text: Texto que pode conter um objeto JSON
-            
-        Returns:
-            String contendo apenas o objeto JSON
-        """
-        text = text.strip()
-        
-        # Se já começa e termina com chaves, assume que é JSON
-        if text.startswith('{') and text.endswith('}'):
-            return text
-            
-        # Caso contrário, usa regex simples para extrair
-        json_match = re.search(r'\{.*\}', text, re.DOTALL)
-        return json_match.group(0) if json_match else '{}'
-
-    def _analyze_text_for_query_elements(self, context: str) -> Dict:
-        """
-        Analisa o texto para extrair elementos que ajudarão a construir uma query melhor.
-        Este método é apenas para uso interno.
-
-        Args:
-            context: Texto jurídico para análise
-
-        Returns:
-            Dict com elementos para ajudar a construir a query final
-        """
-        prompt = f"""
-        Texto: {context}
-
-        Analise o texto acima e extraia elementos para construir uma busca jurisprudencial eficiente.
-
-        Formato: {{
-            "area_direito": "área específica do direito identificada",
-            "conceitos_chave": ["conceito1", "conceito2", "conceito3", "conceito4", "conceito5"],
-            "situacao": "descrição concisa da situação jurídica"
-        }}
-
-        Instruções:
-        - Identifique a área do direito específica (ex: "direito do consumidor", "direito penal", etc.)
-        - Extraia 3 a 5 conceitos-chave relevantes para a busca jurisprudencial
-        - Descreva a situação jurídica em uma frase curta
-        - Use termos técnicos jurídicos apropriados
-
-        Responda APENAS com o JSON.
-        """
-
-        task = Task(
-            description=prompt,
-            expected_output="JSON com elementos para query"
-        )
-
-        result_json = self.agent.execute_task(task)
-        
-        # Extrai apenas o JSON da resposta
-        json_str = self.extract_json_from_text(result_json.strip())
-        
-        try:
-            elements = json.loads(json_str)
-            return elements
-        except (json.JSONDecodeError, AttributeError):
-            # Fallback mínimo
-            return {
-                "area_direito": "Direito Geral",
-                "conceitos_chave": ["jurisprudência"],
-                "situacao": "análise jurídica"
-            }
-
-    def _build_query_from_elements(self, elements: Dict) -> str:
-        """
-        Constrói uma query otimizada a partir dos elementos extraídos.
-        
-        Args:
-            elements: Dicionário com área do direito, conceitos-chave e situação
-            
-        Returns:
-            String com a query otimizada
-        """
-        prompt = f"""
-        Elementos jurídicos:
-        - Área do direito: {elements.get('area_direito', 'Direito Geral')}
-        - Conceitos-chave: {', '.join(elements.get('conceitos_chave', ['jurisprudência']))}
-        - Situação: {elements.get('situacao', 'análise jurídica')}
-
-        Construa uma query de busca jurisprudencial otimizada usando os elementos acima.
-        
-        Instruções:
-        - Use termos jurídicos relevantes (15-20 palavras)
-        - Use linguagem natural com conectores
-        - Evite operadores booleanos
-        - Inclua termos técnicos da área do direito identificada
-        - Use os conceitos-chave mais relevantes
-        - Contextualize com base na situação jurídica
-
-        Exemplos de queries:
-        - "devolucao em dobro de tarifa bancaria por cobranca abusiva no direito do consumidor"
-        - "indenizacao por danos morais em cobranca indevida de servicos bancarios"
-        - "revisao contratual por clausulas abusivas e onerosidade excessiva"
-
-        Responda APENAS com a query em texto simples, sem formatação ou explicações.
-        """
-
-        task = Task(
-            description=prompt,
-            expected_output="Query textual"
-        )
-
-        result = self.agent.execute_task(task)
-        
-        # Limpa a resposta
-        query = result.strip().strip('"\'')
-        
-        return query
-
-    def extract_keywords(self, context: str) -> str:
-        """
-        Gera uma query de busca a partir de um texto jurídico.
-        Usa análise interna de área do direito, conceitos-chave e situação
-        para construir uma query mais eficiente.
-
-        Args:
-            context: Texto jurídico para análise
-
-        Returns:
-            String contendo a query para busca
-        """
-        # Primeiro analisa o texto para extrair elementos úteis (apenas para uso interno)
-        elements = self._analyze_text_for_query_elements(context)
-        
-        # Depois constrói a query baseada nesses elementos
-        query = self._build_query_from_elements(elements)
-        
-        # Retorna apenas a query final como string
-        return query
-
-
-# Exemplo de uso
-'''
-if __name__ == "__main__":
-    try:
-        # Inicializa o agente
-        agent = KeywordExtractionAgent()
-
-        # Exemplo de texto juridico
-        texto_exemplo = """
-                Deste modo, nao havendo possibilidade de devolucao em
-        dobro do valor correspondente a Tarifa de Cadastro cobrada, que
-        seja ao menos devolvido o valor pago em excesso de forma dobrada.
-        Vale destacar que, o presente caso esta sendo vedado ao
-        consumidor o direito minimo a informacao, sendo esta cobranca
-        claramente abusiva, tendo em vista que exige vantagem
-        manifestamente excessiva, ja que no contrato a fonte da letra nao
-        respeita a previsao legal, tornando mais dificultoso a leitura de
-        clausulas e valores, bem como a cobranca por servico que nao se
-        sabe o que e e que nao fora utilizado pelo consumidor. Desta
-        forma, vejamos posicionamento jurisprudencial sobre o tema:
-        """
-
-        # Extrai palavras-chave e constroi a query
-        query = agent.extract_keywords(texto_exemplo)
-        print("\nQuery construida:")
-        print(query)
-
-    except Exception as e:
-        print(f"Erro ao inicializar o agente: {str(e)}") 
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Tuple, Union
+from .cache import BaseCache, make_cache_key
+from .deadline import (PARTIAL_CHUNKS, QUERY_FROM_CONCEPTS, QUERY_FROM_TEXT, SEMANTIC_NEIGHBOUR,
+                       DeadlineExceeded, current_deadline, current_degradations, record_degradation)
+from .json_parser import JSONParseError, parse_json_object
+from .lexical import LexicalIndex
+from .llm_backends import LLMBackend, LLMRouter, create_router, is_fallback_error
+from .metrics import JSON_REPAIRS, record_tokens_saved, stage
+from .preprocess import Preprocessor, merge_elements
+from .prompts import Prompt, PromptVariant, get_prompt_variant
+from pydantic import BaseModel, Field, field_validator
+from .semantic_cache import SemanticCache
+import os
+from dotenv import load_dotenv
+import contextvars
+import json
+import threading
+import time
+
+if TYPE_CHECKING:
+    from crewai import Agent, Task
+
+
+def _crewai():
+    """Módulo do CrewAI, importado na primeira chamada ao LLM (a importação leva segundos)"""
+    import crewai
+    return crewai
+
+
+class FiltrosTexto(BaseModel):
+    """Período e relator pedidos no texto, quando as expressões locais não os reconhecem (valores inválidos viram null)"""
+    ano_inicial: Optional[int] = None
+    ano_final: Optional[int] = None
+    ultimos_anos: Optional[int] = None
+    relator: Optional[str] = None
+
+    @field_validator("ano_inicial", "ano_final", "ultimos_anos", mode="before")
+    @classmethod
+    def _invalid_as_none(cls, value):
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return None
+
+    @field_validator("relator", mode="before")
+    @classmethod
+    def _relator_as_text(cls, value):
+        return value.strip() or None if isinstance(value, str) else None
+
+
+class ElementosQuery(BaseModel):
+    """Esquema do JSON de elementos devolvido pelo LLM (o tribunal só é pedido nas variantes que o extraem)"""
+    tribunal: str = ""
+    area_direito: str = Field(..., min_length=1)
+    conceitos_chave: List[str] = Field(..., min_length=1)
+    situacao: str = ""
+    filtros: Optional[FiltrosTexto] = None
+
+    @field_validator("tribunal", "situacao", mode="before")
+    @classmethod
+    def _none_as_empty(cls, value):
+        return "" if value is None else value
+
+
+class ElementosQueryUmaEtapa(ElementosQuery):
+    """Esquema do JSON do modo em uma etapa (elementos e query)"""
+    query_text: str = ""
+    queries_alternativas: List[str] = []
+
+    @field_validator("query_text", mode="before")
+    @classmethod
+    def _query_none_as_empty(cls, value):
+        return "" if value is None else value
+
+    @field_validator("queries_alternativas", mode="before")
+    @classmethod
+    def _alternatives_none_as_empty(cls, value):
+        return [] if value is None else value
+
+
+class QueriesBusca(BaseModel):
+    """Esquema do JSON da query principal com as queries alternativas (expansão da busca)"""
+    query_text: str = Field(..., min_length=1)
+    queries_alternativas: List[str] = []
+
+    @field_validator("queries_alternativas", mode="before")
+    @classmethod
+    def _alternatives_none_as_empty(cls, value):
+        return [] if value is None else value
+
+
+def clean_alternatives(query: str, alternatives: List[str], limit: int) -> List[str]:
+    """Queries alternativas sem aspas, vazias ou repetidas (inclusive a principal), até `limit`"""
+    seen = {" ".join(query.lower().split())}
+    cleaned = []
+    for alternative in alternatives:
+        alternative = str(alternative).strip().strip('"\'')
+        key = " ".join(alternative.lower().split())
+        if key and key not in seen:
+            seen.add(key)
+            cleaned.append(alternative)
+    return cleaned[:limit]
+
+
+class KeywordExtractionAgent:
+    #Modelo padrão (faz parte da chave do cache, junto com a temperatura e a versão dos prompts da variante)
+    MODEL = "gpt-4o-mini"
+
+    #Modos de extração: duas chamadas ao LLM (elementos e depois query) ou uma única chamada estruturada
+    TWO_PASS = "two_pass"
+    SINGLE_PASS = "single_pass"
+    EXTRACTION_MODES = (TWO_PASS, SINGLE_PASS)
+
+    #Chamadas simultâneas ao LLM com prazo ou duplicata, somando todos os agentes de extração do processo
+    MAX_CONCURRENT_CALLS = 32
+    #Palavras do texto usadas como query quando a extração não termina dentro do orçamento de latência
+    DEGRADED_QUERY_WORDS = 25
+
+    def __init__(self, api_key: str = None, cache: Optional[BaseCache] = None,
+                 extraction_mode: str = TWO_PASS, lexical_index: Optional[LexicalIndex] = None,
+                 semantic_cache: Optional[SemanticCache] = None, preprocessor: Optional[Preprocessor] = None,
+                 router: Optional[LLMRouter] = None, degraded_similarity: float = 0.8,
+                 prompts: Union[str, PromptVariant] = "busca"):
+        #Backends de LLM e modelo de cada etapa (padrão: apenas MODEL na OpenAI)
+        self.router = router or create_router("", "", self.MODEL)
+
+        # Carrega a chave da API (dispensada quando todos os backends são locais ou têm chave própria)
+        if api_key is None:
+            load_dotenv()  #Carrega do arquivo .env padrao
+            api_key = os.getenv("OPENAI_API_KEY")
+
+            if api_key is None and any(not backend.local and backend.api_key is None
+                                       for backend in self.router.backends.values()):
+                raise ValueError("API key não encontrada. Por favor, forneça a chave como parâmetro ou configure no arquivo .env")
+        self.api_key = api_key
+
+        #Variante de prompt padrão: prompts, persona e temperatura (pode ser alterada por chamada)
+        self.prompts = self._resolve_prompts(prompts)
+
+        #Cache das extrações (compartilhado entre os agentes do pool)
+        self.cache = cache
+
+        #Cache por similaridade, para textos quase iguais a um já processado (também compartilhado)
+        self.semantic_cache = semantic_cache
+
+        #Índice léxico do caminho rápido (compartilhado entre os agentes do pool)
+        self.lexical_index = lexical_index
+
+        #Modo de extração padrão (pode ser alterado por chamada)
+        if extraction_mode not in self.EXTRACTION_MODES:
+            raise ValueError(f"Modo de extração inválido: {extraction_mode}")
+        self.extraction_mode = extraction_mode
+
+        #Pré-processamento do texto antes do prompt (limpeza, resumo e divisão em trechos)
+        self.preprocessor = preprocessor
+
+        #Similaridade aceita do cache semântico quando o orçamento de latência da requisição está no fim
+        self.degraded_similarity = degraded_similarity
+
+        #LLMs do CrewAI por backend e temperatura, e pool de agentes livres por backend e variante: cada chamada
+        #ocupa um agente (o agente do CrewAI não executa tarefas simultâneas). A API constrói os agentes na
+        #inicialização (warm_up); fora dela são criados na primeira chamada ao LLM, e só então o CrewAI é importado
+        self._llms: Dict[Tuple[str, float], Any] = {}
+        self._idle_agents: Dict[Tuple[str, str], List["Agent"]] = defaultdict(list)
+        self._all_agents: List["Agent"] = []
+        self._agents_lock = threading.Lock()
+        #Tempo de construção de cada agente do CrewAI, usado no benchmark de inicialização
+        self.construction_times: List[float] = []
+
+    #Threads das chamadas com prazo ou duplicata (a chamada que perde segue em segundo plano até terminar),
+    #compartilhadas pelos agentes do pool e criadas na primeira chamada
+    _call_executor: Optional[ThreadPoolExecutor] = None
+    _call_executor_lock = threading.Lock()
+
+    @classmethod
+    def call_executor(cls) -> ThreadPoolExecutor:
+        """Executor compartilhado das chamadas com prazo ou duplicata"""
+        with cls._call_executor_lock:
+            if cls._call_executor is None:
+                cls._call_executor = ThreadPoolExecutor(max_workers=cls.MAX_CONCURRENT_CALLS,
+                                                        thread_name_prefix="llm_call")
+            return cls._call_executor
+
+    @classmethod
+    def shutdown_call_executor(cls) -> None:
+        """Encerra o executor compartilhado (no desligamento da aplicação); a próxima chamada cria outro"""
+        with cls._call_executor_lock:
+            executor, cls._call_executor = cls._call_executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    def _resolve_prompts(self, prompts: Union[str, PromptVariant, None]) -> PromptVariant:
+        """Variante de prompt pelo nome (None: a variante padrão do agente)"""
+        if prompts is None:
+            return self.prompts
+        return get_prompt_variant(prompts) if isinstance(prompts, str) else prompts
+
+    def _create_agent(self, backend_name: str, prompts: PromptVariant) -> "Agent":
+        """Cria um agente do CrewAI com a persona da variante, no LLM do backend na temperatura da variante"""
+        with self._agents_lock:
+            llm = self._llms.get((backend_name, prompts.temperature))
+            if llm is None:
+                backend = self.router.backends[backend_name]
+                llm = self._llms[(backend_name, prompts.temperature)] = backend.create_llm(prompts.temperature,
+                                                                                           self.api_key)
+        return _crewai().Agent(
+            role=prompts.role,
+            goal=prompts.goal,
+            backstory=prompts.backstory,
+            llm=llm,
+            verbose=False
+        )
+
+    def _new_agent(self, backend_name: str, prompts: PromptVariant) -> "Agent":
+        """Constrói um agente do pool, registrando o tempo de construção"""
+        start = time.perf_counter()
+        agent = self._create_agent(backend_name, prompts)
+        with self._agents_lock:
+            self._all_agents.append(agent)
+            self.construction_times.append(time.perf_counter() - start)
+        return agent
+
+    def _acquire_agent(self, backend_name: str, prompts: PromptVariant) -> "Agent":
+        """Agente livre do backend na variante, criado se todos estiverem ocupados"""
+        with self._agents_lock:
+            if self._idle_agents[(backend_name, prompts.name)]:
+                return self._idle_agents[(backend_name, prompts.name)].pop()
+        return self._new_agent(backend_name, prompts)
+
+    def _release_agent(self, backend_name: str, prompts: PromptVariant, agent: "Agent") -> None:
+        with self._agents_lock:
+            self._idle_agents[(backend_name, prompts.name)].append(agent)
+
+    def warm_up(self, size: int, prompts: Union[str, PromptVariant, None] = None) -> None:
+        """
+        Constrói antecipadamente `size` agentes do CrewAI por backend configurado na variante
+        (padrão: a do agente), para que as primeiras requisições não paguem a importação do
+        CrewAI nem a construção dos agentes. Chamadas simultâneas acima disso criam agentes extras.
+        """
+        prompts = self._resolve_prompts(prompts)
+        for backend_name in self.router.backends:
+            agents = [self._new_agent(backend_name, prompts) for _ in range(size)]
+            for agent in agents:
+                self._release_agent(backend_name, prompts, agent)
+
+    @property
+    def size(self) -> int:
+        """Quantidade de agentes do CrewAI construídos (todos os backends e variantes)"""
+        with self._agents_lock:
+            return len(self._all_agents)
+
+    @property
+    def available(self) -> int:
+        """Quantidade de agentes do CrewAI livres no momento"""
+        with self._agents_lock:
+            return sum(len(agents) for agents in self._idle_agents.values())
+
+    @property
+    def in_use(self) -> int:
+        """Quantidade de agentes do CrewAI executando uma chamada no momento"""
+        return self.size - self.available
+
+    def average_construction_time(self) -> float:
+        """Tempo médio (em segundos) para construir um agente do CrewAI"""
+        with self._agents_lock:
+            if not self.construction_times:
+                return 0.0
+            return sum(self.construction_times) / len(self.construction_times)
+
+    def measure_checkout_time(self, rounds: int = 100) -> float:
+        """Tempo médio (em segundos) para emprestar e devolver um agente livre da variante padrão"""
+        backend_name = self.router.default
+        start = time.perf_counter()
+        for _ in range(rounds):
+            self._release_agent(backend_name, self.prompts, self._acquire_agent(backend_name, self.prompts))
+        return (time.perf_counter() - start) / rounds
+
+    @staticmethod
+    def _task(prompt: Prompt) -> "Task":
+        description, expected_output = prompt
+        return _crewai().Task(description=description, expected_output=expected_output)
+
+    def _call_backend(self, backend: LLMBackend, task: "Task", prompts: PromptVariant) -> str:
+        """Executa a tarefa em um agente livre do backend, somando latência, tokens e custo ao backend"""
+        agent = self._acquire_agent(backend.name, prompts)
+        try:
+            before = agent._token_process.get_summary()
+            started = time.perf_counter()
+            result = agent.execute_task(task)
+            after = agent._token_process.get_summary()
+            backend.record_success(
+                time.perf_counter() - started,
+                after.prompt_tokens - before.prompt_tokens,
+                after.completion_tokens - before.completion_tokens
+            )
+            return result
+        finally:
+            self._release_agent(backend.name, prompts, agent)
+
+    def _call_within_deadline(self, backend: LLMBackend, task: "Task", prompts: PromptVariant) -> str:
+        """
+        Chama o backend respeitando o orçamento de latência da requisição. Se a chamada
+        passar do percentil configurado da latência do backend, dispara uma duplicata e
+        usa a resposta que chegar primeiro (a outra segue em segundo plano e é descartada).
+
+        Raises:
+            DeadlineExceeded: se o orçamento acabar antes de alguma resposta
+        """
+        deadline = current_deadline()
+        hedge_delay = self.router.hedge_delay(backend)
+        if deadline is None and hedge_delay is None:
+            return self._call_backend(backend, task, prompts)
+        if deadline is not None and deadline.expired():
+            raise DeadlineExceeded(f"orçamento de latência esgotado antes da chamada a {backend.name}")
+
+        #Cada chamada recebe uma cópia do contexto, para manter o prazo e os tempos da requisição
+        executor = self.call_executor()
+        calls = {executor.submit(contextvars.copy_context().run, self._call_backend, backend, task, prompts): False}
+        if hedge_delay is not None:
+            done, _ = wait(calls, timeout=deadline.timeout(hedge_delay) if deadline is not None else hedge_delay)
+            if not done and (deadline is None or not deadline.expired()):
+                duplicate = self._task((task.description, task.expected_output))
+                calls[executor.submit(
+                    contextvars.copy_context().run, self._call_backend, backend, duplicate, prompts
+                )] = True
+
+        pending = set(calls)
+        error = None
+        while pending:
+            done, pending = wait(pending, timeout=deadline.remaining() if deadline is not None else None,
+                                 return_when=FIRST_COMPLETED)
+            if not done:
+                raise DeadlineExceeded(f"orçamento de latência esgotado aguardando {backend.name}")
+            for future in done:
+                if future.exception() is None:
+                    if len(calls) > 1:
+                        backend.record_hedge(calls[future])
+                    return future.result()
+                error = error or future.exception()
+        raise error
+
+    def _execute(self, stage_name: str, prompt: Prompt, prompts: PromptVariant) -> str:
+        """
+        Executa o prompt no modelo configurado para a etapa; se o backend esgotar o
+        prazo ou estiver fora do ar, repete a tarefa no próximo backend da cadeia.
+        A latência, os tokens e o custo de cada chamada são somados ao backend que a atendeu.
+
+        Args:
+            stage_name: Etapa do pipeline (extract_elements, build_query, single_pass ou json_repair)
+            prompt: Descrição e expected_output da tarefa do CrewAI
+            prompts: Variante de prompt (persona do agente e temperatura)
+
+        Returns:
+            Resposta do LLM
+
+        Raises:
+            DeadlineExceeded: se o orçamento de latência da requisição acabar (sem passar ao próximo backend)
+        """
+        task = self._task(prompt)
+        chain = self.router.chain(stage_name)
+        for position, backend in enumerate(chain):
+            started = time.perf_counter()
+            try:
+                return self._call_within_deadline(backend, task, prompts)
+            except DeadlineExceeded:
+                backend.record_failure(time.perf_counter() - started, False)
+                raise
+            except Exception as e:
+                fallback = is_fallback_error(e) and position < len(chain) - 1
+                backend.record_failure(time.perf_counter() - started, fallback)
+                if not fallback:
+                    raise
+
+    def _short_of_time(self, *stages: str) -> bool:
+        """Indica se o orçamento restante da requisição não cobre a latência mediana das etapas do LLM"""
+        deadline = current_deadline()
+        if deadline is None:
+            return False
+        expected = sum(self.router.expected_latency(stage_name) or 0.0 for stage_name in stages)
+        return deadline.remaining() < expected
+
+    def _parse_with_repair(self, response: str, schema, prompts: PromptVariant) -> Dict:
+        """
+        Valida o JSON da resposta no esquema; se falhar, faz uma única chamada de
+        reparo apontando o erro, em vez de seguir com elementos genéricos.
+
+        Raises:
+            JSONParseError: se nem a resposta reparada for válida
+        """
+        with stage("parse_json"):
+            try:
+                return parse_json_object(response, schema)
+            except JSONParseError as e:
+                error = e
+
+        with stage("json_repair"):
+            repaired = self._execute("json_repair", prompts.repair(list(schema.model_fields), error.detail, response),
+                                     prompts)
+
+        with stage("parse_json"):
+            try:
+                result = parse_json_object(repaired, schema)
+            except JSONParseError:
+                JSON_REPAIRS.labels("falha").inc()
+                raise
+        JSON_REPAIRS.labels("ok").inc()
+        return result
+
+    @staticmethod
+    def _drop_unrequested(result: Dict, prompts: PromptVariant, filters: bool) -> Dict:
+        """Remove do resultado os campos que o prompt não pediu (tribunal e filtros)"""
+        if not prompts.extracts_tribunal:
+            result.pop("tribunal")
+        if not filters:
+            result.pop("filtros")
+        return result
+
+    def _analyze_text_for_query_elements(self, context: str, filters: bool = False,
+                                         prompts: Optional[PromptVariant] = None) -> Dict:
+        """
+        Analisa o texto para extrair elementos que ajudarão a construir uma query melhor.
+        Este método é apenas para uso interno.
+
+        Args:
+            context: Texto jurídico para análise
+            filters: Se True, pede também o período e o relator da jurisprudência buscada (campo "filtros")
+            prompts: Variante de prompt (padrão: a do agente)
+
+        Returns:
+            Dict com elementos para ajudar a construir a query final
+        """
+        prompts = self._resolve_prompts(prompts)
+        with stage("extract_elements"):
+            result_json = self._execute("extract_elements", prompts.elements(context, filters), prompts)
+
+        elements = self._parse_with_repair(result_json, ElementosQuery, prompts)
+        return self._drop_unrequested(elements, prompts, filters)
+
+    def _build_query_from_elements(self, elements: Dict, prompts: Optional[PromptVariant] = None) -> str:
+        """
+        Constrói uma query otimizada a partir dos elementos extraídos.
+        
+        Args:
+            elements: Dicionário com área do direito, conceitos-chave e situação
+            prompts: Variante de prompt (padrão: a do agente)
+            
+        Returns:
+            String com a query otimizada
+        """
+        prompts = self._resolve_prompts(prompts)
+        with stage("build_query"):
+            result = self._execute("build_query", prompts.query(elements), prompts)
+        
+        # Limpa a resposta
+        query = result.strip().strip('"\'')
+        
+        return query
+
+    def _build_queries_from_elements(self, elements: Dict, expansion: int,
+                                     prompts: Optional[PromptVariant] = None) -> List[str]:
+        """
+        Constrói a query principal e `expansion` queries alternativas em uma única
+        chamada ao LLM, cada alternativa com outro grupo de conceitos-chave ou outros
+        termos técnicos, para que uma formulação ruim não comprometa a busca
+
+        Returns:
+            Lista com a query principal seguida das alternativas (sem repetições)
+        """
+        prompts = self._resolve_prompts(prompts)
+        with stage("build_query"):
+            result_json = self._execute("build_query", prompts.queries(elements, expansion), prompts)
+
+        result = self._parse_with_repair(result_json, QueriesBusca, prompts)
+        query = result["query_text"].strip().strip('"\'')
+        return [query, *clean_alternatives(query, result["queries_alternativas"], expansion)]
+
+    def _build_query_from_elements_within_budget(self, elements: Dict, expansion: int = 0,
+                                                 prompts: Optional[PromptVariant] = None) -> List[str]:
+        """
+        Constrói a query (e as alternativas, com `expansion`) pelo LLM ou, se o orçamento
+        de latência da requisição não comportar mais uma chamada, junta os conceitos-chave
+        (degradação "query_por_conceitos", sem alternativas)
+
+        Returns:
+            Lista com a query principal seguida das alternativas
+        """
+        if not self._short_of_time("build_query"):
+            try:
+                if expansion:
+                    return self._build_queries_from_elements(elements, expansion, prompts)
+                return [self._build_query_from_elements(elements, prompts)]
+            except DeadlineExceeded:
+                pass
+        record_degradation(QUERY_FROM_CONCEPTS)
+        return [" ".join(elements.get("conceitos_chave") or [])]
+
+    def _extract_single_pass(self, context: str, expansion: int = 0, filters: bool = False,
+                             prompts: Optional[PromptVariant] = None) -> Dict:
+        """
+        Extrai os elementos e constrói a query em uma única chamada ao LLM,
+        evitando a segunda ida e volta do modo em duas etapas.
+
+        Args:
+            context: Texto jurídico para análise
+            expansion: Queries alternativas pedidas na mesma chamada (0 = nenhuma)
+            filters: Se True, pede também o período e o relator da jurisprudência buscada (campo "filtros")
+            prompts: Variante de prompt (padrão: a do agente)
+
+        Returns:
+            Dict com area_direito, conceitos_chave, situacao, query_text e queries_alternativas
+            (e tribunal, na variante que o extrai, e filtros, com `filters`)
+        """
+        prompts = self._resolve_prompts(prompts)
+        with stage("single_pass"):
+            result_json = self._execute("single_pass", prompts.single_pass(context, expansion, filters), prompts)
+
+        result = self._drop_unrequested(self._parse_with_repair(result_json, ElementosQueryUmaEtapa, prompts),
+                                        prompts, filters)
+
+        # Sem query na resposta, constrói a query com a segunda chamada como no modo em duas etapas
+        if not result["query_text"]:
+            queries = self._build_query_from_elements_within_budget(result, expansion, prompts)
+            result["query_text"], result["queries_alternativas"] = queries[0], queries[1:]
+            return result
+
+        result["query_text"] = result["query_text"].strip().strip('"\'')
+        result["queries_alternativas"] = clean_alternatives(result["query_text"], result["queries_alternativas"],
+                                                            expansion)
+        return result
+
+    def _extract_elements_from_chunks(self, chunks: List[str], prompts: Optional[PromptVariant] = None) -> Dict:
+        """
+        Extrai os elementos de cada trecho de um texto longo em paralelo (um agente
+        por trecho, pois o agente do CrewAI não pode executar tarefas simultâneas)
+        e junta os resultados. Trechos que esgotam o orçamento de latência são
+        descartados (degradação "trechos_incompletos") se algum outro trecho respondeu.
+        """
+        with ThreadPoolExecutor(max_workers=len(chunks), thread_name_prefix="chunk") as executor:
+            #Cada thread recebe uma cópia do contexto, para que os tempos das etapas entrem na requisição
+            futures = [
+                executor.submit(contextvars.copy_context().run, self._analyze_text_for_query_elements, chunk, False,
+                                prompts)
+                for chunk in chunks
+            ]
+            results, errors = [], []
+            for future in futures:
+                try:
+                    results.append(future.result())
+                except (JSONParseError, DeadlineExceeded) as e:
+                    #Um trecho sem JSON válido (mesmo após o reparo) ou sem resposta no prazo não descarta os demais
+                    errors.append(e)
+
+        if not results:
+            raise errors[0]
+        if any(isinstance(error, DeadlineExceeded) for error in errors):
+            record_degradation(PARTIAL_CHUNKS)
+        return merge_elements(results)
+
+    def _llm_stages(self, mode: str) -> Tuple[str, ...]:
+        """Etapas do LLM percorridas por uma extração no modo indicado"""
+        return ("single_pass",) if mode == self.SINGLE_PASS else ("extract_elements", "build_query")
+
+    def _prepare_text(self, context: str) -> Tuple[str, List[str]]:
+        """
+        Aplica o pré-processamento configurado ao texto
+
+        Returns:
+            (texto a enviar no prompt, trechos a extrair separadamente ou lista vazia)
+        """
+        if self.preprocessor is None:
+            return context, []
+        with stage("preprocess"):
+            prepared = self.preprocessor.prepare(context)
+        record_tokens_saved(prepared.tokens_saved)
+        return prepared.text, prepared.chunks
+
+    def token_usage(self) -> Dict:
+        """
+        Tokens consumidos por este agente desde a sua criação (acumulado),
+        em todos os backends, incluindo os agentes extras usados nos trechos de textos longos
+
+        Returns:
+            Dict com prompt_tokens, completion_tokens, total_tokens e successful_requests
+        """
+        with self._agents_lock:
+            agents = list(self._all_agents)
+        summaries = [agent._token_process.get_summary() for agent in agents]
+        return {
+            "prompt_tokens": sum(usage.prompt_tokens for usage in summaries),
+            "completion_tokens": sum(usage.completion_tokens for usage in summaries),
+            "total_tokens": sum(usage.total_tokens for usage in summaries),
+            "successful_requests": sum(usage.successful_requests for usage in summaries)
+        }
+
+    def iter_extraction(self, context: str, use_cache: bool = True, mode: Optional[str] = None,
+                        expansion: int = 0, filters: bool = False,
+                        prompts: Union[str, PromptVariant, None] = None) -> Iterator[Tuple[str, Any]]:
+        """
+        Executa a extração em etapas, entregando cada resultado assim que fica pronto
+        (usado para enviar os elementos ao cliente antes da query final).
+
+        Args:
+            context: Texto jurídico para análise
+            use_cache: Se False, ignora os caches e o caminho rápido e refaz a extração pelo LLM
+                       (o resultado novo substitui o anterior)
+            mode: "two_pass" ou "single_pass" (padrão: modo definido na criação do agente)
+            expansion: Queries alternativas geradas junto com a query (0 = nenhuma)
+            filters: Se True, pede ao LLM o período e o relator da jurisprudência buscada
+                     (quando as expressões locais não os reconheceram no texto)
+            prompts: Variante de prompt, pelo nome ou instância (padrão: a variante do agente)
+
+        Yields:
+            ("elementos", Dict) com área do direito, conceitos-chave e situação (e o tribunal, na variante que
+            o extrai; ausente quando o orçamento de latência acaba antes dos elementos), com `filters`,
+            ("filtros", Dict) com os campos de FiltrosTexto devolvidos pelo LLM (vazio se o LLM não foi
+            chamado), com `expansion`, ("consultas", List[str]) com as queries alternativas (possivelmente
+            vazia) e por último ("query", str) com a query para busca
+        """
+        mode = mode or self.extraction_mode
+        if mode not in self.EXTRACTION_MODES:
+            raise ValueError(f"Modo de extração inválido: {mode}")
+        prompts = self._resolve_prompts(prompts)
+
+        #Cada variante de prompt, modo, expansão e pedido de filtros tem a sua chave nos caches
+        variant = f"{prompts.version}:{mode}" + (f":x{expansion}" if expansion else "") + (":f" if filters else "")
+
+        #Textos já processados são servidos do cache sem chamar o LLM
+        cache_key = make_cache_key(context, self.router.signature(), prompts.temperature, variant)
+        if self.cache is not None and use_cache:
+            with stage("extraction_cache"):
+                cached = self.cache.get(cache_key)
+            if cached is not None:
+                yield from self._cached_extraction(cached, expansion, filters)
+                return
+
+        #Textos quase iguais a um já processado (espaços, acentos ou poucas palavras diferentes) reaproveitam a query
+        vector = None
+        scope = f"{self.router.signature()}:{prompts.temperature}:{variant}"
+        if self.semantic_cache is not None:
+            with stage("semantic_cache"):
+                vector = self.semantic_cache.embed(context)
+                similar = self.semantic_cache.get(vector, scope) if use_cache else None
+            if similar is None and use_cache and self._short_of_time(*self._llm_stages(mode)):
+                #Sem tempo para o LLM: aceita a query de um texto parecido, abaixo do limiar normal
+                with stage("semantic_cache"):
+                    similar, similarity = self.semantic_cache.nearest(vector, scope)
+                if similar is not None and similarity >= self.degraded_similarity:
+                    record_degradation(SEMANTIC_NEIGHBOUR)
+                else:
+                    similar = None
+            if similar is not None:
+                yield from self._cached_extraction(similar, expansion, filters)
+                return
+
+        #Textos curtos e já no formato de query são classificados localmente, sem chamar o LLM
+        if self.lexical_index is not None and use_cache:
+            started = time.perf_counter()
+            with stage("lexical"):
+                match = self.lexical_index.classify(context)
+            if match is not None:
+                self.lexical_index.record(True, (time.perf_counter() - started) * 1000)
+                elements = {
+                    "area_direito": match["area_direito"],
+                    "conceitos_chave": match["conceitos_chave"],
+                    "situacao": context.strip()
+                }
+                if prompts.extracts_tribunal:
+                    elements["tribunal"] = match["tribunal"]
+                yield "elementos", elements
+                if filters:
+                    yield "filtros", {}
+                if expansion:
+                    yield "consultas", []
+                yield "query", match["query_text"]
+                return
+
+        started = time.perf_counter()
+        text, chunks = self._prepare_text(context)
+        hints = None
+        try:
+            if chunks:
+                #Texto muito longo: extrai os elementos de cada trecho em paralelo e monta a query com o resultado
+                #(sem os filtros, que as expressões locais procuram no texto inteiro)
+                elements = self._extract_elements_from_chunks(chunks, prompts)
+                yield "elementos", elements
+                query, *alternatives = self._build_query_from_elements_within_budget(elements, expansion, prompts)
+            elif mode == self.SINGLE_PASS:
+                # Elementos e query (e alternativas) em uma única chamada ao LLM
+                elements = self._extract_single_pass(text, expansion, filters, prompts)
+                query = elements.pop("query_text")
+                alternatives = elements.pop("queries_alternativas")
+                hints = elements.pop("filtros", None)
+                yield "elementos", elements
+            else:
+                # Primeiro analisa o texto para extrair elementos úteis (apenas para uso interno)
+                elements = self._analyze_text_for_query_elements(text, filters, prompts)
+                hints = elements.pop("filtros", None)
+                yield "elementos", elements
+
+                # Depois constrói a query baseada nesses elementos
+                query, *alternatives = self._build_query_from_elements_within_budget(elements, expansion, prompts)
+        except DeadlineExceeded:
+            #Orçamento de latência esgotado antes dos elementos: busca com o início do texto
+            record_degradation(QUERY_FROM_TEXT)
+            if filters:
+                yield "filtros", {}
+            if expansion:
+                yield "consultas", []
+            yield "query", " ".join(text.split()[:self.DEGRADED_QUERY_WORDS])
+            return
+
+        if filters:
+            hints = hints or {}
+            yield "filtros", hints
+        if expansion:
+            yield "consultas", alternatives
+
+        #Resultados degradados pelo orçamento de latência não entram nos caches nem no vocabulário
+        if current_degradations():
+            yield "query", query
+            return
+
+        #O vocabulário do caminho rápido aprende com cada extração feita pelo LLM
+        if self.lexical_index is not None:
+            self.lexical_index.record(False, (time.perf_counter() - started) * 1000)
+            self.lexical_index.learn(elements)
+
+        #Os caches guardam a extração inteira, para que os acertos também tragam os elementos
+        value = json.dumps({"consultas": [query, *alternatives], "elementos": elements, "filtros": hints},
+                           ensure_ascii=False)
+        if self.cache is not None:
+            self.cache.set(cache_key, value)
+        if self.semantic_cache is not None:
+            self.semantic_cache.set(vector, scope, value)
+
+        yield "query", query
+
+    def _cached_extraction(self, value: str, expansion: int, filters: bool = False) -> Iterator[Tuple[str, Any]]:
+        """Etapas de uma extração servida dos caches (objeto JSON com as queries, os elementos e os filtros)"""
+        data = json.loads(value)
+        query, *alternatives = data["consultas"]
+        if data.get("elementos") is not None:
+            yield "elementos", data["elementos"]
+        if filters:
+            yield "filtros", data.get("filtros") or {}
+        if expansion:
+            yield "consultas", alternatives
+        yield "query", query
+
+    def extract_keywords(self, context: str, use_cache: bool = True, mode: Optional[str] = None,
+                         prompts: Union[str, PromptVariant, None] = None) -> str:
+        """
+        Gera uma query de busca a partir de um texto jurídico.
+        Usa análise interna de área do direito, conceitos-chave e situação
+        para construir uma query mais eficiente.
+
+        Args:
+            context: Texto jurídico para análise
+            use_cache: Se False, ignora o cache e refaz a extração (o resultado novo substitui o anterior)
+            mode: "two_pass" ou "single_pass" (padrão: modo definido na criação do agente)
+            prompts: Variante de prompt (padrão: a variante do agente)
+
+        Returns:
+            String contendo a query para busca
+        """
+        return self.extract_query_and_elements(context, use_cache, mode, prompts)[0]
+
+    def extract_query_and_elements(self, context: str, use_cache: bool = True, mode: Optional[str] = None,
+                                   prompts: Union[str, PromptVariant, None] = None) -> Tuple[str, Optional[Dict]]:
+        """
+        Como extract_keywords, mas devolve também os elementos extraídos do texto
+        (usados na reordenação dos resultados da busca)
+
+        Returns:
+            Tupla (query, elementos); elementos é None quando a query veio do início do texto
+            (orçamento de latência esgotado)
+        """
+        queries, elements, _ = self.extract_queries(context, 0, use_cache, mode, prompts=prompts)
+        return queries[0], elements
+
+    def extract_queries(self, context: str, expansion: int = 0, use_cache: bool = True,
+                        mode: Optional[str] = None, filters: bool = False,
+                        prompts: Union[str, PromptVariant, None] = None) -> Tuple[List[str], Optional[Dict], Dict]:
+        """
+        Gera a query e até `expansion` queries alternativas (na mesma chamada ao LLM
+        que constrói a query), para a busca expandida, e com `filters` o período e o
+        relator pedidos no texto
+
+        Returns:
+            Tupla (queries, elementos, filtros), com a query principal em primeiro lugar;
+            elementos é None quando a query veio do início do texto e filtros é vazio sem `filters`
+        """
+        elements = None
+        hints = {}
+        alternatives = []
+        for step_name, value in self.iter_extraction(context, use_cache, mode, expansion, filters, prompts):
+            if step_name == "elementos":
+                elements = value
+            elif step_name == "filtros":
+                hints = value
+            elif step_name == "consultas":
+                alternatives = value
+            elif step_name == "query":
+                return [value, *alternatives], elements, hints
+
+# Exemplo de uso
+'''
+if __name__ == "__main__":
+    try:
+        # Inicializa o agente
+        agent = KeywordExtractionAgent()
+
+        # Exemplo de texto juridico
+        texto_exemplo = """
+                Deste modo, nao havendo possibilidade de devolucao em
+        dobro do valor correspondente a Tarifa de Cadastro cobrada, que
+        seja ao menos devolvido o valor pago em excesso de forma dobrada.
+        Vale destacar que, o presente caso esta sendo vedado ao
+        consumidor o direito minimo a informacao, sendo esta cobranca
+        claramente abusiva, tendo em vista que exige vantagem
+        manifestamente excessiva, ja que no contrato a fonte da letra nao
+        respeita a previsao legal, tornando mais dificultoso a leitura de
+        clausulas e valores, bem como a cobranca por servico que nao se
+        sabe o que e e que nao fora utilizado pelo consumidor. Desta
+        forma, vejamos posicionamento jurisprudencial sobre o tema:
+        """
+
+        # Extrai palavras-chave e constroi a query
+        query = agent.extract_keywords(texto_exemplo)
+        print("\nQuery construida:")
+        print(query)
+
+    except Exception as e:
+        print(f"Erro ao inicializar o agente: {str(e)}") 
 '''
\ No newline at end of file
@@ -1,76 +1,759 @@
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from typing import List, Dict, Optional, Any
-from agent_query import KeywordExtractionAgent
-from agent_busca import LegalSearchAgent
-import json
-import uvicorn
-
-#Modelos de dados para a API
-class TextoJuridicoInput(BaseModel):
-    texto: str
-
-class QueryResponse(BaseModel):
-    query: str
-    resultados: List[Dict[str, Any]]
-
-#Inicialização da API
-app = FastAPI(
-    title="API geração de queries e busca jurídica",
-    description="API para extração de keywords e busca jurídica a partir de textos jurídicos",
-    version="1.0.0",
-    docs_url="/",  # Swagger UI na rota raiz
-    redoc_url=None,
-    openapi_url="/openapi.json",
-)
-
-@app.post("/processar", response_model=QueryResponse)
-async def processar_texto_juridico(input_data: TextoJuridicoInput):
-    """
-    Processa um texto jurídico extraindo a query e realizando busca jurisprudencial
-    
-    - **texto**: Texto jurídico a ser processado
-    
-    Retorna:
-    - **query**: Query gerada para busca jurisprudencial
-    - **resultados**: Lista de documentos jurídicos encontrados
-    """
-    try:
-        # Primeiro agente: extrai a query do texto
-        extractor = KeywordExtractionAgent()
-        query = extractor.extract_keywords(input_data.texto)
-        
-        # Segundo agente: faz a busca com a query gerada
-        search_agent = LegalSearchAgent()
-        results = search_agent.search(query)
-        
-        if not results:
-            # Se não houver resultados, retorna a query com uma lista vazia
-            return {
-                "query": query,
-                "resultados": []
-            }
-        
-        # Prepara a resposta com a query e os resultados da busca
-        return {
-            "query": query,
-            "resultados": results.get('results', [])
-        }
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Erro no processamento: {str(e)}")
-
-#Adiciona uma rota de saúde para verificar se a API está funcionando
-@app.get("/health")
-async def health_check():
-    """
-    Verifica se a API está funcionando corretamente
-    
-    Retorna:
-    - **status**: Status da API ('online' se estiver funcionando)
-    """
-    return {"status": "online"}
-
-#Para execução local
-if __name__ == "__main__":
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field, HttpUrl, field_validator, model_validator
+from typing import List, Dict, Optional, Any, Literal, AsyncIterator, Tuple
+from .agent_query import KeywordExtractionAgent
+from .agent_busca import DEFAULT_BASE_URL, TRIBUNAL_COLLECTIONS, LegalSearchAgent
+from .agent_pool import AgentPool, report_startup_benchmark
+from . import config
+from .http_client import create_async_client, search_stats
+from .cache import create_cache, normalize_text
+from .documents import DocumentCache, summarize_result
+from .catalog import TribunalCatalog, validate_filter_operators
+from .routing import TribunalRouter
+from .pipeline import Pipeline, create_filter_extractor, create_reranker, create_search_cache
+from .semantic_cache import SemanticCache
+from .jobs import JobManager, create_broker
+from .deadline import current_degradations, start_request_deadline
+from .json_parser import JSONParseError
+from .lexical import LexicalIndex
+from .llm_backends import create_router
+from .preprocess import Preprocessor
+from .metrics import (PIPELINES_IN_FLIGHT, REQUESTS_IN_FLIGHT, StateCollector, current_request_counters,
+                     current_request_timings, observe_stage, server_timing_header, stage,
+                     start_request_timings)
+import asyncio
+import time
+import json
+import uvicorn
+
+#Hosts aceitos no webhook_url dos jobs
+WEBHOOK_HOSTS = {host.strip().lower() for host in config.JOB_WEBHOOK_HOSTS.split(",") if host.strip()}
+
+#Modelos de dados para a API
+class Filtro(BaseModel):
+    campo: str
+    operador: str
+    valor: Any = None
+
+class OpcoesProcessamento(BaseModel):
+    ignorar_cache: bool = False
+    modo_extracao: Optional[Literal["two_pass", "single_pass"]] = None
+    variante_prompt: Optional[Literal["busca", "core2"]] = None
+    formato: Optional[Literal["query", "estruturada"]] = None
+    multi_tribunal: Optional[bool] = None
+    tribunais: Optional[List[str]] = None
+    orcamento_latencia_ms: Optional[int] = Field(None, ge=1)
+    limite: Optional[int] = Field(None, ge=1, le=config.SEARCH_MAX_LIMIT)
+    pagina: int = Field(1, ge=1)
+    campos: Optional[List[str]] = None
+    resultados_resumidos: Optional[bool] = None
+    filtros: Optional[List[Filtro]] = None
+    consultas_alternativas: Optional[int] = Field(None, ge=0, le=config.QUERY_EXPANSION_MAX)
+    extrair_filtros: Optional[bool] = None
+    debug: bool = False
+
+    @model_validator(mode="after")
+    def check_page_depth(self) -> "OpcoesProcessamento":
+        #A página n pede n × limite resultados a cada tribunal e query: a profundidade é limitada por SEARCH_MAX_RESULTS
+        depth = self.pagina * (self.limite or config.SEARCH_LIMIT)
+        if depth > config.SEARCH_MAX_RESULTS:
+            raise ValueError(f"pagina × limite ({depth}) acima do máximo de {config.SEARCH_MAX_RESULTS} resultados")
+        return self
+
+class TextoJuridicoInput(OpcoesProcessamento):
+    texto: str
+
+class ConceitosChave(BaseModel):
+    query_text: str
+    tribunal: Optional[str] = ""
+    area_direito: str
+    conceitos_chave: List[str]
+    situacao: str
+    queries_alternativas: Optional[List[str]] = None
+    filtros: Optional[Dict[str, Any]] = None
+
+class QueryResponse(BaseModel):
+    query: str
+    query_estruturada: Optional[ConceitosChave] = None
+    resultados: List[Dict[str, Any]]
+    tribunais: Optional[Dict[str, str]] = None
+    consultas: Optional[Dict[str, str]] = None
+    filtros_extraidos: Optional[List[Dict[str, Any]]] = None
+    tempos_ms: Optional[Dict[str, float]] = None
+    tokens_economizados: Optional[int] = None
+    degradacoes: Optional[List[str]] = None
+
+class LoteInput(OpcoesProcessamento):
+    textos: List[str] = Field(..., min_length=1, max_length=config.BATCH_MAX_ITEMS)
+    concorrencia: Optional[int] = Field(None, ge=1)
+
+class ItemLoteResponse(BaseModel):
+    indice: int
+    sucesso: bool
+    resultado: Optional[QueryResponse] = None
+    erro: Optional[str] = None
+
+class LoteResponse(BaseModel):
+    itens: List[ItemLoteResponse]
+    textos_unicos: int
+    falhas: int
+
+class DocumentosInput(BaseModel):
+    tribunal: str
+    ids: List[str] = Field(..., min_length=1, max_length=config.DOCUMENTS_MAX_IDS)
+    campos: Optional[List[str]] = None
+
+class DocumentosResponse(BaseModel):
+    documentos: List[Dict[str, Any]]
+    nao_encontrados: List[str]
+
+class JobInput(TextoJuridicoInput):
+    webhook_url: Optional[HttpUrl] = None
+
+    @field_validator("webhook_url")
+    @classmethod
+    def check_webhook_host(cls, url: Optional[HttpUrl]) -> Optional[HttpUrl]:
+        #Só avisa hosts liberados em JOB_WEBHOOK_HOSTS: a API não envia POSTs para qualquer URL informada pelo cliente
+        if url is not None and (url.host or "").lower() not in WEBHOOK_HOSTS:
+            raise ValueError(f"Host do webhook não permitido (JOB_WEBHOOK_HOSTS): {url.host}")
+        return url
+
+class JobEnviadoResponse(BaseModel):
+    job_id: str
+    status: str
+    url: str
+
+class JobResponse(BaseModel):
+    job_id: str
+    status: str
+    resultado: Optional[QueryResponse] = None
+    erro: Optional[str] = None
+    criado_em: float
+    iniciado_em: Optional[float] = None
+    concluido_em: Optional[float] = None
+
+#Ciclo de vida da API: os agentes são construídos uma única vez na inicialização
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    #Recursos compartilhados da execução assíncrona
+    app.state.llm_executor = ThreadPoolExecutor(
+        max_workers=config.LLM_EXECUTOR_WORKERS,
+        thread_name_prefix="llm"
+    )
+    app.state.http_client = create_async_client(config.HTTP_POOL_SIZE)
+    app.state.request_semaphore = asyncio.Semaphore(config.MAX_CONCURRENT_REQUESTS)
+
+    #Tribunais e propriedades da API de jurisprudência, atualizados em segundo plano
+    app.state.catalog = None
+    if config.CATALOG_ENABLED:
+        app.state.catalog = TribunalCatalog(DEFAULT_BASE_URL, ttl=config.CATALOG_TTL, aliases=TRIBUNAL_COLLECTIONS)
+        await app.state.catalog.start(app.state.http_client)
+
+    #Tribunais consultados quando o cliente não os informa, pelas siglas e nomes por extenso do catálogo
+    app.state.tribunal_router = TribunalRouter(TRIBUNAL_COLLECTIONS, app.state.catalog,
+                                               max_tribunals=config.TRIBUNAL_ROUTING_MAX)
+
+    app.state.extraction_cache = create_cache(
+        config.EXTRACTION_CACHE_BACKEND,
+        max_items=config.EXTRACTION_CACHE_SIZE,
+        ttl=config.EXTRACTION_CACHE_TTL,
+        path=config.EXTRACTION_CACHE_PATH
+    )
+
+    #Índice de similaridade das extrações, mantido entre reinicializações
+    app.state.semantic_cache = None
+    if config.SEMANTIC_CACHE_ENABLED:
+        app.state.semantic_cache = SemanticCache(
+            threshold=config.SEMANTIC_CACHE_THRESHOLD,
+            max_items=config.SEMANTIC_CACHE_SIZE,
+            ttl=config.SEMANTIC_CACHE_TTL,
+            policy=config.SEMANTIC_CACHE_POLICY
+        )
+        app.state.semantic_cache.load(config.SEMANTIC_CACHE_PATH)
+
+    #Vocabulário do caminho rápido léxico, aprendido com as extrações do LLM e mantido entre reinicializações
+    app.state.lexical_index = None
+    if config.LEXICAL_FAST_PATH:
+        app.state.lexical_index = LexicalIndex(
+            max_words=config.LEXICAL_MAX_WORDS,
+            min_concepts=config.LEXICAL_MIN_CONCEPTS,
+            min_coverage=config.LEXICAL_MIN_COVERAGE,
+            router=app.state.tribunal_router
+        )
+        app.state.lexical_index.load(config.LEXICAL_INDEX_PATH)
+
+    #Limpeza, resumo e divisão em trechos dos textos antes do prompt
+    app.state.preprocessor = None
+    if config.PREPROCESS_ENABLED:
+        app.state.preprocessor = Preprocessor(
+            token_budget=config.PREPROCESS_TOKEN_BUDGET,
+            chunk_threshold=config.PREPROCESS_CHUNK_THRESHOLD,
+            chunk_tokens=config.PREPROCESS_CHUNK_TOKENS,
+            max_chunks=config.PREPROCESS_MAX_CHUNKS
+        )
+
+    #Modelo de cada etapa e cadeia de fallback entre os backends de LLM (locais ou na OpenAI)
+    app.state.llm_router = create_router(
+        config.LLM_BACKENDS,
+        config.LLM_ROUTES,
+        KeywordExtractionAgent.MODEL,
+        default=config.LLM_DEFAULT_BACKEND,
+        timeout=config.LLM_TIMEOUT,
+        hedge_percentile=config.LLM_HEDGE_PERCENTILE,
+        hedge_min_samples=config.LLM_HEDGE_MIN_SAMPLES
+    )
+
+    #Um único agente de extração: o pool fica nos agentes do CrewAI, construídos aqui (importando o CrewAI)
+    #para cada backend configurado na variante padrão, e não na primeira requisição
+    app.state.extractor = KeywordExtractionAgent(
+        cache=app.state.extraction_cache,
+        semantic_cache=app.state.semantic_cache,
+        extraction_mode=config.EXTRACTION_MODE,
+        lexical_index=app.state.lexical_index,
+        preprocessor=app.state.preprocessor,
+        router=app.state.llm_router,
+        degraded_similarity=config.LATENCY_BUDGET_SEMANTIC_THRESHOLD,
+        prompts=config.PROMPT_VARIANT
+    )
+    app.state.extractor.warm_up(config.AGENT_POOL_SIZE)
+    app.state.search_cache = create_search_cache()
+
+    #Documentos recebidos nas buscas e hidratações, servidos pelo /documentos sem nova chamada à API
+    app.state.document_cache = None
+    if config.DOCUMENT_CACHE_ENABLED:
+        app.state.document_cache = DocumentCache(
+            max_items=config.DOCUMENT_CACHE_SIZE,
+            ttl=config.DOCUMENT_CACHE_TTL
+        )
+
+    #Filtros pedidos no texto (período, relator e tribunal), reconhecidos por expressões regulares locais
+    app.state.filter_extractor = create_filter_extractor()
+
+    #Reordenação local dos candidatos (BM25 + busca vetorial, com bônus dos conceitos-chave)
+    app.state.reranker = create_reranker()
+
+    app.state.search_pool = AgentPool(
+        lambda: LegalSearchAgent(
+            async_client=app.state.http_client,
+            search_cache=app.state.search_cache,
+            document_cache=app.state.document_cache,
+            catalog=app.state.catalog,
+            reranker=app.state.reranker,
+            router=app.state.tribunal_router
+        ),
+        config.AGENT_POOL_SIZE
+    )
+
+    #Pipeline compartilhado com o CLI e os benchmarks: agente de extração, pool de busca e chamadas ao LLM no executor dedicado
+    #(o formato de saída padrão é validado aqui; as variantes de prompt, pelos agentes)
+    app.state.pipeline = Pipeline(
+        app.state.extractor,
+        app.state.search_pool,
+        prompts=config.PROMPT_VARIANT,
+        output=config.OUTPUT_FORMAT,
+        executor=app.state.llm_executor,
+        filter_extractor=app.state.filter_extractor,
+        catalog=app.state.catalog,
+        router=app.state.tribunal_router
+    )
+
+    # Mede quanto tempo cada requisição deixa de gastar construindo agentes
+    app.state.startup_benchmark = await report_startup_benchmark({
+        "KeywordExtractionAgent": app.state.extractor,
+        "LegalSearchAgent": app.state.search_pool,
+    })
+
+    #Workers da fila de jobs: executam o mesmo pipeline do /processar em segundo plano
+    app.state.job_manager = JobManager(
+        create_broker(config.JOB_BROKER, result_ttl=config.JOB_RESULT_TTL, path=config.JOB_BROKER_PATH),
+        run_job,
+        config.JOB_WORKERS,
+        http_client=app.state.http_client
+    )
+    app.state.job_manager.start()
+
+    #Contadores dos caches, pools e fila de jobs exportados no /metrics
+    app.state.metrics_collector = StateCollector(collect_state_metrics)
+    REGISTRY.register(app.state.metrics_collector)
+    yield
+
+    REGISTRY.unregister(app.state.metrics_collector)
+    await app.state.job_manager.stop()
+    if app.state.catalog is not None:
+        await app.state.catalog.stop()
+    if app.state.lexical_index is not None:
+        app.state.lexical_index.save(config.LEXICAL_INDEX_PATH)
+    if app.state.semantic_cache is not None:
+        app.state.semantic_cache.save(config.SEMANTIC_CACHE_PATH)
+    await app.state.http_client.aclose()
+    app.state.llm_executor.shutdown(wait=False)
+    KeywordExtractionAgent.shutdown_call_executor()
+
+def is_multi_tribunal(opcoes: OpcoesProcessamento) -> bool:
+    """Indica se a busca deve consultar vários tribunais em paralelo"""
+    multi_tribunal = opcoes.multi_tribunal
+    if multi_tribunal is None:
+        multi_tribunal = config.MULTI_TRIBUNAL_SEARCH
+    return bool(multi_tribunal or opcoes.tribunais)
+
+def start_deadline(opcoes: OpcoesProcessamento):
+    """Inicia o orçamento de latência da requisição: o informado pelo cliente ou o padrão da implantação"""
+    budget_ms = opcoes.orcamento_latencia_ms or config.LATENCY_BUDGET_MS
+    return start_request_deadline(budget_ms / 1000 if budget_ms else None)
+
+def results_page(opcoes: OpcoesProcessamento) -> Tuple[int, int]:
+    """Quantidade de resultados da página e resultados pulados antes dela"""
+    limit = opcoes.limite or config.SEARCH_LIMIT
+    return limit, (opcoes.pagina - 1) * limit
+
+def present_results(results: List[Dict], tribunal: Optional[str], opcoes: OpcoesProcessamento,
+                    offset: int = 0) -> List[Dict]:
+    """
+    Resultados completos ou, com resultados_resumidos, apenas id, relator, posição e
+    trecho da ementa (o documento completo é hidratado depois pelo /documentos)
+    """
+    summary = opcoes.resultados_resumidos
+    if summary is None:
+        summary = config.SEARCH_SUMMARY_RESULTS
+    if not summary:
+        return results
+    return [summarize_result(result, tribunal, config.SEARCH_SNIPPET_CHARS, offset + position)
+            for position, result in enumerate(results, 1)]
+
+def query_expansion(opcoes: OpcoesProcessamento) -> int:
+    """Queries alternativas pedidas ao LLM: as do cliente ou o padrão da implantação"""
+    expansion = opcoes.consultas_alternativas
+    if expansion is None:
+        expansion = config.QUERY_EXPANSION
+    return max(0, min(expansion, config.QUERY_EXPANSION_MAX))
+
+def search_filters(opcoes: OpcoesProcessamento) -> List[Dict]:
+    """Filtros do cliente no formato do /query da API de jurisprudência"""
+    return [{"content": filtro.valor, "query_type": filtro.operador, "collection_field": filtro.campo}
+            for filtro in opcoes.filtros or []]
+
+def validate_search_options(opcoes: OpcoesProcessamento) -> None:
+    """
+    Valida tribunais, campos e filtros no catálogo local, antes de qualquer chamada ao LLM
+
+    Raises:
+        HTTPException: 422 com a lista de erros
+    """
+    tribunais = opcoes.tribunais if is_multi_tribunal(opcoes) else None
+    if app.state.catalog is not None:
+        errors = app.state.catalog.validate(tribunais, opcoes.campos, search_filters(opcoes))
+    else:
+        errors = validate_filter_operators(search_filters(opcoes))
+    if errors:
+        raise HTTPException(status_code=422, detail=errors)
+
+def pipeline_options(opcoes: OpcoesProcessamento) -> Dict:
+    """Opções da requisição no formato do Pipeline (as omitidas pelo cliente ficam com o padrão da implantação)"""
+    limit, offset = results_page(opcoes)
+    multi_tribunal = is_multi_tribunal(opcoes)
+    return {
+        "prompts": opcoes.variante_prompt,
+        "output": opcoes.formato,
+        "limit": limit,
+        "offset": offset,
+        "expansion": query_expansion(opcoes),
+        "use_cache": not opcoes.ignorar_cache,
+        "mode": opcoes.modo_extracao,
+        "multi_tribunal": multi_tribunal,
+        "tribunais": opcoes.tribunais if multi_tribunal else None,
+        "features": opcoes.campos,
+        "filters": search_filters(opcoes),
+        "extract_filters": opcoes.extrair_filtros
+    }
+
+async def run_pipeline(texto: str, opcoes: OpcoesProcessamento) -> Dict:
+    """
+    Executa o pipeline completo para um texto: extração da query e busca jurisprudencial
+
+    Returns:
+        Dict no formato de QueryResponse
+    """
+    start_request_timings()
+    request_deadline = start_deadline(opcoes)
+    with stage("pipeline"), PIPELINES_IN_FLIGHT.track_inprogress():
+        # Limita quantas requisições são processadas ao mesmo tempo
+        queued_at = time.perf_counter()
+        async with app.state.request_semaphore:
+            observe_stage("queue_wait", time.perf_counter() - queued_at)
+            #Filtros do texto, extração da query (LLM fora do event loop) e busca, pelo pipeline compartilhado
+            result = await app.state.pipeline.run_async(texto, **pipeline_options(opcoes))
+
+        tribunal = result.pop("tribunal")
+        result["resultados"] = present_results(result["resultados"], tribunal, opcoes, results_page(opcoes)[1])
+
+    if opcoes.debug:
+        result["tempos_ms"] = dict(current_request_timings())
+    result["tokens_economizados"] = current_request_counters().get("tokens_economizados")
+    result["degradacoes"] = current_degradations() if request_deadline is not None else None
+    return result
+
+async def stream_pipeline(texto: str, opcoes: OpcoesProcessamento) -> AsyncIterator[Tuple[str, Dict]]:
+    """
+    Executa o pipeline de um texto entregando cada etapa assim que fica pronta:
+    elementos extraídos, query, resultados de cada tribunal e, por último, o resumo final
+
+    Yields:
+        (evento, dados) com evento "elementos", "query", "resultados", "fim" ou "erro"
+    """
+    start_request_timings()
+    request_deadline = start_deadline(opcoes)
+    offset = results_page(opcoes)[1]
+    queued_at = time.perf_counter()
+    async with app.state.request_semaphore:
+        observe_stage("queue_wait", time.perf_counter() - queued_at)
+        async for evento, dados in app.state.pipeline.stream_async(texto, **pipeline_options(opcoes)):
+            if evento == "resultados":
+                dados["resultados"] = present_results(dados["resultados"], dados["tribunal"], opcoes, offset)
+            elif evento == "fim":
+                tribunal = dados.pop("tribunal")
+                dados["resultados"] = present_results(dados["resultados"], tribunal, opcoes, offset)
+                if opcoes.debug:
+                    dados["tempos_ms"] = dict(current_request_timings())
+                dados["tokens_economizados"] = current_request_counters().get("tokens_economizados")
+                dados["degradacoes"] = current_degradations() if request_deadline is not None else None
+            yield evento, dados
+
+def format_event(evento: str, dados: Dict, sse: bool) -> str:
+    """Serializa um evento do streaming como Server-Sent Event ou como uma linha NDJSON"""
+    if sse:
+        return f"event: {evento}\ndata: {json.dumps(dados, ensure_ascii=False)}\n\n"
+    return json.dumps({"evento": evento, "dados": dados}, ensure_ascii=False) + "\n"
+
+async def run_job(payload: Dict) -> Dict:
+    """Executa o pipeline de um job da fila a partir das opções enviadas"""
+    opcoes = TextoJuridicoInput(**payload)
+    return await run_pipeline(opcoes.texto, opcoes)
+
+def collect_state_metrics():
+    """Exporta no formato Prometheus os contadores mantidos pelos caches, pools de agentes e fila de jobs"""
+    hits = CounterMetricFamily("busca_cache_acertos", "Acertos do cache", labels=["cache"])
+    misses = CounterMetricFamily("busca_cache_falhas", "Falhas (ausências) do cache", labels=["cache"])
+    items = GaugeMetricFamily("busca_cache_itens", "Itens armazenados no cache", labels=["cache"])
+    for name, cache in (("extracao", app.state.extraction_cache), ("semantico", app.state.semantic_cache),
+                        ("busca", app.state.search_cache), ("documentos", app.state.document_cache)):
+        if cache is None:
+            continue
+        cache_stats = cache.stats()
+        hits.add_metric([name], cache_stats["acertos"])
+        misses.add_metric([name], cache_stats["falhas"])
+        items.add_metric([name], cache_stats["itens"])
+    yield hits
+    yield misses
+    yield items
+
+    agents_in_use = GaugeMetricFamily("busca_agentes_em_uso", "Agentes em uso em cada pool", labels=["pool"])
+    agents_available = GaugeMetricFamily("busca_agentes_disponiveis", "Agentes livres em cada pool", labels=["pool"])
+    for name, pool in (("extracao", app.state.extractor), ("busca", app.state.search_pool)):
+        agents_in_use.add_metric([name], pool.in_use)
+        agents_available.add_metric([name], pool.available)
+    yield agents_in_use
+    yield agents_available
+
+    job_stats = app.state.job_manager.stats()
+    yield GaugeMetricFamily("busca_jobs_fila", "Jobs aguardando na fila", value=job_stats["fila"])
+    yield GaugeMetricFamily("busca_jobs_workers", "Workers da fila de jobs", value=job_stats["workers"]["total"])
+    yield GaugeMetricFamily("busca_jobs_workers_ocupados", "Workers executando um job",
+                            value=job_stats["workers"]["ocupados"])
+    finished = CounterMetricFamily("busca_jobs_finalizados", "Jobs finalizados por status", labels=["status"])
+    finished.add_metric(["concluido"], job_stats["concluidos"])
+    finished.add_metric(["erro"], job_stats["erros"])
+    yield finished
+
+    if app.state.lexical_index is not None:
+        extractions = CounterMetricFamily("busca_extracoes", "Extrações por caminho (rápido léxico ou LLM)",
+                                          labels=["caminho"])
+        lexical_stats = app.state.lexical_index.stats()
+        extractions.add_metric(["caminho_rapido"], lexical_stats["caminho_rapido"])
+        extractions.add_metric(["llm"], lexical_stats["llm"])
+        yield extractions
+
+#Inicialização da API
+app = FastAPI(
+    title="API geração de queries e busca jurídica",
+    description="API para extração de keywords e busca jurídica a partir de textos jurídicos",
+    version="1.0.0",
+    docs_url="/",  # Swagger UI na rota raiz
+    redoc_url=None,
+    openapi_url="/openapi.json",
+    lifespan=lifespan,
+)
+
+@app.middleware("http")
+async def track_in_flight(request: Request, call_next):
+    #Requisições em andamento, para o gauge exportado no /metrics
+    with REQUESTS_IN_FLIGHT.track_inprogress():
+        return await call_next(request)
+
+@app.post("/processar", response_model=QueryResponse)
+async def processar_texto_juridico(input_data: TextoJuridicoInput, response: Response):
+    """
+    Processa um texto jurídico extraindo a query e realizando busca jurisprudencial
+    
+    - **texto**: Texto jurídico a ser processado
+    - **ignorar_cache**: Se verdadeiro, refaz a extração mesmo que o texto já esteja no cache
+    - **modo_extracao**: "two_pass" (duas chamadas ao LLM) ou "single_pass" (uma chamada); padrão definido em EXTRACTION_MODE
+    - **variante_prompt**: "busca" (prompts curtos, temperatura 0.2) ou "core2" (prompts detalhados que extraem o tribunal, 0.3); padrão definido em PROMPT_VARIANT
+    - **formato**: "query" (apenas a query) ou "estruturada" (também a `query_estruturada`); padrão definido em OUTPUT_FORMAT
+    - **multi_tribunal**: Se verdadeiro, consulta todos os tribunais em paralelo e combina os resultados
+    - **tribunais**: Tribunais a consultar em paralelo (ex: ["stf", "stj"]); ativa o modo multi-tribunal
+    - **limite**, **pagina**: Resultados por página (padrão: SEARCH_LIMIT) e página retornada (a partir de 1; pagina × limite até SEARCH_MAX_RESULTS)
+    - **campos**: Metadados de cada resultado (padrão: os do tribunal)
+    - **resultados_resumidos**: Se verdadeiro, cada resultado traz apenas id, relator, posição, tribunal e um trecho da ementa
+    - **filtros**: Filtros da busca (`campo`, `operador`, `valor`), validados no catálogo de tribunais antes do LLM
+    - **consultas_alternativas**: Queries alternativas geradas junto com a query e buscadas em paralelo (padrão: QUERY_EXPANSION)
+    - **extrair_filtros**: Se verdadeiro, aplica à busca o período, o relator e o tribunal pedidos no texto (padrão: FILTER_EXTRACTION)
+    - **debug**: Se verdadeiro, inclui na resposta o tempo (ms) de cada etapa do pipeline
+    
+    Retorna:
+    - **query**: Query gerada para busca jurisprudencial
+    - **query_estruturada**: Query com tribunal, área do direito, conceitos-chave e situação (apenas no formato "estruturada")
+    - **resultados**: Lista de documentos jurídicos encontrados
+    - **tribunais**: Status da busca em cada tribunal (apenas no modo multi-tribunal ou com consultas alternativas)
+    - **consultas**: Status da busca de cada query, a principal e as alternativas (apenas com consultas alternativas)
+    - **filtros_extraidos**: Filtros extraídos do texto e aplicados à busca, com a `origem` ("texto" ou "llm")
+    - **tempos_ms**: Tempo de cada etapa (apenas com debug); os mesmos tempos vão sempre no cabeçalho Server-Timing
+    - **tokens_economizados**: Tokens deixados fora do prompt pelo pré-processamento (null se o LLM não foi chamado)
+    """
+    validate_search_options(input_data)
+    try:
+        result = await run_pipeline(input_data.texto, input_data)
+        response.headers["Server-Timing"] = server_timing_header(current_request_timings())
+        return result
+
+    except JSONParseError as e:
+        # O LLM não devolveu um JSON válido nem após a chamada de reparo
+        raise HTTPException(status_code=502, detail=f"Resposta inválida do modelo de linguagem: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro no processamento: {str(e)}")
+
+@app.post("/processar/stream")
+async def processar_stream(input_data: TextoJuridicoInput, request: Request):
+    """
+    Processa um texto jurídico como o /processar, mas envia cada etapa assim que fica pronta
+    
+    O formato segue o cabeçalho Accept: `text/event-stream` recebe Server-Sent Events;
+    caso contrário a resposta é NDJSON (`application/x-ndjson`), uma linha `{"evento": ..., "dados": ...}` por evento.
+    
+    Eventos, nesta ordem:
+    - **elementos**: área do direito, conceitos-chave e situação, e o tribunal na variante "core2"
+      (omitido quando o orçamento de latência acaba antes dos elementos)
+    - **query**: `{"query": "..."}` com a query gerada (com a `query_estruturada` no formato "estruturada",
+      as `consultas_alternativas` na busca expandida e os `filtros_extraidos` aplicados à busca)
+    - **resultados**: resultados de um tribunal (`tribunal`, `status`, `resultados`), um evento por tribunal
+      (na busca expandida, um evento por tribunal e query, com a `consulta`)
+    - **fim**: `resultados` finais (combinados no modo multi-tribunal e na busca expandida), status de cada `tribunais` e das `consultas`
+    - **erro**: `detalhe` do erro, encerrando o streaming
+    """
+    validate_search_options(input_data)
+    sse = "text/event-stream" in request.headers.get("accept", "")
+
+    async def events():
+        try:
+            async for evento, dados in stream_pipeline(input_data.texto, input_data):
+                yield format_event(evento, dados, sse)
+        except Exception as e:
+            yield format_event("erro", {"detalhe": f"Erro no processamento: {str(e)}"}, sse)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream" if sse else "application/x-ndjson",
+        #Evita que proxies acumulem a resposta antes de repassar ao cliente
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/jobs", response_model=JobEnviadoResponse, status_code=202)
+async def enviar_job(input_data: JobInput):
+    """
+    Envia um texto jurídico para processamento em segundo plano e retorna imediatamente
+    
+    - **webhook_url**: URL http/https que recebe um POST com o job finalizado (opcional, host em JOB_WEBHOOK_HOSTS)
+    - demais campos: mesmas opções do /processar
+    
+    Retorna:
+    - **job_id**: Identificador do job
+    - **status**: "na_fila"
+    - **url**: Rota para consultar o andamento do job
+    """
+    validate_search_options(input_data)
+    job = await app.state.job_manager.submit(
+        input_data.model_dump(exclude={"webhook_url"}),
+        webhook_url=str(input_data.webhook_url) if input_data.webhook_url else None
+    )
+    return {"job_id": job.id, "status": job.status, "url": f"/jobs/{job.id}"}
+
+@app.get("/jobs/{job_id}", response_model=JobResponse)
+async def consultar_job(job_id: str):
+    """
+    Consulta o andamento de um job
+    
+    Retorna:
+    - **status**: "na_fila", "executando", "concluido" ou "erro"
+    - **resultado**: Mesma resposta do /processar (quando concluído)
+    - **erro**: Mensagem de erro (quando falhou)
+    - **criado_em**, **iniciado_em**, **concluido_em**: Instantes de cada etapa (timestamp Unix)
+    """
+    job = await app.state.job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+    return job.to_dict()
+
+@app.post("/processar/lote", response_model=LoteResponse)
+async def processar_lote(input_data: LoteInput):
+    """
+    Processa uma lista de textos jurídicos com paralelismo limitado
+    
+    - **textos**: Textos jurídicos a serem processados
+    - **concorrencia**: Textos processados ao mesmo tempo (padrão: BATCH_CONCURRENCY)
+    - demais campos: mesmas opções do /processar, aplicadas a todos os textos
+    
+    Textos idênticos (ignorando espaços e maiúsculas/minúsculas) são processados uma única vez.
+    A falha de um item não interrompe o lote: cada item informa seu resultado ou erro.
+    
+    Retorna:
+    - **itens**: Resultado ou erro de cada texto, na ordem de envio
+    - **textos_unicos**: Quantidade de textos efetivamente processados após a deduplicação
+    - **falhas**: Quantidade de itens com erro
+    """
+    validate_search_options(input_data)
+
+    # Agrupa os índices de textos idênticos para processar cada texto uma única vez
+    unique_texts: Dict[str, List[int]] = {}
+    for index, texto in enumerate(input_data.textos):
+        unique_texts.setdefault(normalize_text(texto), []).append(index)
+
+    semaphore = asyncio.Semaphore(input_data.concorrencia or config.BATCH_CONCURRENCY)
+
+    async def process(indices: List[int]) -> Dict:
+        async with semaphore:
+            try:
+                resultado = await run_pipeline(input_data.textos[indices[0]], input_data)
+                return {"sucesso": True, "resultado": resultado}
+            except Exception as e:
+                return {"sucesso": False, "erro": f"Erro no processamento: {str(e)}"}
+
+    outcomes = await asyncio.gather(*(process(indices) for indices in unique_texts.values()))
+
+    itens: List[Optional[Dict]] = [None] * len(input_data.textos)
+    for indices, outcome in zip(unique_texts.values(), outcomes):
+        for index in indices:
+            itens[index] = {"indice": index, **outcome}
+
+    return {
+        "itens": itens,
+        "textos_unicos": len(unique_texts),
+        "falhas": sum(1 for item in itens if not item["sucesso"])
+    }
+
+@app.post("/documentos", response_model=DocumentosResponse)
+async def hidratar_documentos(input_data: DocumentosInput):
+    """
+    Retorna os documentos completos de resultados de busca (ex: resultados resumidos)
+    
+    - **tribunal**: Tribunal dos documentos, por nome curto ("stf") ou coleção (campo `tribunal` dos resultados resumidos)
+    - **ids**: Valores de `id_documento` (até DOCUMENTS_MAX_IDS)
+    - **campos**: Metadados retornados (padrão: os do tribunal, com a ementa completa)
+    
+    Documentos já recebidos em buscas anteriores vêm do cache; os demais são buscados
+    na API de jurisprudência em uma única chamada.
+    
+    Retorna:
+    - **documentos**: Documentos encontrados, na ordem dos ids
+    - **nao_encontrados**: Ids sem documento na coleção
+    """
+    if app.state.catalog is not None:
+        errors = app.state.catalog.validate([input_data.tribunal], input_data.campos)
+        if errors:
+            raise HTTPException(status_code=422, detail=errors)
+
+    async with app.state.search_pool.acquire() as search_agent:
+        documentos, nao_encontrados = await search_agent.fetch_documents_async(
+            input_data.tribunal, input_data.ids, input_data.campos
+        )
+    return {"documentos": documentos, "nao_encontrados": nao_encontrados}
+
+@app.get("/tribunais")
+async def listar_tribunais():
+    """
+    Catálogo de tribunais e propriedades da API de jurisprudência, mantido em cache e atualizado em segundo plano
+    
+    Retorna:
+    - **tribunais**: Para cada coleção, os nomes curtos e as propriedades (`tipo`, `filtravel`, `pesquisavel`, `filtro_intervalo`)
+    - **operadores_filtro**: Operadores aceitos nos `filtros`
+    - **atualizado_em**: Instante da última atualização (timestamp Unix; null se ainda não carregado)
+    """
+    if app.state.catalog is None:
+        raise HTTPException(status_code=404, detail="Catálogo de tribunais desabilitado (CATALOG_ENABLED=false)")
+    return app.state.catalog.to_dict()
+
+@app.get("/stats")
+async def stats():
+    """
+    Estatísticas de uso para dimensionamento dos pools
+
+    Retorna:
+    - **http**: latência por chamada, status e uso do pool de conexões com a API de jurisprudência
+    - **agentes**: agentes em uso e disponíveis em cada pool
+    - **cache_extracao**: acertos e falhas do cache de extrações (null se desabilitado)
+    - **cache_semantico**: acertos e falhas do cache por similaridade das extrações (null se desabilitado)
+    - **cache_busca**: acertos, coalescências e atualizações do cache de buscas (null se desabilitado)
+    - **cache_documentos**: acertos e falhas por documento na hidratação do /documentos (null se desabilitado)
+    - **catalogo**: tribunais no catálogo, atualizações, falhas e último erro (null se desabilitado)
+    - **reordenacao**: buscas reordenadas, falhas da busca vetorial e reordenações só com similaridade local (null se desabilitado)
+    - **jobs**: profundidade da fila, espera na fila (ms) e utilização dos workers
+    - **preprocessamento**: textos resumidos ou divididos em trechos e tokens economizados (null se desabilitado)
+    - **caminho_rapido**: fração das extrações atendidas pelo índice léxico sem chamar o LLM
+      e latência economizada (null se desabilitado)
+    - **llm**: backend de cada etapa e, por backend, chamadas, fallbacks, latência média, tokens e custo estimado
+    """
+    cache = app.state.extraction_cache
+    search_cache = app.state.search_cache
+    return {
+        "http": search_stats.snapshot(),
+        "cache_extracao": cache.stats() if cache is not None else None,
+        "cache_semantico": app.state.semantic_cache.stats() if app.state.semantic_cache is not None else None,
+        "cache_busca": search_cache.stats() if search_cache is not None else None,
+        "cache_documentos": app.state.document_cache.stats() if app.state.document_cache is not None else None,
+        "catalogo": app.state.catalog.stats() if app.state.catalog is not None else None,
+        "reordenacao": app.state.reranker.stats() if app.state.reranker is not None else None,
+        "jobs": app.state.job_manager.stats(),
+        "preprocessamento": app.state.preprocessor.stats() if app.state.preprocessor is not None else None,
+        "caminho_rapido": app.state.lexical_index.stats() if app.state.lexical_index is not None else None,
+        "llm": app.state.llm_router.stats(),
+        "agentes": {
+            "extracao": {"em_uso": app.state.extractor.in_use, "disponiveis": app.state.extractor.available},
+            "busca": {"em_uso": app.state.search_pool.in_use, "disponiveis": app.state.search_pool.available},
+        },
+    }
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """
+    Métricas no formato texto do Prometheus: duração de cada etapa do pipeline, tokens do LLM,
+    status e latência das chamadas HTTP, acertos dos caches, requisições em andamento e fila de jobs
+    """
+    return Response(generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
+
+#Adiciona uma rota de saúde para verificar se a API está funcionando
+@app.get("/health")
+async def health_check():
+    """
+    Verifica se a API está funcionando corretamente
+    
+    Retorna:
+    - **status**: Status da API ('online' se estiver funcionando)
+    """
+    return {"status": "online"}
+
+#Para execução local
+if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000) 
\ No newline at end of file
@@ -0,0 +1,54 @@
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+# Importações medidas, cada uma em um interpretador novo (sem módulos já carregados)
+TARGETS = {
+    "busca": "import busca",
+    "busca.api": "import busca.api",
+    "busca.Pipeline": "from busca import Pipeline",
+    "crewai": "import crewai",
+}
+
+SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+{statement}
+print(json.dumps({{"ms": (time.perf_counter() - started) * 1000, "crewai": "crewai" in sys.modules}}))
+"""
+
+
+def measure(statement, repetitions):
+    """Tempo (ms) da importação em cada repetição e se o CrewAI foi carregado"""
+    times, loaded = [], False
+    for _ in range(repetitions):
+        output = subprocess.run([sys.executable, "-c", SCRIPT.format(statement=statement)], capture_output=True,
+                                text=True, check=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        times.append(result["ms"])
+        loaded = result["crewai"]
+    return times, loaded
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Tempo de importação do pacote (partida a frio) e se o CrewAI e carregado antes do primeiro uso do LLM"
+    )
+    parser.add_argument("--repeticoes", type=int, default=5, help="Interpretadores novos por importação")
+    parser.add_argument("--saida", help="Arquivo JSON para gravar o resultado")
+    args = parser.parse_args()
+
+    results = {}
+    print(f"{'importacao':<16} {'mediana':>10} {'minimo':>10}  crewai carregado")
+    for name, statement in TARGETS.items():
+        times, loaded = measure(statement, args.repeticoes)
+        results[name] = {"mediana_ms": round(statistics.median(times), 1), "minimo_ms": round(min(times), 1),
+                         "crewai": loaded}
+        print(f"{name:<16} {results[name]['mediana_ms']:>8.1f}ms {results[name]['minimo_ms']:>8.1f}ms  "
+              f"{'sim' if loaded else 'nao'}")
+
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
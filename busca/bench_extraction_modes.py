@@ -0,0 +1,91 @@
+import argparse
+import json
+import statistics
+import time
+
+from .agent_query import KeywordExtractionAgent
+from .bench_utils import CORPUS_PATH, load_corpus, percentile
+from .llm_backends import MODEL_PRICES
+from .pipeline import Pipeline
+from .prompts import PROMPT_VARIANTS
+
+# Preço do modelo padrão em USD por 1 milhão de tokens (entrada, saída)
+PRICE_INPUT_PER_M, PRICE_OUTPUT_PER_M = MODEL_PRICES[KeywordExtractionAgent.MODEL]
+
+
+def run_mode(pipeline, corpus, mode, repetitions, prompts="busca"):
+    """
+    Executa a extração de todas as petições do corpus pelo pipeline, no modo e na variante de prompt informados
+
+    Returns:
+        Dict com latências (ms) e tokens de cada extração
+    """
+    latencies = []
+    prompt_tokens = []
+    completion_tokens = []
+
+    for _ in range(repetitions):
+        for item in corpus:
+            before = pipeline.extractor.token_usage()
+            start = time.perf_counter()
+            pipeline.extract(item["texto"], prompts=prompts, use_cache=False, mode=mode)
+            latencies.append((time.perf_counter() - start) * 1000)
+            after = pipeline.extractor.token_usage()
+
+            prompt_tokens.append(after["prompt_tokens"] - before["prompt_tokens"])
+            completion_tokens.append(after["completion_tokens"] - before["completion_tokens"])
+
+    return {
+        "latencies": latencies,
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+    }
+
+
+def summarize(mode, result):
+    """Resume p50/p95 de latência, tokens médios e custo estimado por extração"""
+    latencies = result["latencies"]
+    prompt_avg = statistics.mean(result["prompt_tokens"])
+    completion_avg = statistics.mean(result["completion_tokens"])
+    cost = (prompt_avg * PRICE_INPUT_PER_M + completion_avg * PRICE_OUTPUT_PER_M) / 1_000_000
+
+    return {
+        "modo": mode,
+        "extracoes": len(latencies),
+        "p50_ms": round(statistics.median(latencies), 1),
+        "p95_ms": round(percentile(latencies, 95), 1),
+        "tokens_entrada_media": round(prompt_avg, 1),
+        "tokens_saida_media": round(completion_avg, 1),
+        "custo_usd_por_extracao": round(cost, 7),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compara latência e custo dos modos de extração two_pass e single_pass")
+    parser.add_argument("--corpus", default=CORPUS_PATH, help="Arquivo JSON com as petições")
+    parser.add_argument("--repeticoes", type=int, default=3, help="Repetições de cada petição por modo")
+    parser.add_argument("--prompts", default="busca", choices=sorted(PROMPT_VARIANTS), help="Variante de prompt")
+    parser.add_argument("--saida", help="Arquivo JSON para gravar o resumo")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    pipeline = Pipeline(KeywordExtractionAgent(), prompts=args.prompts)
+
+    summaries = []
+    for mode in KeywordExtractionAgent.EXTRACTION_MODES:
+        print(f"\n=== Modo {mode} ({args.prompts}): {len(corpus)} petições x {args.repeticoes} repetições ===")
+        summary = summarize(mode, run_mode(pipeline, corpus, mode, args.repeticoes, args.prompts))
+        summaries.append(summary)
+        for key, value in summary.items():
+            print(f"{key}: {value}")
+
+    two_pass, single_pass = summaries
+    print("\n=== single_pass vs two_pass ===")
+    print(f"p50: {single_pass['p50_ms'] / two_pass['p50_ms']:.2f}x")
+    print(f"p95: {single_pass['p95_ms'] / two_pass['p95_ms']:.2f}x")
+    if two_pass["custo_usd_por_extracao"]:
+        print(f"custo: {single_pass['custo_usd_por_extracao'] / two_pass['custo_usd_por_extracao']:.2f}x")
+
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump(summaries, f, ensure_ascii=False, indent=2)
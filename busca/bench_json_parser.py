@@ -0,0 +1,80 @@
+import argparse
+import json
+import os
+import re
+import time
+
+from pydantic import ValidationError
+
+from .agent_query import ElementosQueryUmaEtapa
+from .json_parser import JSONParseError, parse_json_object
+
+# Corpus de respostas do LLM ({"id", "resposta", "valida"}): JSON puro, cercas de código, texto em volta,
+# vários objetos, JSON truncado ou fora do esquema
+RESPONSES_PATH = os.path.join(os.path.dirname(__file__), "respostas_llm_exemplo.json")
+
+
+def legacy_parse(text):
+    """Extração anterior: regex gulosa sobre a resposta inteira seguida de json.loads"""
+    text = text.strip()
+    if not (text.startswith("{") and text.endswith("}")):
+        match = re.search(r"\{.*\}", text, re.DOTALL)
+        text = match.group(0) if match else "{}"
+    return ElementosQueryUmaEtapa.model_validate(json.loads(text)).model_dump()
+
+
+def new_parse(text):
+    return parse_json_object(text, ElementosQueryUmaEtapa)
+
+
+def accepts(parser, text):
+    try:
+        parser(text)
+        return True
+    except (json.JSONDecodeError, ValidationError, JSONParseError):
+        return False
+
+
+def time_per_call(parser, texts, repeat):
+    """Tempo médio por resposta (us)"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            accepts(parser, text)
+    return (time.perf_counter() - start) / (repeat * len(texts)) * 1e6
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compara a extração de JSON anterior (regex gulosa) com o parser incremental"
+    )
+    parser.add_argument("--respostas", default=RESPONSES_PATH, help="Arquivo JSON com as respostas do LLM")
+    parser.add_argument("--repeticoes", type=int, default=2000, help="Repetições do corpus na medição de tempo")
+    parser.add_argument("--texto-extra", type=int, default=20000,
+                        help="Caracteres de texto acrescentados após o JSON no teste de respostas longas")
+    args = parser.parse_args()
+
+    with open(args.respostas, encoding="utf-8") as f:
+        responses = json.load(f)
+    texts = [item["resposta"] for item in responses]
+
+    print(f"=== {len(responses)} respostas ===")
+    print(f"{'id':<24} {'esperado':>9} {'anterior':>9} {'novo':>6}")
+    correct = {"anterior": 0, "novo": 0}
+    for item in responses:
+        results = {"anterior": accepts(legacy_parse, item["resposta"]), "novo": accepts(new_parse, item["resposta"])}
+        for name, accepted in results.items():
+            correct[name] += accepted == item["valida"]
+        print(f"{item['id']:<24} {str(item['valida']):>9} {str(results['anterior']):>9} {str(results['novo']):>6}")
+    print(f"\nacertos: anterior {correct['anterior']}/{len(responses)}  novo {correct['novo']}/{len(responses)}")
+
+    print(f"\n=== tempo por resposta ({args.repeticoes} repetições) ===")
+    for name, function in (("anterior", legacy_parse), ("novo", new_parse)):
+        print(f"{name:<9} {time_per_call(function, texts, args.repeticoes):8.2f} us")
+
+    # Respostas longas: o JSON seguido de muito texto com chaves soltas (ex: explicações com exemplos)
+    padding = " Exemplo de formato: {campo}." * (args.texto_extra // 28)
+    long_texts = [text + padding for text in texts]
+    print(f"\n=== tempo por resposta com {len(padding)} caracteres extras ===")
+    for name, function in (("anterior", legacy_parse), ("novo", new_parse)):
+        print(f"{name:<9} {time_per_call(function, long_texts, max(args.repeticoes // 100, 1)):8.2f} us")
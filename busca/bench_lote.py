@@ -0,0 +1,61 @@
+import argparse
+import json
+import time
+
+import requests
+
+from .bench_utils import CORPUS_PATH, load_corpus
+
+# URL base da API
+BASE_URL = "http://127.0.0.1:8000"
+
+
+def build_batch(corpus, size):
+    """
+    Monta um lote com `size` textos distintos a partir do corpus, numerando as
+    repetições para que a deduplicação do lote não reduza o trabalho medido
+    """
+    textos = []
+    for index in range(size):
+        item = corpus[index % len(corpus)]
+        textos.append(f"{item['texto']} (petição {index})")
+    return textos
+
+
+def run_batch(base_url, textos, concurrency, bypass_cache, timeout):
+    """Envia um lote ao /processar/lote e retorna (itens por segundo, falhas)"""
+    start = time.perf_counter()
+    response = requests.post(
+        f"{base_url}/processar/lote",
+        json={"textos": textos, "concorrencia": concurrency, "ignorar_cache": bypass_cache},
+        timeout=timeout
+    )
+    elapsed = time.perf_counter() - start
+    response.raise_for_status()
+    return len(textos) / elapsed, response.json()["falhas"]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Vazão (itens/s) do /processar/lote em diferentes níveis de concorrência")
+    parser.add_argument("--url", default=BASE_URL, help="URL base da API")
+    parser.add_argument("--corpus", default=CORPUS_PATH, help="Arquivo JSON com as petições")
+    parser.add_argument("--itens", type=int, default=32, help="Textos por lote")
+    parser.add_argument("--concorrencias", type=int, nargs="+", default=[1, 2, 4, 8, 16],
+                        help="Níveis de concorrência avaliados")
+    parser.add_argument("--usar-cache", action="store_true", help="Permite respostas do cache de extrações")
+    parser.add_argument("--timeout", type=float, default=1800.0, help="Timeout de cada lote (s)")
+    parser.add_argument("--saida", help="Arquivo JSON para gravar o resultado")
+    args = parser.parse_args()
+
+    textos = build_batch(load_corpus(args.corpus), args.itens)
+
+    print(f"=== /processar/lote com {len(textos)} textos ===")
+    results = []
+    for concurrency in args.concorrencias:
+        throughput, failures = run_batch(args.url, textos, concurrency, not args.usar_cache, args.timeout)
+        results.append({"concorrencia": concurrency, "itens_por_segundo": round(throughput, 3), "falhas": failures})
+        print(f"concorrência={concurrency:>3}  {throughput:8.3f} itens/s  falhas={failures}")
+
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,259 @@
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import time
+import tracemalloc
+from collections import defaultdict
+
+import httpx
+
+from .bench_stubs import FakeLLM, create_stub_jurisprudence_app, create_stub_llm_app, free_port, serve_in_thread
+from .bench_utils import CORPUS_PATH, load_corpus, percentile
+
+
+def configure_environment(args, stub_url):
+    """
+    Configura a API antes da importação (config.py lê o ambiente ao ser importado):
+    backend de jurisprudência local, chave falsa e caches (e caminho rápido léxico) desligados por padrão,
+    para que cada requisição percorra o pipeline completo
+    """
+    os.environ["JURISPRUDENCE_API_URL"] = stub_url
+    os.environ["OPENAI_API_KEY"] = "sk-benchmark"
+    if not args.usar_cache:
+        os.environ["EXTRACTION_CACHE_BACKEND"] = "none"
+        os.environ["SEARCH_CACHE_ENABLED"] = "false"
+        os.environ["SEMANTIC_CACHE_ENABLED"] = "false"
+        os.environ["LEXICAL_FAST_PATH"] = "false"
+    os.environ["EXTRACTION_MODE"] = args.modo
+    os.environ["PROMPT_VARIANT"] = args.prompts
+    os.environ["OUTPUT_FORMAT"] = args.formato
+
+
+def start_llm_stubs(args):
+    """
+    Com --llm-http, sobe o stub de LLM compatível com a API da OpenAI e configura um backend
+    local que o chama pelo LiteLLM (caminho real, com HTTP); com --llm-fallback, o primeiro
+    backend de todas as etapas e um stub mais lento que o prazo, e toda chamada passa ao seguinte
+    """
+    port = free_port()
+    serve_in_thread(create_stub_llm_app(args.latencia_llm), port)
+    backends = {"local": {"model": "openai/stub", "base_url": f"http://127.0.0.1:{port}/v1"}}
+    routes = {}
+    if args.llm_fallback:
+        slow_port = free_port()
+        serve_in_thread(create_stub_llm_app(args.prazo_llm * 10), slow_port)
+        backends = {"lento": {"model": "openai/stub-lento", "base_url": f"http://127.0.0.1:{slow_port}/v1",
+                              "timeout": args.prazo_llm, "max_retries": 0}, **backends}
+        routes = {stage: "lento>local" for stage in ("extract_elements", "build_query", "single_pass", "json_repair")}
+    os.environ["LLM_BACKENDS"] = json.dumps(backends)
+    os.environ["LLM_ROUTES"] = ",".join(f"{stage}={chain}" for stage, chain in routes.items())
+    os.environ["LLM_DEFAULT_BACKEND"] = "local"
+
+
+def start_api(llm_latency, fake_llm=True):
+    """Sobe a API (com o FakeLLM no lugar do crewai.LLM, sem --llm-http) e retorna a URL base"""
+    if fake_llm:
+        from . import llm_backends
+        FakeLLM.latency = llm_latency
+        llm_backends.LLM = FakeLLM
+
+    from . import api
+    port = free_port()
+    serve_in_thread(api.app, port)
+    return f"http://127.0.0.1:{port}"
+
+
+def build_texts(corpus, size):
+    """Textos distintos e determinísticos, numerados para não coincidirem entre si"""
+    return [f"{corpus[index % len(corpus)]['texto']} (petição {index})" for index in range(size)]
+
+
+def parse_server_timing(header):
+    """Converte o cabeçalho Server-Timing em {etapa: ms}"""
+    timings = {}
+    for item in header.split(","):
+        name, _, duration = item.strip().partition(";dur=")
+        if name and duration:
+            timings[name] = float(duration)
+    return timings
+
+
+async def run_level(base_url, texts, concurrency, timeout):
+    """
+    Envia todos os textos ao /processar com `concurrency` requisições simultâneas
+
+    Returns:
+        Dict com latências (ms), erros, duração total (s) e tempos por etapa
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    stages = defaultdict(list)
+    errors = 0
+
+    async with httpx.AsyncClient(timeout=timeout, limits=httpx.Limits(max_connections=concurrency)) as client:
+        async def call(texto):
+            nonlocal errors
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.post(f"{base_url}/processar", json={"texto": texto})
+                latencies.append((time.perf_counter() - start) * 1000)
+                if response.status_code != 200:
+                    errors += 1
+                    return
+                for name, duration in parse_server_timing(response.headers.get("server-timing", "")).items():
+                    stages[name.split(".")[0]].append(duration)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(call(texto) for texto in texts))
+        elapsed = time.perf_counter() - start
+
+    return {"latencies": latencies, "errors": errors, "elapsed": elapsed, "stages": stages}
+
+
+def summarize(concurrency, result, memory_kb):
+    """Resume vazão, latências de cauda, memória por requisição e média de cada etapa"""
+    latencies = result["latencies"]
+    return {
+        "concorrencia": concurrency,
+        "requisicoes": len(latencies),
+        "erros": result["errors"],
+        "vazao_rps": round(len(latencies) / result["elapsed"], 3),
+        "p50_ms": round(statistics.median(latencies), 1),
+        "p95_ms": round(percentile(latencies, 95), 1),
+        "p99_ms": round(percentile(latencies, 99), 1),
+        "max_ms": round(max(latencies), 1),
+        "memoria_por_requisicao_kb": memory_kb,
+        "etapas_media_ms": {name: round(statistics.mean(values), 2)
+                            for name, values in sorted(result["stages"].items())},
+    }
+
+
+async def measure_memory(base_url, texts, concurrency, timeout):
+    """
+    Pico de memória alocada (tracemalloc) por requisição simultânea. Roda em uma passada
+    separada porque o tracemalloc deixa o processo mais lento e distorceria as latências.
+    """
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    tracemalloc.reset_peak()
+    await run_level(base_url, texts, concurrency, timeout)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return round((peak - baseline) / 1024 / concurrency, 1)
+
+
+def current_commit():
+    """Commit atual do repositório, para identificar o resultado"""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(baseline_path, parameters, summaries, tolerance):
+    """
+    Compara com um resultado anterior e retorna as regressões: vazão menor ou
+    p95 maior que a tolerância relativa, no mesmo nível de concorrência
+    """
+    with open(baseline_path, encoding="utf-8") as f:
+        previous_report = json.load(f)
+    baseline = {item["concorrencia"]: item for item in previous_report["resultados"]}
+
+    regressions = []
+    print(f"\n=== Comparacao com {baseline_path} (commit {previous_report.get('commit')}) ===")
+    changed = [key for key, value in parameters.items()
+               if key != "tolerancia" and previous_report["parametros"].get(key) != value]
+    if changed:
+        print(f"AVISO: parâmetros diferentes do resultado anterior: {', '.join(changed)}")
+    for summary in summaries:
+        previous = baseline.get(summary["concorrencia"])
+        if previous is None:
+            continue
+        throughput = summary["vazao_rps"] / previous["vazao_rps"]
+        p95 = summary["p95_ms"] / previous["p95_ms"]
+        print(f"concorrência={summary['concorrencia']:>3}  vazão {throughput:.2f}x  p95 {p95:.2f}x")
+        if throughput < 1 - tolerance:
+            regressions.append(f"vazão com concorrência {summary['concorrencia']} caiu para {throughput:.2f}x")
+        if p95 > 1 + tolerance:
+            regressions.append(f"p95 com concorrência {summary['concorrencia']} subiu para {p95:.2f}x")
+    return regressions
+
+
+async def run_benchmark(args, base_url, corpus):
+    # Aquecimento: importações tardias, pools de conexão e caminhos ainda frios
+    await run_level(base_url, build_texts(corpus, args.aquecimento), args.aquecimento, args.timeout)
+
+    summaries = []
+    for concurrency in args.concorrencias:
+        texts = build_texts(corpus, args.requisicoes)
+        result = await run_level(base_url, texts, concurrency, args.timeout)
+        memory_kb = await measure_memory(base_url, build_texts(corpus, concurrency), concurrency, args.timeout)
+        summary = summarize(concurrency, result, memory_kb)
+        summaries.append(summary)
+        print(f"concorrência={concurrency:>3}  {summary['vazao_rps']:8.3f} req/s  p50={summary['p50_ms']:.1f} ms  "
+              f"p95={summary['p95_ms']:.1f} ms  p99={summary['p99_ms']:.1f} ms  "
+              f"memória={memory_kb:.1f} KB/req  erros={summary['erros']}")
+    return summaries
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark offline e determinístico do /processar, com LLM e API de jurisprudência simulados"
+    )
+    parser.add_argument("--corpus", default=CORPUS_PATH, help="Arquivo JSON com as petições")
+    parser.add_argument("--requisicoes", type=int, default=64, help="Requisições por nível de concorrência")
+    parser.add_argument("--concorrencias", type=int, nargs="+", default=[1, 8, 32],
+                        help="Níveis de concorrência avaliados")
+    parser.add_argument("--latencia-llm", type=float, default=0.3, help="Latência simulada de cada chamada ao LLM (s)")
+    parser.add_argument("--latencia-busca", type=float, default=0.05,
+                        help="Latência simulada da API de jurisprudência (s)")
+    parser.add_argument("--modo", default="two_pass", choices=["two_pass", "single_pass"], help="Modo de extração")
+    parser.add_argument("--prompts", default="busca", choices=["busca", "core2"], help="Variante de prompt")
+    parser.add_argument("--formato", default="query", choices=["query", "estruturada"], help="Formato de saída")
+    parser.add_argument("--usar-cache", action="store_true", help="Mantém os caches de extração e de busca e o caminho rápido léxico ligados")
+    parser.add_argument("--llm-http", action="store_true",
+                        help="Chama o LLM simulado por HTTP (servidor compatível com a OpenAI) em vez do FakeLLM")
+    parser.add_argument("--llm-fallback", action="store_true",
+                        help="Com --llm-http, coloca antes um backend que sempre esgota o prazo, para medir o fallback")
+    parser.add_argument("--prazo-llm", type=float, default=1.0, help="Prazo do backend lento do --llm-fallback (s)")
+    parser.add_argument("--aquecimento", type=int, default=4, help="Requisições de aquecimento")
+    parser.add_argument("--timeout", type=float, default=300.0, help="Timeout de cada requisição (s)")
+    parser.add_argument("--saida", help="Arquivo JSON para gravar o resultado")
+    parser.add_argument("--comparar", help="Resultado anterior (JSON gerado com --saída) para detectar regressões")
+    parser.add_argument("--tolerancia", type=float, default=0.15, help="Variação relativa aceita na comparação")
+    args = parser.parse_args()
+
+    stub_port = free_port()
+    serve_in_thread(create_stub_jurisprudence_app(args.latencia_busca), stub_port)
+    configure_environment(args, f"http://127.0.0.1:{stub_port}")
+    if args.llm_http:
+        start_llm_stubs(args)
+    base_url = start_api(args.latencia_llm, fake_llm=not args.llm_http)
+
+    corpus = load_corpus(args.corpus)
+    print(f"=== /processar: {args.requisicoes} requisições por nível, LLM {args.latencia_llm * 1000:.0f} ms, "
+          f"busca {args.latencia_busca * 1000:.0f} ms, modo {args.modo}, prompts {args.prompts} ===")
+    summaries = asyncio.run(run_benchmark(args, base_url, corpus))
+    if args.llm_http:
+        for name, backend in httpx.get(f"{base_url}/stats").json()["llm"]["backends"].items():
+            print(f"backend {name:<6} chamadas={backend['chamadas']}  falhas={backend['falhas']}  "
+                  f"fallbacks={backend['fallbacks']}  latência média={backend['latencia_media_ms']} ms")
+
+    report = {
+        "commit": current_commit(),
+        "parametros": {key: value for key, value in vars(args).items() if key not in ("saida", "comparar")},
+        "resultados": summaries,
+    }
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    if args.comparar:
+        regressions = compare(args.comparar, report["parametros"], summaries, args.tolerancia)
+        if regressions:
+            raise SystemExit("REGRESSAO: " + "; ".join(regressions))
+        print("OK: sem regressões acima da tolerância")
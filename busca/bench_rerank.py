@@ -0,0 +1,156 @@
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+
+import httpx
+
+from .agent_busca import LegalSearchAgent
+from .bench_stubs import AREAS, CONCEITOS, build_stub_corpus, create_stub_corpus_app, free_port, serve_in_thread
+from .bench_utils import percentile
+from .rerank import HybridReranker
+
+# Palavras genéricas que o LLM costuma acrescentar à query e que não ajudam a separar os documentos
+GENERIC_TERMS = ["recurso", "contrato", "agravo", "revisao", "provas", "valores"]
+# Coleção consultada (o stub atende qualquer nome)
+TRIBUNAL = "STJCustomVector_e5large"
+
+
+class TimedReranker(HybridReranker):
+    """HybridReranker que guarda a duração (s) de cada reordenação"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.durations = []
+
+    def rerank(self, *args, **kwargs):
+        started = time.perf_counter()
+        results = super().rerank(*args, **kwargs)
+        self.durations.append(time.perf_counter() - started)
+        return results
+
+
+def build_queries(count, rng):
+    """
+    Consultas com os elementos que o LLM extrairia (dois conceitos-chave e a área)
+    e a query montada com eles, às vezes com termos genéricos ou só parte das palavras
+    """
+    queries = []
+    for _ in range(count):
+        area = rng.choice(AREAS)
+        concepts = rng.sample(CONCEITOS, 2)
+        terms = [*concepts, area]
+        if rng.random() < 0.5:
+            terms.append(" ".join(rng.sample(GENERIC_TERMS, 2)))
+        if rng.random() < 0.3:
+            # Query resumida: o LLM manteve só a última palavra de um dos conceitos
+            terms[0] = terms[0].split()[-1]
+        rng.shuffle(terms)
+        queries.append({
+            "query": " ".join(terms),
+            "elementos": {"conceitos_chave": concepts, "area_direito": area},
+        })
+    return queries
+
+
+def relevance(document, elements):
+    """Relevância graduada: conceitos-chave tratados no documento (0 a 2), mais 1 se for da mesma área"""
+    matches = len(set(elements["conceitos_chave"]) & set(document["conceitos"]))
+    return matches + (matches > 0 and document["area"] == elements["area_direito"])
+
+
+def ndcg(grades, ideal, k):
+    dcg = sum((2 ** grade - 1) / math.log2(position + 2) for position, grade in enumerate(grades[:k]))
+    best = sum((2 ** grade - 1) / math.log2(position + 2) for position, grade in enumerate(ideal[:k]))
+    return dcg / best if best else 0.0
+
+
+def reciprocal_rank(grades, min_grade):
+    return next((1 / position for position, grade in enumerate(grades, 1) if grade >= min_grade), 0.0)
+
+
+async def evaluate(name, base_url, reranker, queries, corpus, args):
+    """Executa as consultas com a configuração e mede relevância e latência"""
+    documents = {document["id_documento"]: document for document in corpus}
+    ndcgs, reciprocal_ranks, latencies = [], [], []
+    async with httpx.AsyncClient(timeout=30) as client:
+        agent = LegalSearchAgent(async_client=client, reranker=reranker)
+        for item in queries:
+            started = time.perf_counter()
+            response = await agent.search_async(item["query"], base_url=base_url, limit=args.k,
+                                                elements=item["elementos"])
+            latencies.append(time.perf_counter() - started)
+            ids = [result["id_documento"] for result in (response or {}).get("results", [])]
+            grades = [relevance(documents[doc_id], item["elementos"]) for doc_id in ids]
+            ideal = sorted((relevance(document, item["elementos"]) for document in corpus), reverse=True)
+            ndcgs.append(ndcg(grades, ideal, args.k))
+            reciprocal_ranks.append(reciprocal_rank(grades, args.relevancia_minima))
+
+    durations = getattr(reranker, "durations", None) or [0.0]
+    return {
+        "configuracao": name,
+        f"ndcg@{args.k}": round(sum(ndcgs) / len(ndcgs), 4),
+        "mrr": round(sum(reciprocal_ranks) / len(reciprocal_ranks), 4),
+        "latencia_p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "latencia_p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "reordenacao_p50_ms": round(percentile(durations, 50) * 1000, 3),
+        "reordenacao_p95_ms": round(percentile(durations, 95) * 1000, 3),
+    }
+
+
+def reranker_options(args, dense_query_type):
+    return dict(candidates=args.candidatos, lexical_weight=args.peso_lexico, dense_weight=args.peso_denso,
+                concept_boost=args.bonus_conceitos, area_boost=args.bonus_area, dense_query_type=dense_query_type,
+                rrf_k=args.rrf_k)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark offline de relevância (nDCG, MRR) e latência da reordenação híbrida dos resultados, "
+                    "sobre um corpus sintético com gabarito servido por um stub da API de jurisprudência"
+    )
+    parser.add_argument("--documentos", type=int, default=400, help="Tamanho do corpus sintético")
+    parser.add_argument("--consultas", type=int, default=200, help="Consultas avaliadas")
+    parser.add_argument("-k", type=int, default=5, help="Resultados retornados por consulta")
+    parser.add_argument("--relevancia-minima", type=int, default=2,
+                        help="Relevância a partir da qual um documento conta para o MRR")
+    parser.add_argument("--candidatos", type=int, default=30, help="Candidatos pedidos a cada busca para a reordenação")
+    parser.add_argument("--peso-lexico", type=float, default=0.45, help="Peso da posição na busca BM25 (a API não devolve o score)")
+    parser.add_argument("--peso-denso", type=float, default=0.35, help="Peso da similaridade densa")
+    parser.add_argument("--bonus-conceitos", type=float, default=0.15, help="Bônus dos conceitos-chave presentes")
+    parser.add_argument("--bonus-area", type=float, default=0.05, help="Bônus da área do direito presente")
+    parser.add_argument("--rrf-k", type=int, default=60, help="Constante k do score de posição 1 / (k + posição)")
+    parser.add_argument("--ruido-denso", type=float, default=0.6, help="Ruído da busca vetorial simulada")
+    parser.add_argument("--latencia-busca", type=float, default=0.0, help="Latência simulada da API (s)")
+    parser.add_argument("--seed", type=int, default=42, help="Semente do corpus e das consultas")
+    parser.add_argument("--saida", help="Arquivo JSON para gravar o resultado")
+    args = parser.parse_args()
+
+    corpus = build_stub_corpus(args.documentos, args.seed)
+    port = free_port()
+    serve_in_thread(create_stub_corpus_app(corpus, args.latencia_busca, args.ruido_denso), port)
+    base_url = f"http://127.0.0.1:{port}"
+    queries = build_queries(args.consultas, random.Random(args.seed))
+
+    configurations = [
+        ("léxica (sem reordenação)", None),
+        ("híbrida, similaridade local", TimedReranker(**reranker_options(args, ""))),
+        ("híbrida, busca vetorial", TimedReranker(**reranker_options(args, "near_text"))),
+    ]
+    print(f"=== {args.consultas} consultas, {args.documentos} documentos, top {args.k}, "
+          f"{args.candidatos} candidatos ===")
+    print(f"{'configuracao':<30} {f'ndcg@{args.k}':>8} {'mrr':>7} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'reord p50':>10} {'reord p95':>10}")
+    results = []
+    for name, reranker in configurations:
+        result = asyncio.run(evaluate(name, base_url, reranker, queries, corpus, args))
+        results.append(result)
+        print(f"{name:<30} {result[f'ndcg@{args.k}']:>8.4f} {result['mrr']:>7.4f} {result['latencia_p50_ms']:>8.2f} "
+              f"{result['latencia_p95_ms']:>8.2f} {result['reordenacao_p50_ms']:>10.3f} "
+              f"{result['reordenacao_p95_ms']:>10.3f}")
+
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump({"parametros": vars(args), "resultados": results}, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,91 @@
+import argparse
+import json
+import os
+import re
+import time
+
+from .routing import TribunalRouter, _compile
+
+# Corpus rotulado ({"id", "query", "tribunal", "esperado"}): query gerada, tribunal extraído pelo LLM (vazio se
+# não houver) e nomes curtos dos tribunais esperados, na ordem; sem citação, o esperado é o tribunal padrão
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), "roteamento_exemplo.json")
+
+# Catálogo simulado: os tribunais do mapeamento padrão e um descoberto no /tribunais
+CATALOG = {"stf": "STFCustomVector_e5large", "stj": "STJCustomVector_e5large", "tst": "TST"}
+DEFAULT = CATALOG["stf"]
+
+
+class StaticCatalog:
+    loaded = True
+
+    def aliases(self):
+        return dict(CATALOG)
+
+
+def legacy_route(query, tribunal=""):
+    """Roteamento anterior: substring "stf"/"stj" na query e palavra inteira do catálogo (ignora o tribunal extraído)"""
+    query_lower = query.lower()
+    if 'stf' in query_lower:
+        return [CATALOG['stf']]
+    elif 'stj' in query_lower:
+        return [CATALOG['stj']]
+    words = set(re.findall(r"\w+", query_lower))
+    return [next((collection for alias, collection in CATALOG.items() if alias in words), DEFAULT)]
+
+
+def score(route, corpus):
+    """Acertos exatos (todos os tribunais, na ordem) e do primeiro tribunal, com os erros exatos"""
+    exact, first, errors = 0, 0, []
+    for item in corpus:
+        expected = [CATALOG[name] for name in item["esperado"]]
+        routed = route(item["query"], item["tribunal"])
+        exact += routed == expected
+        first += routed[:1] == expected[:1]
+        if routed != expected:
+            errors.append((item["id"], routed))
+    return exact, first, errors
+
+
+def time_per_call(route, corpus, repeat):
+    """Tempo médio por roteamento (us)"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for item in corpus:
+            route(item["query"], item["tribunal"])
+    return (time.perf_counter() - start) / (repeat * len(corpus)) * 1e6
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compara o roteamento de tribunais anterior (substring na query) com o TribunalRouter"
+    )
+    parser.add_argument("--corpus", default=CORPUS_PATH, help="Arquivo JSON com o corpus rotulado")
+    parser.add_argument("--repeticoes", type=int, default=2000, help="Repetições do corpus na medição de tempo")
+    parser.add_argument("--max-tribunais", type=int, default=3, help="Tribunais roteados quando a query cita vários")
+    args = parser.parse_args()
+
+    with open(args.corpus, encoding="utf-8") as f:
+        corpus = json.load(f)
+
+    router = TribunalRouter(CATALOG, StaticCatalog(), default=DEFAULT, max_tribunals=args.max_tribunais)
+    routers = {"anterior": legacy_route, "novo": lambda query, tribunal: router.route(query, tribunal)}
+
+    print(f"=== {len(corpus)} queries ===")
+    print(f"{'roteamento':<10} {'exato':>7} {'primeiro':>9}")
+    results = {name: score(route, corpus) for name, route in routers.items()}
+    for name, (exact, first, _) in results.items():
+        print(f"{name:<10} {exact:>3}/{len(corpus):<3} {first:>4}/{len(corpus):<3}")
+    for name, (_, _, errors) in results.items():
+        print(f"\nerros ({name}):")
+        for item_id, routed in errors:
+            print(f"  {item_id:<24} {routed}")
+
+    print(f"\n=== tempo por roteamento ({args.repeticoes} repetições) ===")
+    for name, route in routers.items():
+        print(f"{name:<10} {time_per_call(route, corpus, args.repeticoes):8.2f} us")
+
+    # Compilação da expressão com todos os nomes, feita uma vez por catálogo (o cache é esvaziado para medir)
+    _compile.cache_clear()
+    start = time.perf_counter()
+    router.find("stf")
+    print(f"\ncompilacao por catálogo: {(time.perf_counter() - start) * 1e3:.2f} ms")
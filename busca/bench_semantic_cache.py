@@ -0,0 +1,116 @@
+import argparse
+import json
+import random
+
+from .bench_utils import CORPUS_PATH, load_corpus
+from .semantic_cache import SemanticCache
+
+# Escopo único: na avaliação todos os textos usam o mesmo modelo e prompt
+SCOPE = "avaliacao"
+ACCENTS = str.maketrans("aeiouc", "áéíóúç")
+
+
+def perturb(text, changed_fraction, rng, vocabulary):
+    """
+    Variação do texto: espaços e caixa alterados, alguns acentos trocados e
+    `changed_fraction` das palavras substituídas por palavras de outras petições
+    """
+    words = text.split()
+    for index in rng.sample(range(len(words)), int(round(changed_fraction * len(words)))):
+        words[index] = rng.choice(vocabulary)
+    if rng.random() < 0.5:
+        words = [word.translate(ACCENTS) if rng.random() < 0.1 else word for word in words]
+    separator = rng.choice([" ", "  ", "\n", " \t"])
+    variant = separator.join(words)
+    return variant.upper() if rng.random() < 0.2 else variant
+
+
+def build_pairs(corpus, variants, max_positive_change, rng):
+    """
+    Pares (consulta, id da petição de origem, mesma_query): variações com até
+    `max_positive_change` das palavras alteradas devem reaproveitar a query da
+    petição de origem; variações maiores e textos fora do índice não devem
+    """
+    vocabulary = [word for item in corpus for word in item["texto"].split()]
+    pairs = []
+    for item in corpus:
+        for _ in range(variants):
+            change = rng.choice([0.0, 0.02, 0.05, 0.1, 0.2, 0.3, 0.5])
+            pairs.append((perturb(item["texto"], change, rng, vocabulary), item["id"], change <= max_positive_change))
+    return pairs
+
+
+def load_pairs(path):
+    """Pares rotulados manualmente: [{"indexado": str, "consulta": str, "mesma_query": bool}]"""
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def evaluate(indexed, queries, thresholds, dim):
+    """
+    Indexa os textos e mede, para cada limiar, precisão e recall do reaproveitamento
+
+    Args:
+        indexed: {id: texto} armazenados no cache
+        queries: lista de (texto, id esperado, mesma_query)
+    """
+    cache = SemanticCache(threshold=1.0, max_items=max(len(indexed), 1), dim=dim)
+    for key, text in indexed.items():
+        cache.set(cache.embed(text), SCOPE, key)
+    neighbours = [(cache.nearest(cache.embed(text), SCOPE), expected, same) for text, expected, same in queries]
+
+    results = []
+    for threshold in thresholds:
+        true_positives = false_positives = 0
+        for (found, similarity), expected, same in neighbours:
+            if similarity < threshold:
+                continue
+            if same and found == expected:
+                true_positives += 1
+            else:
+                false_positives += 1
+        positives = sum(1 for _, _, same in neighbours if same)
+        precision = true_positives / (true_positives + false_positives) if true_positives + false_positives else 1.0
+        recall = true_positives / positives if positives else 0.0
+        results.append({
+            "limiar": threshold,
+            "precisao": round(precision, 4),
+            "recall": round(recall, 4),
+            "falsos_positivos": false_positives,
+            "reaproveitados": true_positives + false_positives,
+        })
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Mede a precisão e o recall do cache semântico de extrações em funcao do limiar de similaridade"
+    )
+    parser.add_argument("--corpus", default=CORPUS_PATH, help="Arquivo JSON com as petições")
+    parser.add_argument("--pares", help="Pares rotulados (JSON) no lugar das variações sintéticas do corpus")
+    parser.add_argument("--variacoes", type=int, default=50, help="Variações sintéticas geradas por petição")
+    parser.add_argument("--alteracao-maxima", type=float, default=0.1,
+                        help="Fração de palavras alteradas até a qual a query deve ser reaproveitada")
+    parser.add_argument("--limiares", type=float, nargs="+",
+                        default=[0.7, 0.75, 0.8, 0.85, 0.9, 0.92, 0.94, 0.96, 0.98],
+                        help="Limiares de similaridade avaliados")
+    parser.add_argument("--dimensao", type=int, default=1024, help="Dimensão dos embeddings")
+    parser.add_argument("--seed", type=int, default=42, help="Semente das variações sintéticas")
+    args = parser.parse_args()
+
+    if args.pares:
+        labelled = load_pairs(args.pares)
+        indexed = {str(index): pair["indexado"] for index, pair in enumerate(labelled)}
+        queries = [(pair["consulta"], str(index), pair["mesma_query"]) for index, pair in enumerate(labelled)]
+    else:
+        corpus = load_corpus(args.corpus)
+        indexed = {item["id"]: item["texto"] for item in corpus}
+        queries = build_pairs(corpus, args.variacoes, args.alteracao_maxima, random.Random(args.seed))
+
+    results = evaluate(indexed, queries, args.limiares, args.dimensao)
+    positives = sum(1 for _, _, same in queries if same)
+    print(f"=== {len(indexed)} textos indexados, {len(queries)} consultas ({positives} devem reaproveitar) ===")
+    print(f"{'limiar':>7} {'precisao':>9} {'recall':>7} {'falsos+':>8} {'reaproveitados':>15}")
+    for item in results:
+        print(f"{item['limiar']:>7.2f} {item['precisao']:>9.4f} {item['recall']:>7.4f} "
+              f"{item['falsos_positivos']:>8} {item['reaproveitados']:>15}")
@@ -0,0 +1,301 @@
+import asyncio
+import fnmatch
+import hashlib
+import json
+import math
+import random
+import re
+import socket
+import threading
+import time
+from types import SimpleNamespace
+from typing import Dict, List
+
+import uvicorn
+from crewai import LLM
+from fastapi import FastAPI, Query
+
+# Vocabulário fixo usado para montar respostas determinísticas
+AREAS = ["direito do consumidor", "direito civil", "direito tributario", "direito do trabalho", "direito penal"]
+CONCEITOS = [
+    "tarifa bancaria", "cobranca abusiva", "devolucao em dobro", "dano moral", "direito a informacao",
+    "clausula abusiva", "onerosidade excessiva", "repeticao de indebito", "boa-fe objetiva", "prescricao",
+]
+MINISTROS = ["GILMAR MENDES", "CARMEN LUCIA", "NANCY ANDRIGHI", "LUIS FELIPE SALOMAO", "HERMAN BENJAMIN"]
+TRIBUNAIS = ["stf", "stj"]
+# Corpo das ementas do stub, com o tamanho típico de uma ementa real (os resultados resumidos mostram só o início)
+EMENTA_CORPO = (
+    "AGRAVO INTERNO NO RECURSO ESPECIAL. DIREITO DO CONSUMIDOR. CONTRATO BANCARIO. COBRANCA DE TARIFAS. "
+    "ABUSIVIDADE RECONHECIDA NA ORIGEM. REVISAO. IMPOSSIBILIDADE. REEXAME DE PROVAS E DE CLAUSULAS CONTRATUAIS. "
+    "SUMULAS 5 E 7/STJ. REPETICAO DO INDEBITO EM DOBRO. ENGANO JUSTIFICAVEL NAO DEMONSTRADO. AGRAVO NAO PROVIDO. "
+    "1. A revisao das conclusoes do acordao recorrido demandaria o reexame do contrato e das provas dos autos. "
+    "2. A devolucao em dobro dos valores cobrados indevidamente independe da natureza do elemento volitivo. "
+    "3. Agravo interno a que se nega provimento."
+)
+
+
+def _digest(*parts: str) -> int:
+    """Inteiro determinístico derivado do conteúdo (não depende de PYTHONHASHSEED)"""
+    return int(hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest(), 16)
+
+
+def _matches(document: dict, item: dict) -> bool:
+    """Aplica um filtro do /query (comparações, Equal e Like com curingas) a um documento do stub"""
+    value, content = str(document.get(item.get("collection_field"), "")), item.get("content")
+    operator = item.get("query_type")
+    if operator == "Like":
+        return fnmatch.fnmatchcase(value.upper(), str(content).upper())
+    comparisons = {"Equal": value == content, "NotEqual": value != content,
+                   "GreaterThan": value > str(content), "GreaterThanEqual": value >= str(content),
+                   "LessThan": value < str(content), "LessThanEqual": value <= str(content)}
+    return comparisons.get(operator, True)
+
+
+def fake_answer(prompt: str) -> str:
+    """
+    Resposta determinística ao prompt: JSON de elementos (com query no modo em uma etapa,
+    queries alternativas na busca expandida e filtros quando pedidos) ou a query
+    """
+    seed = _digest(prompt)
+    area = AREAS[seed % len(AREAS)]
+    conceitos = [CONCEITOS[(seed >> (4 * i)) % len(CONCEITOS)] for i in range(4)]
+    conceitos = list(dict.fromkeys(conceitos))
+    query = f"{conceitos[0]} e {conceitos[-1]} no {area}"
+
+    # Período e relator pedidos quando as expressões locais não os reconhecem
+    hints = {"ano_inicial": None, "ano_final": None, "ultimos_anos": 1 + seed % 3,
+             "relator": MINISTROS[seed % len(MINISTROS)].title()}
+
+    if '"query_text"' in prompt:
+        answer = {"tribunal": "", "area_direito": area, "conceitos_chave": conceitos,
+                  "situacao": f"discussao sobre {conceitos[0]}", "query_text": query}
+        if '"queries_alternativas"' in prompt:
+            answer["queries_alternativas"] = [f"{conceito} no {area}" for conceito in conceitos[1:]]
+        if '"ultimos_anos"' in prompt:
+            answer["filtros"] = hints
+        return json.dumps(answer, ensure_ascii=False)
+    if "JSON" in prompt:
+        answer = {"tribunal": "", "area_direito": area, "conceitos_chave": conceitos,
+                  "situacao": f"discussao sobre {conceitos[0]}"}
+        if '"ultimos_anos"' in prompt:
+            answer["filtros"] = hints
+        return json.dumps(answer, ensure_ascii=False)
+    return query
+
+
+class FakeLLM(LLM):
+    """
+    Substituto local do crewai.LLM: responde no formato esperado pelo agente do CrewAI
+    com JSON/queries montados de forma determinística a partir do prompt, após uma
+    latência fixa, e informa um consumo de tokens estimado (4 caracteres por token).
+    """
+
+    # Latência simulada de cada chamada (s); ajustada pelo benchmark antes de criar os agentes
+    latency = 0.5
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None) -> str:
+        if isinstance(messages, str):
+            messages = [{"role": "user", "content": messages}]
+        prompt = "\n".join(message.get("content", "") for message in messages)
+
+        time.sleep(self.latency)
+        answer = fake_answer(prompt)
+        response = f"Thought: I now can give a great answer\nFinal Answer: {answer}"
+
+        usage = SimpleNamespace(prompt_tokens=len(prompt) // 4, completion_tokens=len(response) // 4,
+                                prompt_tokens_details=None)
+        for callback in callbacks or []:
+            if hasattr(callback, "log_success_event"):
+                callback.log_success_event(kwargs={}, response_obj={"usage": usage}, start_time=0, end_time=0)
+        return response
+
+    def supports_function_calling(self) -> bool:
+        return False
+
+
+def create_stub_llm_app(latency: float = 0.5) -> FastAPI:
+    """
+    Servidor local compatível com a API da OpenAI (/v1/chat/completions), com as mesmas
+    respostas do FakeLLM: permite testar o caminho real do LiteLLM, os backends locais e
+    o fallback entre backends (um stub com latência acima do prazo sempre esgota o prazo)
+    """
+    app = FastAPI(title="Stub de LLM compatível com a OpenAI")
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(body: dict):
+        await asyncio.sleep(latency)
+        prompt = "\n".join(str(message.get("content", "")) for message in body.get("messages", []))
+        content = f"Thought: I now can give a great answer\nFinal Answer: {fake_answer(prompt)}"
+        prompt_tokens, completion_tokens = len(prompt) // 4, len(content) // 4
+        return {
+            "id": f"chatcmpl-{_digest(prompt) % 10 ** 12}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "stub"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                      "total_tokens": prompt_tokens + completion_tokens},
+        }
+
+    return app
+
+
+def create_stub_jurisprudence_app(latency: float = 0.05) -> FastAPI:
+    """
+    Substituto local da API de jurisprudência (/tribunais, /properties, /query e
+    /jurisprudência, conforme core2/readme.md), com resultados determinísticos
+    """
+    app = FastAPI(title="Stub da API de jurisprudência")
+    properties = ["id_documento", "ministroRelator", "ementa", "dataPublicacao", "url", "url_download",
+                  "jurisprudenciaCitada", "titulo"]
+    # Documentos já entregues, consultados pelo filtro de id_documento da hidratação
+    documents = {}
+
+    def make_document(tribunal: str, query_text: str, rank: int, features: List[str]) -> dict:
+        seed = _digest(tribunal, query_text, str(rank))
+        document = {
+            "id_documento": f"{tribunal[:3].lower()}{seed % 1000000:06d}",
+            "ministroRelator": MINISTROS[seed % len(MINISTROS)],
+            "ementa": f"Ementa sobre {query_text} (documento {rank}). {EMENTA_CORPO}",
+            "dataPublicacao": f"20{10 + seed % 15}-0{1 + seed % 9}-1{seed % 10}T00:00:00-03:00",
+            "url": f"https://exemplo.jus.br/{tribunal}/{seed % 1000000}",
+            "url_download": f"https://exemplo.jus.br/{tribunal}/{seed % 1000000}.pdf",
+            "jurisprudenciaCitada": str(seed % 10000000),
+            "titulo": f"Documento {rank}",
+        }
+        documents[document["id_documento"]] = document
+        return select(document, features)
+
+    def select(document: dict, features: List[str]) -> dict:
+        return {key: value for key, value in document.items() if not features or key in features}
+
+    @app.get("/tribunais")
+    async def tribunais():
+        return {"results": TRIBUNAIS}
+
+    @app.get("/properties")
+    async def properties_endpoint(tribunal: str):
+        return {"results": [{"name": name, "data_type": "date" if name == "dataPublicacao" else "text",
+                             "index_filterable": True, "index_searchable": True} for name in properties]}
+
+    @app.post("/query")
+    async def query(tribunal: str, body: dict):
+        await asyncio.sleep(latency)
+        limit = int(body.get("limit", 5))
+        features = body.get("features") or []
+        ids = next((item["content"] for item in body.get("filters") or []
+                    if item.get("collection_field") == "id_documento" and item.get("query_type") == "ContainsAny"), None)
+        if ids is not None:
+            return {"results": [select(documents[doc_id], features) for doc_id in ids if doc_id in documents][:limit]}
+        results = [make_document(tribunal, body.get("query_text", ""), rank, features)
+                   for rank in range(1, limit + 1)]
+        # Filtros de metadados aplicados sobre os documentos gerados (a página pode vir menor que o limite)
+        filters = [item for item in body.get("filters") or [] if item.get("collection_field") != "id_documento"]
+        return {"results": [result for result in results
+                            if all(_matches(documents[result["id_documento"]], item) for item in filters)]}
+
+    @app.get("/jurisprudencia")
+    async def jurisprudencia(tribunal: str, numeros_processo: List[str] = Query(...)):
+        await asyncio.sleep(latency)
+        return {numero: [{"numero_processo": numero, "tribunal": tribunal}] for numero in numeros_processo}
+
+    return app
+
+
+def build_stub_corpus(size: int = 400, seed: int = 7) -> List[dict]:
+    """
+    Corpus sintético de ementas para avaliar a relevância da busca: cada documento
+    trata de uma área e de 1 a 3 conceitos principais (campos "area" e "conceitos",
+    usados como gabarito) e cita de passagem outros conceitos, como nas ementas reais
+    """
+    rng = random.Random(seed)
+    filler = EMENTA_CORPO.split(". ")
+    corpus = []
+    for index in range(size):
+        area = rng.choice(AREAS)
+        concepts = rng.sample(CONCEITOS, rng.randint(1, 3))
+        cited = rng.sample([concept for concept in CONCEITOS if concept not in concepts], rng.randint(0, 2))
+        sentences = [area.upper(), *(concept.upper() for concept in concepts),
+                     *rng.sample(filler, 3)]
+        if cited:
+            sentences.append(f"Precedentes citados sobre {' e '.join(cited)}, sem aplicacao ao caso")
+        corpus.append({
+            "id_documento": f"doc{index:05d}",
+            "ministroRelator": rng.choice(MINISTROS),
+            "ementa": ". ".join(sentences) + ".",
+            "area": area,
+            "conceitos": concepts,
+        })
+    return corpus
+
+
+def create_stub_corpus_app(corpus: List[dict], latency: float = 0.0, dense_noise: float = 0.6) -> FastAPI:
+    """
+    Stub da API de jurisprudência sobre um corpus fixo: "bm25" ordena pelo BM25 das
+    palavras da query nas ementas (sem radicais nem sinônimos) e "near_text" simula a
+    busca vetorial, que reconhece os conceitos e a área da query mas com ruído
+    """
+    app = FastAPI(title="Stub da API de jurisprudência (corpus fixo)")
+    hidden = ("area", "conceitos")
+    words = [re.findall(r"\w+", document["ementa"].lower()) for document in corpus]
+    frequencies = [{word: doc_words.count(word) for word in set(doc_words)} for doc_words in words]
+    average_length = sum(len(doc_words) for doc_words in words) / max(len(words), 1)
+    document_frequency: Dict[str, int] = {}
+    for doc_frequencies in frequencies:
+        for word in doc_frequencies:
+            document_frequency[word] = document_frequency.get(word, 0) + 1
+
+    def bm25(query_text: str, k1: float = 1.2, b: float = 0.75) -> List[float]:
+        terms = re.findall(r"\w+", query_text.lower())
+        scores = []
+        for doc_words, doc_frequencies in zip(words, frequencies):
+            score = 0.0
+            for term in terms:
+                tf = doc_frequencies.get(term, 0)
+                if tf:
+                    idf = math.log(1 + (len(corpus) - document_frequency[term] + 0.5) / (document_frequency[term] + 0.5))
+                    score += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * len(doc_words) / average_length))
+            scores.append(score)
+        return scores
+
+    def near_text(query_text: str) -> List[float]:
+        text = query_text.lower()
+        concepts = {concept for concept in CONCEITOS if concept in text}
+        areas = {area for area in AREAS if area in text}
+        noise = random.Random(_digest(query_text))
+        return [len(concepts & set(document["conceitos"])) + 0.5 * (document["area"] in areas)
+                + noise.gauss(0, dense_noise) for document in corpus]
+
+    @app.post("/query")
+    async def query(tribunal: str, body: dict):
+        if latency:
+            await asyncio.sleep(latency)
+        limit = int(body.get("limit", 5))
+        features = body.get("features") or []
+        ranker = near_text if body.get("query_type") == "near_text" else bm25
+        scores = ranker(body.get("query_text", ""))
+        order = sorted(range(len(corpus)), key=lambda index: -scores[index])
+        if ranker is bm25:
+            order = [index for index in order if scores[index] > 0]
+        return {"results": [{key: value for key, value in corpus[index].items()
+                             if key not in hidden and (not features or key in features)}
+                            for index in order[:limit]]}
+
+    return app
+
+
+def free_port() -> int:
+    """Porta TCP livre em 127.0.0.1"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def serve_in_thread(app: FastAPI, port: int) -> uvicorn.Server:
+    """Sobe o app em uma thread própria (com event loop próprio) e aguarda ficar pronto"""
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    return server
@@ -0,0 +1,18 @@
+import json
+import os
+
+# Corpus fixo de petições usado nos benchmarks
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), "peticoes_exemplo.json")
+
+
+def load_corpus(path=CORPUS_PATH):
+    """Carrega a lista de petições ({"id", "texto"}) do arquivo JSON"""
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def percentile(values, pct):
+    """Percentil simples (nearest-rank) de uma lista de valores"""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
@@ -0,0 +1,191 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, Optional
+
+
+def normalize_text(text: str) -> str:
+    """Normaliza o texto para a chave do cache: unicode NFKC, minúsculas e espaços colapsados"""
+    text = unicodedata.normalize("NFKC", text)
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+def make_cache_key(text: str, model: str, temperature: float, prompt_version: str) -> str:
+    """
+    Chave endereçada pelo conteúdo: hash do texto normalizado junto com
+    tudo que altera a resposta do LLM (modelo, temperatura e versão do prompt)
+    """
+    payload = json.dumps([normalize_text(text), model, temperature, prompt_version], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class BaseCache(ABC):
+    """Interface comum dos backends de cache, com contadores de acertos e falhas"""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        """Retorna o valor armazenado ou None se ausente/expirado"""
+        value = self._get(key)
+        with self._stats_lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key: str, value: str) -> None:
+        """Armazena o valor sob a chave informada"""
+        self._set(key, value)
+
+    def stats(self) -> Dict:
+        """Resumo de acertos e falhas do cache"""
+        with self._stats_lock:
+            total = self.hits + self.misses
+            return {
+                "backend": self.__class__.__name__,
+                "itens": len(self),
+                "acertos": self.hits,
+                "falhas": self.misses,
+                "taxa_acerto": round(self.hits / total, 4) if total else 0.0,
+            }
+
+    @abstractmethod
+    def _get(self, key: str) -> Optional[str]:
+        """Valor armazenado sob a chave, sem contar acertos e falhas (None se ausente ou expirado)"""
+        ...
+
+    @abstractmethod
+    def _set(self, key: str, value: str) -> None:
+        """Armazena o valor sob a chave"""
+        ...
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """Quantidade de itens armazenados"""
+        ...
+
+
+class MemoryCache(BaseCache):
+    """Cache LRU em memória, com expiração por TTL"""
+
+    def __init__(self, max_items: int = 1024, ttl: float = 86400):
+        super().__init__(ttl)
+        self.max_items = max_items
+        self._items: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, key: str) -> Optional[str]:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+
+            value, stored_at = item
+            if time.time() - stored_at > self.ttl:
+                del self._items[key]
+                return None
+
+            self._items.move_to_end(key)
+            return value
+
+    def _set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._items[key] = (value, time.time())
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+class SQLiteCache(BaseCache):
+    """
+    Cache persistido em SQLite. Sobrevive a reinicializações do container
+    quando o arquivo fica em um volume montado (ex: ./logs).
+    """
+
+    def __init__(self, path: str, max_items: int = 100000, ttl: float = 86400):
+        super().__init__(ttl)
+        self.path = path
+        self.max_items = max_items
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def _get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, stored_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            value, stored_at = row
+            if time.time() - stored_at > self.ttl:
+                self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            return value
+
+    def _set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, stored_at) VALUES (?, ?, ?)",
+                (key, value, time.time())
+            )
+            # Remove os itens mais antigos quando o limite é ultrapassado
+            self._conn.execute(
+                "DELETE FROM cache WHERE key IN ("
+                "SELECT key FROM cache ORDER BY stored_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_items,)
+            )
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+
+def create_cache(backend: str, max_items: int, ttl: float, path: str) -> Optional[BaseCache]:
+    """
+    Cria o backend de cache configurado
+
+    Args:
+        backend: "memory", "sqlite" ou "none"
+        max_items: quantidade máxima de itens
+        ttl: tempo de vida dos itens (s)
+        path: arquivo do banco (apenas para "sqlite")
+
+    Returns:
+        Instância do cache, ou None quando desabilitado
+    """
+    if backend == "none":
+        return None
+    if backend == "memory":
+        return MemoryCache(max_items=max_items, ttl=ttl)
+    if backend == "sqlite":
+        return SQLiteCache(path, max_items=max_items, ttl=ttl)
+    raise ValueError(f"Backend de cache desconhecido: {backend}")
@@ -0,0 +1,204 @@
+import asyncio
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+# Operadores de filtro aceitos pelo /query da API de jurisprudência
+FILTER_OPERATORS = ("Equal", "NotEqual", "LessThan", "LessThanEqual", "GreaterThan", "GreaterThanEqual",
+                    "Like", "IsNull", "ContainsAny", "ContainsAll")
+
+
+def validate_filter_operators(filters: Optional[List[Dict]]) -> List[str]:
+    """Erros dos filtros com operador desconhecido (não depende do catálogo)"""
+    return [f"Operador de filtro inválido: {item.get('query_type')}"
+            for item in filters or [] if item.get("query_type") not in FILTER_OPERATORS]
+
+
+class TribunalCatalog:
+    """
+    Catálogo dos tribunais e das propriedades de cada coleção, lido do /tribunais e
+    do /properties da API de jurisprudência na inicialização e atualizado em segundo
+    plano a cada `ttl` segundos. Permite validar features e filtros localmente, antes
+    de gastar uma chamada ao LLM ou à API. Enquanto o catálogo não foi carregado
+    (API fora do ar), a validação fica a cargo da própria API.
+    """
+
+    def __init__(self, base_url: str, ttl: float = 3600, aliases: Optional[Dict[str, str]] = None,
+                 retry_interval: float = 30, timeout: float = 5):
+        self.base_url = base_url
+        self.ttl = ttl
+        self.retry_interval = retry_interval
+        self.timeout = timeout
+        # Nomes curtos conhecidos (ex: "stf") -> coleção consultada no /query
+        self.known_aliases = {name.lower(): collection for name, collection in (aliases or {}).items()}
+
+        # Substituídos de uma vez a cada atualização: leitores nunca veem um catálogo pela metade
+        self._collections: Dict[str, Dict[str, Dict]] = {}
+        self._names: Dict[str, str] = {}
+        self._aliases: Dict[str, str] = {}
+        self._task: Optional[asyncio.Task] = None
+
+        self.loaded_at: Optional[float] = None
+        self.refreshes = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+
+    @property
+    def loaded(self) -> bool:
+        return bool(self._collections)
+
+    async def refresh(self, client: httpx.AsyncClient) -> bool:
+        """
+        Recarrega os tribunais e as propriedades de cada coleção (em paralelo). Em caso
+        de falha, o catálogo anterior continua valendo.
+
+        Returns:
+            True se o catálogo foi atualizado
+        """
+        try:
+            response = await client.get(f"{self.base_url}/tribunais", timeout=self.timeout)
+            response.raise_for_status()
+            names = [str(name) for name in response.json().get("results", [])]
+            named = {name.lower(): self.known_aliases.get(name.lower(), name) for name in names}
+            aliases = {**{collection.lower(): collection for collection in named.values()}, **named}
+            collections = list(dict.fromkeys(named.values()))
+            properties = await asyncio.gather(*(self._fetch_properties(client, collection)
+                                                 for collection in collections))
+        except (httpx.HTTPError, ValueError, KeyError, TypeError) as e:
+            self.failures += 1
+            self.last_error = f"{e.__class__.__name__}: {e}"
+            print(f"\nErro ao atualizar o catálogo de tribunais: {self.last_error}")
+            return False
+
+        self._collections = dict(zip(collections, properties))
+        self._names = named
+        self._aliases = aliases
+        self.loaded_at = time.time()
+        self.refreshes += 1
+        self.last_error = None
+        return True
+
+    async def _fetch_properties(self, client: httpx.AsyncClient, collection: str) -> Dict[str, Dict]:
+        response = await client.get(f"{self.base_url}/properties", params={"tribunal": collection},
+                                    timeout=self.timeout)
+        response.raise_for_status()
+        return {prop["name"]: prop for prop in response.json().get("results", [])}
+
+    async def start(self, client: httpx.AsyncClient) -> None:
+        """Carrega o catálogo e agenda as atualizações em segundo plano"""
+        await self.refresh(client)
+        self._task = asyncio.create_task(self._refresh_loop(client))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _refresh_loop(self, client: httpx.AsyncClient) -> None:
+        while True:
+            # Sem catálogo (ou após uma falha) tenta de novo mais cedo
+            await asyncio.sleep(self.ttl if self.last_error is None else min(self.retry_interval, self.ttl))
+            await self.refresh(client)
+
+    def resolve(self, name: str) -> Optional[str]:
+        """Coleção de um tribunal pelo nome curto ou pelo nome da coleção, ou None se não estiver no catálogo"""
+        return self._aliases.get(name.lower())
+
+    def collections(self) -> List[str]:
+        return list(self._collections)
+
+    def aliases(self) -> Dict[str, str]:
+        """Nomes dos tribunais retornados pelo /tribunais (em minúsculas) -> coleção"""
+        return dict(self._names)
+
+    def has_property(self, collection: str, name: str) -> bool:
+        """Indica se a coleção tem a propriedade (True se a coleção não está no catálogo)"""
+        properties = self._collections.get(collection)
+        return properties is None or name in properties
+
+    def is_filterable(self, collection: str, name: str) -> bool:
+        """Indica se a propriedade aceita filtros na coleção (True se a coleção não está no catálogo)"""
+        properties = self._collections.get(collection)
+        if properties is None:
+            return True
+        return bool(properties.get(name, {}).get("index_filterable"))
+
+    def property_type(self, collection: str, name: str) -> Optional[str]:
+        """Tipo da propriedade na coleção (data_type do /properties), ou None se desconhecido"""
+        return self._collections.get(collection, {}).get(name, {}).get("data_type")
+
+    def validate(self, tribunais: Optional[List[str]] = None, features: Optional[List[str]] = None,
+                 filters: Optional[List[Dict]] = None) -> List[str]:
+        """
+        Valida localmente uma consulta: tribunais conhecidos, features existentes em
+        algum dos tribunais consultados e filtros com operador válido em propriedades
+        filtráveis em todos eles (sem tribunais, todos os do catálogo são candidatos)
+
+        Returns:
+            Lista de erros (vazia se a consulta é válida)
+        """
+        errors = validate_filter_operators(filters)
+        if not self.loaded:
+            return errors
+
+        if tribunais:
+            candidates = []
+            for name in tribunais:
+                collection = self.resolve(name)
+                if collection is None:
+                    errors.append(f"Tribunal desconhecido: {name}")
+                else:
+                    candidates.append(collection)
+            if not candidates:
+                return errors
+        else:
+            candidates = self.collections()
+
+        for feature in features or []:
+            # id_documento identifica os documentos e sempre é pedido, mesmo fora do /properties
+            if feature != "id_documento" and not any(self.has_property(collection, feature) for collection in candidates):
+                errors.append(f"Campo inexistente: {feature}")
+        for item in filters or []:
+            field = item.get("collection_field", "")
+            missing = [collection for collection in candidates if not self.is_filterable(collection, field)]
+            if missing:
+                errors.append(f"Campo sem filtro em {', '.join(missing)}: {field}")
+        return errors
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Catálogo no formato exposto pela API"""
+        aliases = self.aliases()
+        return {
+            "tribunais": {
+                collection: {
+                    "nomes": [alias for alias, target in aliases.items() if target == collection],
+                    "propriedades": [
+                        {
+                            "nome": name,
+                            "tipo": prop.get("data_type"),
+                            "filtravel": bool(prop.get("index_filterable")),
+                            "pesquisavel": bool(prop.get("index_searchable")),
+                            "filtro_intervalo": bool(prop.get("index_range_filters")),
+                        }
+                        for name, prop in properties.items()
+                    ],
+                }
+                for collection, properties in self._collections.items()
+            },
+            "operadores_filtro": list(FILTER_OPERATORS),
+            "atualizado_em": self.loaded_at,
+        }
+
+    def stats(self) -> Dict:
+        return {
+            "tribunais": len(self._collections),
+            "atualizacoes": self.refreshes,
+            "falhas": self.failures,
+            "atualizado_em": self.loaded_at,
+            "ultimo_erro": self.last_error,
+        }
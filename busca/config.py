@@ -0,0 +1,131 @@
+import os
+from dotenv import load_dotenv
+
+# Carrega as variáveis do arquivo .env padrão antes de ler as configurações
+load_dotenv()
+
+# Pool de agentes criado na inicialização da API
+AGENT_POOL_SIZE = int(os.getenv("AGENT_POOL_SIZE", "4"))
+
+# Execução assíncrona do /processar
+MAX_CONCURRENT_REQUESTS = int(os.getenv("MAX_CONCURRENT_REQUESTS", "16"))  # requisições processadas ao mesmo tempo
+LLM_EXECUTOR_WORKERS = int(os.getenv("LLM_EXECUTOR_WORKERS", "8"))  # threads para as chamadas bloqueantes ao LLM
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "20"))  # conexões mantidas com a API de jurisprudência
+
+# Chamadas HTTP à API de jurisprudência
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "3.05"))  # segundos para abrir a conexão
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "30"))  # segundos aguardando a resposta
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "2"))  # retentativas em 5xx e erros de conexão
+HTTP_BACKOFF_BASE = float(os.getenv("HTTP_BACKOFF_BASE", "0.2"))  # espera base entre retentativas (s)
+HTTP_BACKOFF_MAX = float(os.getenv("HTTP_BACKOFF_MAX", "2.0"))  # espera máxima entre retentativas (s)
+
+# Cache das extrações texto -> query
+EXTRACTION_CACHE_BACKEND = os.getenv("EXTRACTION_CACHE_BACKEND", "memory")  # memory, sqlite ou none
+EXTRACTION_CACHE_SIZE = int(os.getenv("EXTRACTION_CACHE_SIZE", "1024"))  # itens mantidos no cache
+EXTRACTION_CACHE_TTL = float(os.getenv("EXTRACTION_CACHE_TTL", "604800"))  # tempo de vida dos itens (s)
+EXTRACTION_CACHE_PATH = os.getenv("EXTRACTION_CACHE_PATH", "logs/extraction_cache.sqlite")  # arquivo do backend sqlite
+
+# Cache semântico das extrações: textos quase iguais a um já processado reaproveitam a query
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() == "true"
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.93"))  # similaridade mínima (cosseno) para reaproveitar
+SEMANTIC_CACHE_SIZE = int(os.getenv("SEMANTIC_CACHE_SIZE", "2048"))  # textos mantidos no índice
+SEMANTIC_CACHE_TTL = float(os.getenv("SEMANTIC_CACHE_TTL", "604800"))  # tempo de vida dos itens (s)
+SEMANTIC_CACHE_POLICY = os.getenv("SEMANTIC_CACHE_POLICY", "lru")  # remoção com o índice cheio: lru ou lfu
+SEMANTIC_CACHE_PATH = os.getenv("SEMANTIC_CACHE_PATH", "logs/semantic_cache.npz")  # índice salvo ao encerrar
+
+# Cache dos resultados de busca
+SEARCH_CACHE_ENABLED = os.getenv("SEARCH_CACHE_ENABLED", "true").lower() == "true"
+SEARCH_CACHE_SIZE = int(os.getenv("SEARCH_CACHE_SIZE", "2048"))  # itens mantidos no cache
+SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", "3600"))  # TTL padrão (s)
+SEARCH_CACHE_TRIBUNAL_TTLS = os.getenv("SEARCH_CACHE_TRIBUNAL_TTLS", "")  # TTL por tribunal, ex: "stf=3600,stj=1800"
+SEARCH_CACHE_STALE_TTL = float(os.getenv("SEARCH_CACHE_STALE_TTL", "3600"))  # janela em que resultados expirados ainda são servidos (s)
+
+# Pré-processamento do texto antes do prompt (tokens estimados em ~4 caracteres por token)
+PREPROCESS_ENABLED = os.getenv("PREPROCESS_ENABLED", "true").lower() == "true"
+PREPROCESS_TOKEN_BUDGET = int(os.getenv("PREPROCESS_TOKEN_BUDGET", "1500"))  # textos maiores são resumidos às frases mais relevantes
+PREPROCESS_CHUNK_THRESHOLD = int(os.getenv("PREPROCESS_CHUNK_THRESHOLD", "6000"))  # acima disso o texto é dividido em trechos
+PREPROCESS_CHUNK_TOKENS = int(os.getenv("PREPROCESS_CHUNK_TOKENS", "1500"))  # tamanho de cada trecho
+PREPROCESS_MAX_CHUNKS = int(os.getenv("PREPROCESS_MAX_CHUNKS", "8"))  # trechos extraídos em paralelo por texto
+
+# Modo de extração padrão: "two_pass" (duas chamadas ao LLM) ou "single_pass" (uma chamada estruturada)
+EXTRACTION_MODE = os.getenv("EXTRACTION_MODE", "two_pass")
+
+# Variante de prompt e formato de saída padrão (podem ser alterados por requisição)
+PROMPT_VARIANT = os.getenv("PROMPT_VARIANT", "busca")  # busca (temperatura 0.2) ou core2 (0.3, extrai o tribunal)
+OUTPUT_FORMAT = os.getenv("OUTPUT_FORMAT", "query")  # query (texto) ou estruturada (inclui a query_estruturada)
+
+# Backends de LLM: modelo de cada etapa, servidores locais compatíveis com a API da OpenAI e fallback
+LLM_BACKENDS = os.getenv("LLM_BACKENDS", "")  # JSON {nome: {model, base_url, api_key_env, timeout, max_retries, temperature, input_cost, output_cost}}; vazio usa só o modelo padrão na OpenAI
+LLM_ROUTES = os.getenv("LLM_ROUTES", "")  # cadeia de backends por etapa, ex: "extract_elements=local>openai,build_query=openai"
+LLM_DEFAULT_BACKEND = os.getenv("LLM_DEFAULT_BACKEND", "")  # backend das etapas sem rota (vazio: o primeiro do JSON)
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))  # prazo de cada chamada (s) quando o backend não define o seu
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "0"))  # chamada acima desse percentil da latência do backend ganha uma duplicata (0 = sem duplicatas, ex: 95)
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))  # chamadas observadas no backend antes de duplicar
+
+# Orçamento de latência por requisição (o cliente pode informar o seu em orcamento_latencia_ms)
+LATENCY_BUDGET_MS = float(os.getenv("LATENCY_BUDGET_MS", "0"))  # orçamento padrão (0 = sem orçamento)
+LATENCY_BUDGET_SEARCH_RESERVE = float(os.getenv("LATENCY_BUDGET_SEARCH_RESERVE", "1.0"))  # tempo reservado para a busca (s), no máximo metade do orçamento
+LATENCY_BUDGET_SEMANTIC_THRESHOLD = float(os.getenv("LATENCY_BUDGET_SEMANTIC_THRESHOLD", "0.8"))  # similaridade aceita do cache semântico com o orçamento no fim
+
+# Busca em vários tribunais em paralelo
+MULTI_TRIBUNAL_SEARCH = os.getenv("MULTI_TRIBUNAL_SEARCH", "false").lower() == "true"  # modo padrão da implantação
+SEARCH_DEADLINE = float(os.getenv("SEARCH_DEADLINE", "8"))  # prazo global aguardando as coleções (s)
+RRF_K = int(os.getenv("RRF_K", "60"))  # constante do Reciprocal Rank Fusion
+TRIBUNAL_ROUTING_MAX = int(os.getenv("TRIBUNAL_ROUTING_MAX", "3"))  # tribunais consultados quando o texto cita vários (1 = apenas o primeiro)
+
+# Expansão da busca: queries alternativas geradas na mesma chamada ao LLM e executadas em paralelo
+QUERY_EXPANSION = int(os.getenv("QUERY_EXPANSION", "0"))  # queries alternativas por padrão (0 = desligada)
+QUERY_EXPANSION_MAX = int(os.getenv("QUERY_EXPANSION_MAX", "4"))  # maior número de alternativas aceito por requisição
+QUERY_EXPANSION_MAX_FANOUT = int(os.getenv("QUERY_EXPANSION_MAX_FANOUT", "8"))  # máximo de buscas (queries x tribunais) por requisição
+QUERY_EXPANSION_DEADLINE = float(os.getenv("QUERY_EXPANSION_DEADLINE", "5"))  # prazo global aguardando as buscas (s)
+
+# Catálogo de tribunais e propriedades lido do /tribunais e /properties da API de jurisprudência
+CATALOG_ENABLED = os.getenv("CATALOG_ENABLED", "true").lower() == "true"
+CATALOG_TTL = float(os.getenv("CATALOG_TTL", "3600"))  # intervalo entre as atualizações em segundo plano (s)
+
+# Reordenação híbrida local (opcional): pede mais candidatos à busca BM25 e os reordena com a similaridade densa.
+# Cada busca passa a trazer RERANK_CANDIDATES ementas e, com RERANK_DENSE_QUERY_TYPE, uma segunda busca vetorial
+RERANK_ENABLED = os.getenv("RERANK_ENABLED", "false").lower() == "true"
+RERANK_CANDIDATES = int(os.getenv("RERANK_CANDIDATES", "30"))  # candidatos pedidos a cada busca
+RERANK_DENSE_QUERY_TYPE = os.getenv("RERANK_DENSE_QUERY_TYPE", "")  # query_type da busca vetorial (vazio = similaridade local)
+RERANK_DENSE_RETRY = float(os.getenv("RERANK_DENSE_RETRY", "300"))  # após uma falha da busca vetorial, tempo sem pedi-la à coleção (s)
+RERANK_LEXICAL_WEIGHT = float(os.getenv("RERANK_LEXICAL_WEIGHT", "0.45"))  # peso da posição na busca BM25 (score 1 / (60 + posição))
+RERANK_DENSE_WEIGHT = float(os.getenv("RERANK_DENSE_WEIGHT", "0.35"))  # peso da similaridade densa
+RERANK_CONCEPT_BOOST = float(os.getenv("RERANK_CONCEPT_BOOST", "0.15"))  # bônus pelos conceitos-chave citados no documento
+RERANK_AREA_BOOST = float(os.getenv("RERANK_AREA_BOOST", "0.05"))  # bônus pela área do direito citada no documento
+
+# Filtros pedidos no texto (período de publicação, relator e tribunal), aplicados na busca da API de jurisprudência
+FILTER_EXTRACTION = os.getenv("FILTER_EXTRACTION", "true").lower() == "true"
+FILTER_EXTRACTION_LLM = os.getenv("FILTER_EXTRACTION_LLM", "true").lower() == "true"  # pede ao LLM os pedidos que as expressões locais não reconhecem
+FILTER_DATE_FIELD = os.getenv("FILTER_DATE_FIELD", "dataPublicacao")  # propriedade filtrada pelo período
+FILTER_RELATOR_FIELD = os.getenv("FILTER_RELATOR_FIELD", "ministroRelator")  # propriedade filtrada pelo relator
+FILTER_UTC_OFFSET = os.getenv("FILTER_UTC_OFFSET", "-03:00")  # fuso horário das datas dos filtros
+
+# Resultados da busca: paginação, resultados resumidos e hidratação dos documentos (/documentos)
+SEARCH_LIMIT = int(os.getenv("SEARCH_LIMIT", "5"))  # resultados por página quando o cliente não informa o limite
+SEARCH_MAX_LIMIT = int(os.getenv("SEARCH_MAX_LIMIT", "50"))  # maior limite aceito por página
+SEARCH_MAX_RESULTS = int(os.getenv("SEARCH_MAX_RESULTS", "200"))  # maior pagina × limite aceito (a API não pagina: são pedidos todos os resultados até a página)
+SEARCH_SUMMARY_RESULTS = os.getenv("SEARCH_SUMMARY_RESULTS", "false").lower() == "true"  # resultados resumidos (trecho da ementa) por padrão
+SEARCH_SNIPPET_CHARS = int(os.getenv("SEARCH_SNIPPET_CHARS", "200"))  # tamanho do trecho da ementa nos resultados resumidos
+DOCUMENT_CACHE_ENABLED = os.getenv("DOCUMENT_CACHE_ENABLED", "true").lower() == "true"
+DOCUMENT_CACHE_SIZE = int(os.getenv("DOCUMENT_CACHE_SIZE", "4096"))  # documentos mantidos no cache
+DOCUMENT_CACHE_TTL = float(os.getenv("DOCUMENT_CACHE_TTL", "86400"))  # tempo de vida dos documentos (s)
+DOCUMENTS_MAX_IDS = int(os.getenv("DOCUMENTS_MAX_IDS", "50"))  # ids aceitos por chamada ao /documentos
+
+# Processamento em lote (/processar/lote)
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))  # textos de um lote processados ao mesmo tempo
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "1000"))  # textos aceitos por lote
+
+# Fila de jobs (/jobs): o pipeline roda em segundo plano e o cliente consulta o resultado ou recebe um webhook
+JOB_BROKER = os.getenv("JOB_BROKER", "memory")  # memory ou sqlite
+JOB_BROKER_PATH = os.getenv("JOB_BROKER_PATH", "logs/jobs.sqlite")  # arquivo do broker sqlite
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))  # jobs executados ao mesmo tempo
+JOB_RESULT_TTL = float(os.getenv("JOB_RESULT_TTL", "86400"))  # tempo que jobs finalizados ficam disponíveis (s)
+JOB_WEBHOOK_HOSTS = os.getenv("JOB_WEBHOOK_HOSTS", "")  # hosts aceitos no webhook_url, separados por vírgula (vazio = webhooks desabilitados)
+
+# Caminho rápido léxico: textos curtos com vocabulário já conhecido são classificados sem chamar o LLM
+LEXICAL_FAST_PATH = os.getenv("LEXICAL_FAST_PATH", "true").lower() == "true"
+LEXICAL_INDEX_PATH = os.getenv("LEXICAL_INDEX_PATH", "logs/lexical_index.json")  # vocabulário aprendido, salvo ao encerrar
+LEXICAL_MAX_WORDS = int(os.getenv("LEXICAL_MAX_WORDS", "25"))  # textos maiores sempre vão para o LLM
+LEXICAL_MIN_CONCEPTS = int(os.getenv("LEXICAL_MIN_CONCEPTS", "2"))  # conceitos conhecidos exigidos no texto
+LEXICAL_MIN_COVERAGE = float(os.getenv("LEXICAL_MIN_COVERAGE", "0.7"))  # fração dos termos coberta por conceitos conhecidos
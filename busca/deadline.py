@@ -0,0 +1,88 @@
+import contextvars
+import time
+from contextlib import contextmanager
+from typing import Iterator, List, Optional
+
+from .metrics import DEGRADATIONS
+
+# Degradações aplicadas quando o orçamento de latência da requisição está no fim
+SEMANTIC_NEIGHBOUR = "cache_aproximado"  # query de um texto parecido, abaixo do limiar normal do cache semântico
+QUERY_FROM_CONCEPTS = "query_por_conceitos"  # build_query pulado: query montada com os conceitos-chave
+QUERY_FROM_TEXT = "query_do_texto"  # extração sem resposta no prazo: query com o início do texto
+PARTIAL_CHUNKS = "trechos_incompletos"  # texto longo: elementos apenas dos trechos que responderam no prazo
+SEARCH_TIMEOUT = "busca_expirada"  # busca sem resposta no prazo: resultados vazios
+
+
+class DeadlineExceeded(TimeoutError):
+    """Orçamento de latência da requisição esgotado antes da resposta"""
+
+
+class Deadline:
+    """Prazo final de uma requisição, a partir do orçamento de latência (s)"""
+
+    def __init__(self, budget: float):
+        self.budget = budget
+        self.expires_at = time.monotonic() + budget
+
+    def remaining(self) -> float:
+        """Tempo restante (s), nunca negativo"""
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def reserve(self, seconds: float) -> "Deadline":
+        """Prazo que termina `seconds` antes deste (no máximo metade do orçamento), para reservar tempo a etapas seguintes"""
+        reserved = Deadline(self.budget)
+        reserved.expires_at = self.expires_at - min(seconds, self.budget / 2)
+        return reserved
+
+    def timeout(self, default: Optional[float] = None) -> float:
+        """Prazo de uma chamada: o restante do orçamento, limitado ao prazo padrão da chamada"""
+        remaining = self.remaining()
+        return min(default, remaining) if default is not None else remaining
+
+
+# Prazo e degradações da requisição atual; as threads do LLM recebem uma cópia do contexto
+_request_deadline: contextvars.ContextVar[Optional[Deadline]] = contextvars.ContextVar(
+    "request_deadline", default=None
+)
+_request_degradations: contextvars.ContextVar[Optional[List[str]]] = contextvars.ContextVar(
+    "request_degradations", default=None
+)
+
+
+def start_request_deadline(budget: Optional[float]) -> Optional[Deadline]:
+    """Inicia o prazo (None = sem orçamento) e a lista de degradações da requisição atual"""
+    deadline = Deadline(budget) if budget else None
+    _request_deadline.set(deadline)
+    _request_degradations.set([])
+    return deadline
+
+
+def current_deadline() -> Optional[Deadline]:
+    """Prazo da requisição atual, ou None sem orçamento de latência"""
+    return _request_deadline.get()
+
+
+@contextmanager
+def use_deadline(deadline: Optional[Deadline]) -> Iterator[None]:
+    """Substitui o prazo da requisição atual dentro do bloco (ex: o prazo da extração, com a reserva da busca)"""
+    token = _request_deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _request_deadline.reset(token)
+
+
+def record_degradation(name: str) -> None:
+    """Registra uma degradação no contador e na requisição atual"""
+    DEGRADATIONS.labels(name).inc()
+    degradations = _request_degradations.get()
+    if degradations is not None and name not in degradations:
+        degradations.append(name)
+
+
+def current_degradations() -> List[str]:
+    """Degradações aplicadas na requisição atual (vazia fora de uma requisição)"""
+    return list(_request_degradations.get() or [])
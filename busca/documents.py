@@ -0,0 +1,102 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Campos retirados dos resultados resumidos: o texto longo vira um trecho e o completo vem do /documentos
+HEAVY_FIELDS = ("ementa",)
+
+
+def make_snippet(text: str, max_chars: int = 200) -> str:
+    """Início do texto com até `max_chars` caracteres, cortado no fim de uma palavra"""
+    text = " ".join(text.split())
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max_chars]
+    if " " in cut:
+        cut = cut.rsplit(" ", 1)[0]
+    return cut.rstrip(" ,;:.") + "..."
+
+
+def summarize_result(result: Dict, tribunal: Optional[str], snippet_chars: int = 200, position: int = 0) -> Dict:
+    """
+    Versão leve de um resultado de busca: sem os campos longos, com o `trecho` da
+    ementa, a `posicao` no ranking e o `tribunal` (coleção) usado para hidratar o
+    documento completo no /documentos
+    """
+    summary = {key: value for key, value in result.items() if key not in HEAVY_FIELDS}
+    if result.get("ementa"):
+        summary["trecho"] = make_snippet(result["ementa"], snippet_chars)
+    summary["posicao"] = position
+    origins = result.get("origens")
+    summary["tribunal"] = origins[0] if origins else tribunal
+    return summary
+
+
+class DocumentCache:
+    """
+    Cache dos documentos por (coleção, id_documento), com LRU limitado por quantidade
+    de itens e TTL. Os campos de um documento vistos em buscas e hidratações diferentes
+    são acumulados, e o documento só é servido se tiver todos os campos pedidos.
+    """
+
+    def __init__(self, max_items: int = 4096, ttl: float = 86400):
+        self.max_items = max_items
+        self.ttl = ttl
+        self._items: "OrderedDict[Tuple[str, str], Tuple[Dict, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, tribunal: str, ids: Iterable[str], fields: List[str]) -> Tuple[Dict[str, Dict], List[str]]:
+        """
+        Returns:
+            Tupla (documentos encontrados por id, ids ausentes, expirados ou sem algum dos campos)
+        """
+        found: Dict[str, Dict] = {}
+        missing: List[str] = []
+        now = time.time()
+        with self._lock:
+            for doc_id in ids:
+                item = self._items.get((tribunal, doc_id))
+                if item is not None and now - item[1] > self.ttl:
+                    del self._items[(tribunal, doc_id)]
+                    item = None
+                if item is None or any(field not in item[0] for field in fields):
+                    missing.append(doc_id)
+                    continue
+                self._items.move_to_end((tribunal, doc_id))
+                found[doc_id] = {field: item[0][field] for field in fields}
+            self.hits += len(found)
+            self.misses += len(missing)
+        return found, missing
+
+    def store_many(self, tribunal: str, documents: Iterable[Dict], id_field: str = "id_documento") -> None:
+        """Armazena (ou completa os campos de) documentos, removendo os menos usados acima do limite"""
+        now = time.time()
+        with self._lock:
+            for document in documents:
+                doc_id = document.get(id_field)
+                if doc_id is None:
+                    continue
+                key = (tribunal, doc_id)
+                item = self._items.get(key)
+                fields = dict(item[0]) if item is not None and now - item[1] <= self.ttl else {}
+                # Campos derivados da busca (score, origens) não fazem parte do documento
+                fields.update((name, value) for name, value in document.items()
+                              if name not in ("score_rrf", "origens", "consultas"))
+                self._items[key] = (fields, now)
+                self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+    def stats(self) -> Dict:
+        """Resumo de acertos e falhas por documento, no mesmo formato dos demais caches"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "itens": len(self._items),
+                "acertos": self.hits,
+                "falhas": self.misses,
+                "taxa_acerto": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
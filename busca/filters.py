@@ -0,0 +1,329 @@
+import calendar
+import re
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .lexical import strip_accents
+from .routing import TRIBUNAL_NAMES, find_tribunals, strip_tribunals
+
+# Palavras que indicam um pedido de jurisprudência: datas e relatores só viram filtros logo depois delas,
+# para não confundir a data de um contrato ou a citação de um precedente ("Rel. Min. ..., DJe ...") com um filtro
+ANCHOR = r"\b(?:jurisprudencias?|julgados|precedentes|acordaos|decisoes|ementas|entendimentos)\b"
+# Até 6 palavras (sem números nem pontuação) entre a âncora e a expressão, ex: "do stf sobre o tema"
+GAP = r"(?:\s+[a-z]+){0,6}?\s+"
+# Palavras aceitas entre a âncora e um ano solto ("de 2023", "em 2023"), além dos nomes dos tribunais:
+# em "jurisprudência sobre o código civil de 2002" o ano é do código, não do pedido
+FUNCTION_WORDS = {"a", "o", "as", "os", "da", "do", "das", "dos", "de", "na", "no", "nas", "nos", "e", "em",
+                  "pela", "pelo", "pelas", "pelos"}
+# Nomes de leis: um ano depois deles (ex: "novo cpc de 2015") identifica a lei, não o período pedido
+STATUTE_NOUNS = {"lei", "leis", "codigo", "cpc", "cdc", "clt", "constituicao", "emenda", "decreto", "estatuto"}
+
+MONTHS = {name: number for number, name in enumerate(
+    ["janeiro", "fevereiro", "marco", "abril", "maio", "junho", "julho", "agosto", "setembro", "outubro",
+     "novembro", "dezembro"], 1)}
+NUMBER_WORDS = {"um": 1, "uma": 1, "dois": 2, "duas": 2, "tres": 3, "quatro": 4, "cinco": 5, "seis": 6, "sete": 7,
+                "oito": 8, "nove": 9, "dez": 10}
+PERIOD_WORDS = {"bienio": 2, "trienio": 3, "quadrienio": 4, "quinquenio": 5, "decada": 10}
+
+# Tipos do /properties aceitos pelos operadores dos filtros extraídos
+RANGE_OPERATORS = ("LessThan", "LessThanEqual", "GreaterThan", "GreaterThanEqual")
+RANGE_TYPES = ("date", "int", "number")
+TEXT_TYPES = ("text", "string")
+
+_MONTH = "|".join(MONTHS)
+# Um instante citado no texto: data completa, dia e mês por extenso, mês e ano ou só o ano
+POINT = (rf"(?:\d{{1,2}}[/.-]\d{{1,2}}[/.-](?:19|20)\d\d|\d{{1,2}}\s+de\s+(?:{_MONTH})\s+de\s+(?:19|20)\d\d"
+         rf"|(?:{_MONTH})\s+de\s+(?:19|20)\d\d|(?:19|20)\d\d)(?![\d/.-]\d)")
+_POINT_PARTS = re.compile(rf"(\d{{1,2}})[/.-](\d{{1,2}})[/.-](\d{{4}})|(?:(\d{{1,2}})\s+de\s+)?(?:({_MONTH})\s+de\s+)?(\d{{4}})")
+_COUNT = rf"(?:\d{{1,2}}|{'|'.join(NUMBER_WORDS)})"
+
+# Expressões de período, testadas nesta ordem logo após a âncora (no texto sem acentos, em minúsculas)
+DATE_PATTERNS = [
+    ("intervalo", rf"(?:entre|de)\s+(?:os\s+anos\s+de\s+|o\s+ano\s+de\s+)?(?P<inicio>{POINT})\s+(?:e|a|ate)\s+(?P<fim>{POINT})"),
+    ("desde", rf"(?:a\s+partir\s+de|desde)\s+(?:o\s+ano\s+de\s+)?(?P<inicio>{POINT})"),
+    ("apos", rf"(?:apos|posteriores\s+a)\s+(?:o\s+ano\s+de\s+)?(?P<inicio>{POINT})"),
+    ("ate", rf"ate\s+(?:o\s+ano\s+de\s+)?(?P<fim>{POINT})"),
+    ("antes", rf"(?:antes\s+de|anteriores\s+a)\s+(?:o\s+ano\s+de\s+)?(?P<fim>{POINT})"),
+    ("ultimos", rf"(?:n?[oa]s|d[oa]s)\s+ultim[oa]s\s+(?P<quantidade>{_COUNT})\s+(?P<unidade>anos|meses)\b"),
+    ("ultimo", rf"(?:n?[oa]|d[oa])\s+ultim[oa]\s+(?P<unidade>ano|mes|{'|'.join(PERIOD_WORDS)})\b"),
+    ("ano_passado", r"(?:n?o|d?o)\s+ano\s+passado\b"),
+    ("ano_atual", r"(?:n?este|deste|n?o|d?o)\s+ano\s+(?:atual|corrente)\b|(?:n?este|deste)\s+ano\b"),
+    ("pontual", rf"(?P<preposicao>de|em|n?o\s+ano\s+de|do\s+ano\s+de|n?o\s+mes\s+de|do\s+mes\s+de)\s+(?P<inicio>{POINT})"),
+]
+
+
+def _compile_date_patterns() -> re.Pattern:
+    """Uma única expressão com as alternativas; os grupos internos recebem o nome do padrão (ex: inicio_desde)"""
+    alternatives = [f"(?P<{name}>" + re.sub(r"\(\?P<(\w+)>", rf"(?P<\1_{name}>", pattern) + ")"
+                    for name, pattern in DATE_PATTERNS]
+    return re.compile(ANCHOR + "(?P<gap>" + GAP + ")(?:" + "|".join(alternatives) + ")")
+
+
+_DATE_REGEX = _compile_date_patterns()
+
+# Nome próprio de um ministro (palavras com inicial maiúscula, com "de", "da", "dos"...) no texto original
+NAME = r"([A-ZÀ-Ý][A-Za-zÀ-ÿ'’]+(?:\s+(?:(?:d[aeo]s?|e)\s+)?[A-ZÀ-Ý][A-Za-zÀ-ÿ'’]+){0,3})"
+# "julgados da relatoria do Ministro X", "precedentes relatados pela Min. Y", "jurisprudência do Ministro Z"
+_RELATOR_REGEX = re.compile(
+    r"(?i:\b(?:jurisprud[eê]ncias?|julgados|precedentes|ac[oó]rd[aã]os|decis[oõ]es|votos)\b)"
+    r"(?:\s+(?i:d[oa]s?|de|pel[oa]s?|sob|com|a|relatoria|relatad[oa]s?|proferid[oa]s?|julgad[oa]s?)\b)*"
+    r"\s+(?i:ministr[oa]|min\.)\s+" + NAME
+)
+# Pedido de período ou de relator que as expressões acima não reconhecem (ex: "no periodo recente da pandemia")
+_DATE_CUE = re.compile(ANCHOR + GAP + r"(?:ultim\w*|period\w*|epoca|anos?|meses|semestres?|desde|entre|ate|antes|apos)\b")
+_RELATOR_CUE = re.compile(ANCHOR + GAP + r"(?:relat\w*|ministr[oa]s?|min)\b")
+
+
+def _parse_number(value: str) -> int:
+    return int(value) if value.isdigit() else NUMBER_WORDS[value]
+
+
+def _parse_point(text: str) -> Optional[Tuple[date, date]]:
+    """Primeiro e último dia do instante citado (o dia, o mês ou o ano inteiro), ou None se a data não existe"""
+    match = _POINT_PARTS.fullmatch(text)
+    if match is None:
+        return None
+    try:
+        if match.group(1):
+            day = date(int(match.group(3)), int(match.group(2)), int(match.group(1)))
+            return day, day
+        year = int(match.group(6))
+        if match.group(5):
+            month = MONTHS[match.group(5)]
+            if match.group(4):
+                day = date(year, month, int(match.group(4)))
+                return day, day
+            return date(year, month, 1), date(year, month, calendar.monthrange(year, month)[1])
+        return date(year, 1, 1), date(year, 12, 31)
+    except ValueError:
+        return None
+
+
+def _years_before(today: date, years: int) -> date:
+    """Mesmo dia `years` anos antes (29/02 vira 28/02 em anos não bissextos)"""
+    try:
+        return today.replace(year=today.year - years)
+    except ValueError:
+        return today.replace(year=today.year - years, day=28)
+
+
+def _months_before(today: date, months: int) -> date:
+    month = today.month - 1 - months
+    year, month = today.year + month // 12, month % 12 + 1
+    return date(year, month, min(today.day, calendar.monthrange(year, month)[1]))
+
+
+class FilterExtractor:
+    """
+    Extração determinística dos filtros pedidos no texto, com expressões regulares
+    compiladas uma vez: período de publicação ("jurisprudência do STF de 2023",
+    "julgados dos últimos dois anos"), relator ("precedentes do Ministro X") e os
+    tribunais citados no pedido. Os filtros saem no formato do /query da API de
+    jurisprudência; pedidos que as expressões não reconhecem ficam pendentes para o LLM.
+    """
+
+    def __init__(self, date_field: str = "dataPublicacao", relator_field: str = "ministroRelator",
+                 utc_offset: str = "-03:00"):
+        self.date_field = date_field
+        self.relator_field = relator_field
+        self.utc_offset = utc_offset
+
+    def _date_filters(self, start: Optional[date], end: Optional[date]) -> List[Dict]:
+        """Filtros de intervalo na data de publicação, do início do primeiro dia ao fim do último"""
+        filters = []
+        if start is not None:
+            filters.append({"content": f"{start.isoformat()}T00:00:00{self.utc_offset}",
+                            "query_type": "GreaterThanEqual", "collection_field": self.date_field})
+        if end is not None:
+            filters.append({"content": f"{end.isoformat()}T23:59:59{self.utc_offset}",
+                            "query_type": "LessThanEqual", "collection_field": self.date_field})
+        return filters
+
+    def _relator_filter(self, name: str) -> Dict:
+        return {"content": f"*{' '.join(name.split()).upper()}*", "query_type": "Like",
+                "collection_field": self.relator_field}
+
+    def _period(self, match: re.Match, today: date) -> Optional[Tuple[Optional[date], Optional[date]]]:
+        """Intervalo (início, fim) da expressão de período encontrada (None nas pontas abertas)"""
+        kind = match.lastgroup
+        point = lambda role: _parse_point(match.group(f"{role}_{kind}"))
+        if kind == "intervalo":
+            start, end = point("inicio"), point("fim")
+            if start is None or end is None or start[0] > end[1]:
+                return None
+            return start[0], end[1]
+        if kind in ("desde", "apos", "pontual"):
+            start = point("inicio")
+            if start is None:
+                return None
+            if kind == "desde":
+                return start[0], None
+            if kind == "apos":
+                return start[1] + timedelta(days=1), None
+            return start
+        if kind in ("ate", "antes"):
+            end = point("fim")
+            if end is None:
+                return None
+            return None, end[1] if kind == "ate" else end[0] - timedelta(days=1)
+        if kind == "ultimos":
+            count = _parse_number(match.group("quantidade_ultimos"))
+            if match.group("unidade_ultimos") == "meses":
+                return _months_before(today, count), None
+            return _years_before(today, count), None
+        if kind == "ultimo":
+            unit = match.group("unidade_ultimo")
+            if unit == "mes":
+                return _months_before(today, 1), None
+            return _years_before(today, PERIOD_WORDS.get(unit, 1)), None
+        if kind == "ano_passado":
+            return date(today.year - 1, 1, 1), date(today.year - 1, 12, 31)
+        return date(today.year, 1, 1), None
+
+    @staticmethod
+    def _statute_year(match: re.Match, aliases: Dict[str, str]) -> bool:
+        """
+        Ano que provavelmente não é o período pedido: segue o nome de uma lei ("do novo cpc de 2015")
+        ou vem solto ("de 2002", "em 2002") depois de palavras que não são nomes de tribunais
+        nem palavras curtas de ligação (ex: "jurisprudência sobre o código civil de 2002")
+        """
+        if match.lastgroup != "pontual":
+            return False
+        # Sem o catálogo, os nomes curtos padrão identificam os tribunais (ex: "do stf de 2023")
+        words = strip_tribunals(match.group("gap"), aliases or dict.fromkeys(TRIBUNAL_NAMES, "")).split()
+        if any(word in STATUTE_NOUNS for word in words):
+            return True
+        return (match.group("preposicao_pontual") in ("de", "em")
+                and any(word not in FUNCTION_WORDS for word in words))
+
+    def find_tribunals(self, text: str, aliases: Dict[str, str]) -> List[str]:
+        """
+        Coleções dos tribunais citados logo após um pedido de jurisprudência, pela sigla ou
+        por extenso (ex: "precedentes do STJ", "julgados do Supremo Tribunal Federal e do STJ")
+        """
+        if not aliases:
+            return []
+        normalized = strip_accents(text).lower()
+        found = []
+        for match in re.finditer(ANCHOR + r"((?:\s+[\w.-]+){1,8})", normalized):
+            found.extend(find_tribunals(match.group(1), aliases))
+        return list(dict.fromkeys(found))
+
+    def extract(self, text: str, aliases: Optional[Dict[str, str]] = None,
+                today: Optional[date] = None) -> Dict[str, Any]:
+        """
+        Args:
+            text: Texto jurídico original
+            aliases: Nomes curtos dos tribunais (em minúsculas) -> coleção
+            today: Data de referência dos períodos relativos (padrão: hoje)
+
+        Returns:
+            Dict com "filtros" (formato da API), "tribunais" (coleções citadas no pedido, na ordem
+            da primeira menção) e "pendente" (o texto pede um período ou relator que não foi reconhecido)
+        """
+        today = today or date.today()
+        normalized = strip_accents(text).lower()
+        filters: List[Dict] = []
+
+        # Só o primeiro período citado: pedidos com vários períodos ficam com o primeiro
+        loose_year = False
+        for match in _DATE_REGEX.finditer(normalized):
+            if self._statute_year(match, aliases or {}):
+                loose_year = True
+                continue
+            period = self._period(match, today)
+            if period is not None:
+                filters.extend(self._date_filters(*period))
+                break
+        relator = _RELATOR_REGEX.search(text)
+        if relator is not None:
+            filters.append(self._relator_filter(relator.group(1)))
+
+        fields = {item["collection_field"] for item in filters}
+        pending = ((self.date_field not in fields and (loose_year or _DATE_CUE.search(normalized) is not None))
+                   or (self.relator_field not in fields and _RELATOR_CUE.search(normalized) is not None))
+        return {"filtros": filters, "tribunais": self.find_tribunals(text, aliases or {}),
+                "pendente": pending}
+
+    def from_hints(self, hints: Optional[Dict], today: Optional[date] = None) -> List[Dict]:
+        """
+        Filtros a partir dos campos devolvidos pelo LLM (ano_inicial, ano_final,
+        ultimos_anos e relator); valores ausentes ou inválidos são ignorados
+        """
+        if not hints:
+            return []
+        today = today or date.today()
+
+        def year(name: str) -> Optional[int]:
+            value = hints.get(name)
+            try:
+                value = int(value)
+            except (TypeError, ValueError):
+                return None
+            return value if 1950 <= value <= today.year else None
+
+        try:
+            last_years = int(hints.get("ultimos_anos"))
+        except (TypeError, ValueError):
+            last_years = 0
+        start_year, end_year = year("ano_inicial"), year("ano_final")
+        start = date(start_year, 1, 1) if start_year else None
+        end = date(end_year, 12, 31) if end_year else None
+        if start is None and 0 < last_years <= 50:
+            start = _years_before(today, last_years)
+        if start is not None and end is not None and start > end:
+            start = end = None
+
+        filters = self._date_filters(start, end)
+        relator = hints.get("relator")
+        if isinstance(relator, str) and relator.strip() and len(relator.split()) <= 6:
+            filters.append(self._relator_filter(relator))
+        return filters
+
+
+def validate_extracted(filters: Iterable[Dict], catalog, tribunais: Optional[List[str]] = None
+                       ) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Separa os filtros extraídos que o catálogo aceita (campo filtrável em todos os
+    tribunais consultados e tipo compatível com o operador) dos descartados. Ao
+    contrário dos filtros do cliente, um filtro extraído inválido não gera erro: a
+    busca segue sem ele. Sem catálogo carregado, todos são aceitos.
+
+    Returns:
+        Tupla (aceitos, descartados)
+    """
+    filters = list(filters)
+    if catalog is None or not catalog.loaded:
+        return filters, []
+    collections = [collection for collection in map(catalog.resolve, tribunais or []) if collection]
+    collections = collections or catalog.collections()
+    accepted, dropped = [], []
+    for item in filters:
+        field, operator = item["collection_field"], item["query_type"]
+        types = {catalog.property_type(collection, field) for collection in collections} - {None}
+        compatible = (types <= set(RANGE_TYPES) if operator in RANGE_OPERATORS
+                      else types <= set(TEXT_TYPES) if operator == "Like" else True)
+        if compatible and all(catalog.is_filterable(collection, field) for collection in collections):
+            accepted.append(item)
+        else:
+            dropped.append(item)
+    return accepted, dropped
+
+
+def merge_filters(client: Iterable[Dict], *extracted: Iterable[Dict]) -> List[Dict]:
+    """
+    Filtros do cliente seguidos dos extraídos do texto, em ordem de prioridade: um campo
+    já filtrado por uma fonte anterior (o cliente, depois as expressões regulares) não
+    recebe os filtros das seguintes
+    """
+    merged = list(client)
+    for source in extracted:
+        fields = {item.get("collection_field") for item in merged}
+        merged.extend(item for item in source if item.get("collection_field") not in fields)
+    return merged
+
+
+def to_client_format(filters: Iterable[Dict], origin: str) -> List[Dict]:
+    """Filtros no formato dos `filtros` do /processar (campo, operador, valor), com a origem"""
+    return [{"campo": item["collection_field"], "operador": item["query_type"], "valor": item["content"],
+             "origem": origin} for item in filters]
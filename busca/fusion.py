@@ -0,0 +1,81 @@
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+
+def reciprocal_rank_fusion(result_lists: Dict[str, List[Dict]], k: int = 60,
+                           limit: Optional[int] = None, id_field: str = "id_documento") -> List[Dict]:
+    """
+    Combina listas de resultados ranqueadas por Reciprocal Rank Fusion (RRF).
+
+    Cada documento recebe a soma de 1 / (k + posição) em todas as listas em que aparece,
+    o que dispensa normalizar escalas de score diferentes entre coleções e consultas.
+    Documentos repetidos (mesmo `id_field`) são unificados.
+
+    Args:
+        result_lists: Listas de resultados indexadas pela sua origem (ex: tribunal)
+        k: Constante de suavização do RRF
+        limit: Quantidade máxima de resultados retornados (None = todos)
+        id_field: Campo que identifica o documento
+
+    Returns:
+        Resultados ordenados pelo score RRF, com os campos "score_rrf" e "origens"
+    """
+    merged: Dict[str, Dict] = {}
+
+    for origin, results in result_lists.items():
+        for rank, result in enumerate(results, 1):
+            doc_id = result.get(id_field)
+            if doc_id is None:
+                # Sem identificador não há como deduplicar: mantém o resultado isolado
+                doc_id = f"{origin}:{rank}"
+
+            entry = merged.get(doc_id)
+            if entry is None:
+                entry = dict(result)
+                entry["score_rrf"] = 0.0
+                entry["origens"] = []
+                merged[doc_id] = entry
+
+            entry["score_rrf"] += 1.0 / (k + rank)
+            if origin not in entry["origens"]:
+                entry["origens"].append(origin)
+
+    fused = sorted(merged.values(), key=lambda entry: entry["score_rrf"], reverse=True)
+    for entry in fused:
+        entry["score_rrf"] = round(entry["score_rrf"], 6)
+    return fused[:limit] if limit is not None else fused
+
+
+def fuse_expanded_results(result_lists: Dict[Tuple[str, str], List[Dict]], k: int = 60,
+                          limit: Optional[int] = None, id_field: str = "id_documento") -> List[Dict]:
+    """
+    Fusão dos resultados da busca expandida (várias queries em cada coleção), em dois
+    níveis: primeiro as queries de cada coleção, depois as coleções. Assim uma coleção
+    não pesa mais na fusão só por ter respondido a mais queries.
+
+    Args:
+        result_lists: Listas de resultados indexadas por (coleção, query)
+        k: Constante de suavização do RRF
+        limit: Quantidade máxima de resultados retornados (None = todos)
+        id_field: Campo que identifica o documento
+
+    Returns:
+        Resultados ordenados pelo score RRF, com os campos "score_rrf", "origens"
+        (coleções) e "consultas" (queries em que o documento apareceu)
+    """
+    by_collection: Dict[str, Dict[str, List[Dict]]] = defaultdict(dict)
+    for (collection, query), results in result_lists.items():
+        by_collection[collection][query] = results
+
+    fused: Dict[str, List[Dict]] = {}
+    for collection, lists in by_collection.items():
+        entries = reciprocal_rank_fusion(lists, k=k, id_field=id_field)
+        for entry in entries:
+            entry["consultas"] = entry.pop("origens")
+            entry["origens"] = [collection]
+        fused[collection] = entries
+
+    if len(fused) == 1:
+        results = next(iter(fused.values()))
+        return results[:limit] if limit is not None else results
+    return reciprocal_rank_fusion(fused, k=k, limit=limit, id_field=id_field)
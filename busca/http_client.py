@@ -0,0 +1,182 @@
+import asyncio
+import random
+import threading
+import time
+from collections import Counter, deque
+from typing import Dict, Optional
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+from . import config
+from .metrics import HTTP_RESPONSES, HTTP_SECONDS
+
+# Status HTTP que indicam falha temporária do backend e podem ser repetidos
+RETRY_STATUS = {500, 502, 503, 504}
+
+# Erros de conexão que podem ser repetidos com segurança
+RETRY_EXCEPTIONS_ASYNC = (httpx.ConnectError, httpx.ConnectTimeout, httpx.RemoteProtocolError)
+
+
+class HttpStats:
+    """
+    Estatísticas das chamadas HTTP a um backend: latência por chamada,
+    status retornados, retentativas e uso do pool de conexões.
+    """
+
+    def __init__(self, name: str, pool_size: int, window: int = 1000):
+        self.name = name
+        self.pool_size = pool_size
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=window)  # janela das últimas chamadas (ms)
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.status_codes: Counter = Counter()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def begin(self) -> float:
+        """Marca o início de uma chamada e retorna o instante de início"""
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        return time.perf_counter()
+
+    def end(self, start: float, status: Optional[int], retries: int) -> None:
+        """Registra o fim de uma chamada iniciada com begin()"""
+        latency_ms = (time.perf_counter() - start) * 1000
+        HTTP_SECONDS.labels(self.name).observe(latency_ms / 1000)
+        HTTP_RESPONSES.labels(self.name, str(status) if status is not None else "erro_conexao").inc()
+        with self._lock:
+            self.in_flight -= 1
+            self.calls += 1
+            self.retries += retries
+            self._latencies.append(latency_ms)
+            if status is None:
+                self.errors += 1
+                self.status_codes["erro_conexao"] += 1
+            else:
+                self.status_codes[str(status)] += 1
+                if status >= 400:
+                    self.errors += 1
+
+    def snapshot(self) -> Dict:
+        """Retorna um resumo das estatísticas para exposição na API"""
+        with self._lock:
+            latencies = sorted(self._latencies)
+            summary = {
+                "backend": self.name,
+                "chamadas": self.calls,
+                "erros": self.errors,
+                "retentativas": self.retries,
+                "status": dict(self.status_codes),
+                "pool": {
+                    "tamanho": self.pool_size,
+                    "em_uso": self.in_flight,
+                    "max_em_uso": self.max_in_flight,
+                },
+            }
+
+        if latencies:
+            summary["latencia_ms"] = {
+                "media": round(sum(latencies) / len(latencies), 2),
+                "p50": round(latencies[int(0.50 * (len(latencies) - 1))], 2),
+                "p95": round(latencies[int(0.95 * (len(latencies) - 1))], 2),
+                "max": round(latencies[-1], 2),
+            }
+        return summary
+
+
+# Estatísticas compartilhadas das chamadas à API de jurisprudência
+search_stats = HttpStats("jurisprudencia", config.HTTP_POOL_SIZE)
+
+_shared_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def backoff_delay(attempt: int) -> float:
+    """Espera antes da retentativa `attempt` (0, 1, ...), com backoff exponencial e jitter completo"""
+    ceiling = min(config.HTTP_BACKOFF_MAX, config.HTTP_BACKOFF_BASE * (2 ** attempt))
+    return random.uniform(0, ceiling)
+
+
+def create_session(pool_size: int = config.HTTP_POOL_SIZE) -> requests.Session:
+    """Cria uma Session com pool de conexões keep-alive do tamanho informado"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def get_shared_session() -> requests.Session:
+    """Session compartilhada pelo processo, criada no primeiro uso"""
+    global _shared_session
+    with _session_lock:
+        if _shared_session is None:
+            _shared_session = create_session()
+        return _shared_session
+
+
+def create_async_client(pool_size: int = config.HTTP_POOL_SIZE) -> httpx.AsyncClient:
+    """Cria um cliente assíncrono com pool de conexões keep-alive e timeouts"""
+    return httpx.AsyncClient(
+        limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+        timeout=httpx.Timeout(
+            config.HTTP_READ_TIMEOUT,
+            connect=config.HTTP_CONNECT_TIMEOUT,
+            pool=config.HTTP_CONNECT_TIMEOUT
+        )
+    )
+
+
+def post_with_retry(session: requests.Session, url: str, stats: HttpStats = search_stats,
+                    **kwargs) -> requests.Response:
+    """
+    POST com timeouts e retentativas limitadas (HTTP_MAX_RETRIES) em respostas 5xx
+    e erros de conexão. Respostas de erro finais são devolvidas ao chamador.
+    """
+    kwargs.setdefault("timeout", (config.HTTP_CONNECT_TIMEOUT, config.HTTP_READ_TIMEOUT))
+    start = stats.begin()
+    attempt = 0
+    try:
+        while True:
+            status = None
+            try:
+                response = session.post(url, **kwargs)
+            except requests.exceptions.ConnectionError:
+                if attempt >= config.HTTP_MAX_RETRIES:
+                    raise
+            else:
+                status = response.status_code
+                if status not in RETRY_STATUS or attempt >= config.HTTP_MAX_RETRIES:
+                    return response
+            time.sleep(backoff_delay(attempt))
+            attempt += 1
+    finally:
+        stats.end(start, status, attempt)
+
+
+async def post_with_retry_async(client: httpx.AsyncClient, url: str, stats: HttpStats = search_stats,
+                                **kwargs) -> httpx.Response:
+    """Versão assíncrona de post_with_retry"""
+    start = stats.begin()
+    attempt = 0
+    try:
+        while True:
+            status = None
+            try:
+                response = await client.post(url, **kwargs)
+            except RETRY_EXCEPTIONS_ASYNC:
+                if attempt >= config.HTTP_MAX_RETRIES:
+                    raise
+            else:
+                status = response.status_code
+                if status not in RETRY_STATUS or attempt >= config.HTTP_MAX_RETRIES:
+                    return response
+            await asyncio.sleep(backoff_delay(attempt))
+            attempt += 1
+    finally:
+        stats.end(start, status, attempt)
@@ -0,0 +1,375 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Awaitable, Callable, Dict, Optional
+
+import httpx
+
+from .http_client import HttpStats, post_with_retry_async
+from .metrics import JOB_WAIT_SECONDS
+
+# Estados de um job
+QUEUED = "na_fila"
+RUNNING = "executando"
+DONE = "concluido"
+FAILED = "erro"
+
+
+class Job:
+    """Um pedido de processamento enviado para execução em segundo plano"""
+
+    def __init__(self, payload: Dict, webhook_url: Optional[str] = None, job_id: Optional[str] = None,
+                 status: str = QUEUED, created_at: Optional[float] = None):
+        self.id = job_id or uuid.uuid4().hex
+        self.payload = payload
+        self.webhook_url = webhook_url
+        self.status = status
+        self.result: Optional[Dict] = None
+        self.error: Optional[str] = None
+        self.created_at = created_at or time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    def to_dict(self) -> Dict:
+        """Representação exposta na API e enviada aos webhooks"""
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "resultado": self.result,
+            "erro": self.error,
+            "criado_em": self.created_at,
+            "iniciado_em": self.started_at,
+            "concluido_em": self.finished_at,
+        }
+
+
+class BaseBroker(ABC):
+    """
+    Interface comum dos brokers: fila de jobs pendentes e registro dos jobs
+    para consulta. Outro broker (ex: Redis) só precisa implementar estes métodos.
+    """
+
+    def __init__(self, result_ttl: float):
+        self.result_ttl = result_ttl
+
+    @abstractmethod
+    async def put(self, job: Job) -> None:
+        """Registra o job e o coloca no fim da fila"""
+        ...
+
+    @abstractmethod
+    async def take(self) -> Job:
+        """Aguarda e retira o próximo job da fila, já marcado como em execução"""
+        ...
+
+    @abstractmethod
+    async def save(self, job: Job) -> None:
+        """Persiste o estado atual do job"""
+        ...
+
+    @abstractmethod
+    async def get(self, job_id: str) -> Optional[Job]:
+        """Retorna o job pelo id, ou None se inexistente/expirado"""
+        ...
+
+    @abstractmethod
+    def depth(self) -> int:
+        """Quantidade de jobs aguardando na fila"""
+        ...
+
+
+class MemoryBroker(BaseBroker):
+    """Fila em memória do processo; os jobs se perdem ao reiniciar a API"""
+
+    def __init__(self, result_ttl: float = 86400):
+        super().__init__(result_ttl)
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._jobs: Dict[str, Job] = {}
+
+    async def put(self, job: Job) -> None:
+        self._purge()
+        self._jobs[job.id] = job
+        await self._queue.put(job.id)
+
+    async def take(self) -> Job:
+        while True:
+            job = self._jobs.get(await self._queue.get())
+            if job is not None:
+                job.status = RUNNING
+                job.started_at = time.time()
+                return job
+
+    async def save(self, job: Job) -> None:
+        self._jobs[job.id] = job
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def _purge(self) -> None:
+        """Remove os jobs finalizados há mais de result_ttl segundos"""
+        limit = time.time() - self.result_ttl
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.finished_at is not None and job.finished_at < limit]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+
+class SQLiteBroker(BaseBroker):
+    """
+    Fila persistida em SQLite. Jobs pendentes sobrevivem a reinicializações do
+    container quando o arquivo fica em um volume montado (ex: ./logs), e jobs
+    interrompidos durante a execução voltam para a fila na inicialização.
+    As chamadas ao sqlite3 bloqueiam (disco e trava do banco): os métodos
+    assíncronos as executam em uma thread, fora do event loop.
+    """
+
+    def __init__(self, path: str, result_ttl: float = 86400, poll_interval: float = 0.2):
+        super().__init__(result_ttl)
+        self.path = path
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, status TEXT NOT NULL, payload TEXT NOT NULL, webhook_url TEXT, "
+            "result TEXT, error TEXT, created_at REAL NOT NULL, started_at REAL, finished_at REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+        # Jobs que estavam em execução quando o processo parou voltam para a fila
+        self._conn.execute("UPDATE jobs SET status = ?, started_at = NULL WHERE status = ?", (QUEUED, RUNNING))
+        self._conn.commit()
+
+    async def put(self, job: Job) -> None:
+        await asyncio.to_thread(self._insert, job)
+
+    def _insert(self, job: Job) -> None:
+        """Remove os jobs expirados e grava o novo job na fila"""
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM jobs WHERE finished_at IS NOT NULL AND finished_at < ?",
+                (time.time() - self.result_ttl,)
+            )
+            self._conn.execute(
+                "INSERT INTO jobs (id, status, payload, webhook_url, created_at) VALUES (?, ?, ?, ?, ?)",
+                (job.id, job.status, json.dumps(job.payload, ensure_ascii=False), job.webhook_url, job.created_at)
+            )
+            self._conn.commit()
+
+    async def take(self) -> Job:
+        while True:
+            job = await asyncio.to_thread(self._claim_next)
+            if job is not None:
+                return job
+            await asyncio.sleep(self.poll_interval)
+
+    def _claim_next(self) -> Optional[Job]:
+        """Marca o job pendente mais antigo como em execução e o retorna"""
+        with self._lock:
+            # Um único UPDATE atômico evita que dois processos peguem o mesmo job
+            row = self._conn.execute(
+                "UPDATE jobs SET status = ?, started_at = ? WHERE id = ("
+                "SELECT id FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1) RETURNING id",
+                (RUNNING, time.time(), QUEUED)
+            ).fetchone()
+            self._conn.commit()
+            if row is None:
+                return None
+        return self._load(row[0])
+
+    async def save(self, job: Job) -> None:
+        await asyncio.to_thread(self._update, job)
+
+    def _update(self, job: Job) -> None:
+        """Grava o estado, o resultado e os horários do job"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, started_at = ?, finished_at = ? WHERE id = ?",
+                (job.status, json.dumps(job.result, ensure_ascii=False) if job.result is not None else None,
+                 job.error, job.started_at, job.finished_at, job.id)
+            )
+            self._conn.commit()
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        return await asyncio.to_thread(self._load, job_id)
+
+    def _load(self, job_id: str) -> Optional[Job]:
+        """Lê o job do banco, ou None se inexistente/expirado"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, status, payload, webhook_url, result, error, created_at, started_at, finished_at "
+                "FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+
+        job = Job(json.loads(row[2]), webhook_url=row[3], job_id=row[0], status=row[1], created_at=row[6])
+        job.result = json.loads(row[4]) if row[4] is not None else None
+        job.error = row[5]
+        job.started_at = row[7]
+        job.finished_at = row[8]
+        return job
+
+    def depth(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM jobs WHERE status = ?", (QUEUED,)).fetchone()[0]
+
+
+def create_broker(backend: str, result_ttl: float, path: str) -> BaseBroker:
+    """
+    Cria o broker da fila de jobs configurado
+
+    Args:
+        backend: "memory" ou "sqlite"
+        result_ttl: tempo que jobs finalizados ficam disponíveis para consulta (s)
+        path: arquivo do banco (apenas para "sqlite")
+    """
+    if backend == "memory":
+        return MemoryBroker(result_ttl=result_ttl)
+    if backend == "sqlite":
+        return SQLiteBroker(path, result_ttl=result_ttl)
+    raise ValueError(f"Broker de jobs desconhecido: {backend}")
+
+
+class JobManager:
+    """
+    Pool de workers que consome a fila de jobs, executa o pipeline de cada job
+    e avisa o webhook informado no envio, com métricas para autoescalonamento.
+    """
+
+    def __init__(self, broker: BaseBroker, handler: Callable[[Dict], Awaitable[Dict]], workers: int,
+                 http_client: Optional[httpx.AsyncClient] = None, window: int = 1000):
+        self.broker = broker
+        self.handler = handler
+        self.workers = workers
+        self.http_client = http_client
+        self.webhook_stats = HttpStats("webhooks", workers)
+        self._tasks = []
+        self._wait_times = deque(maxlen=window)  # espera na fila dos últimos jobs (ms)
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.busy = 0
+        self._busy_seconds = 0.0
+        self._started_at = time.monotonic()
+
+    def start(self) -> None:
+        """Inicia os workers no event loop atual"""
+        self._started_at = time.monotonic()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        """Interrompe os workers; jobs em execução no broker sqlite voltam para a fila no próximo início"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, payload: Dict, webhook_url: Optional[str] = None) -> Job:
+        """Enfileira um job e retorna imediatamente"""
+        job = Job(payload, webhook_url=webhook_url)
+        await self.broker.put(job)
+        self.submitted += 1
+        return job
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        return await self.broker.get(job_id)
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self.broker.take()
+            # Um job com problema (ex: falha ao gravar no broker) não pode derrubar o worker
+            try:
+                await self._run(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"\nErro no worker ao executar o job {job.id}: {str(e)}")
+
+    async def _run(self, job: Job) -> None:
+        """Executa o pipeline do job, grava o resultado e avisa o webhook"""
+        await self.broker.save(job)
+        wait = max(job.started_at - job.created_at, 0.0)
+        self._wait_times.append(wait * 1000)
+        JOB_WAIT_SECONDS.observe(wait)
+
+        self.busy += 1
+        start = time.monotonic()
+        try:
+            job.result = await self.handler(job.payload)
+            job.status = DONE
+            self.completed += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            job.error = f"Erro no processamento: {str(e)}"
+            job.status = FAILED
+            self.failed += 1
+        finally:
+            self.busy -= 1
+            self._busy_seconds += time.monotonic() - start
+
+        job.finished_at = time.time()
+        await self.broker.save(job)
+
+        if job.webhook_url:
+            await self._notify(job)
+
+    async def _notify(self, job: Job) -> None:
+        """Envia o job finalizado ao webhook; falhas são registradas sem afetar o job"""
+        try:
+            if self.http_client is not None:
+                response = await post_with_retry_async(self.http_client, job.webhook_url,
+                                                       stats=self.webhook_stats, json=job.to_dict())
+            else:
+                async with httpx.AsyncClient() as client:
+                    response = await post_with_retry_async(client, job.webhook_url,
+                                                           stats=self.webhook_stats, json=job.to_dict())
+            response.raise_for_status()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"\nErro ao notificar o webhook do job {job.id}: {str(e)}")
+
+    def stats(self) -> Dict:
+        """Profundidade da fila, espera na fila e utilização dos workers"""
+        elapsed = max(time.monotonic() - self._started_at, 1e-9)
+        wait_times = sorted(self._wait_times)
+        summary = {
+            "backend": self.broker.__class__.__name__,
+            "fila": self.broker.depth(),
+            "enviados": self.submitted,
+            "concluidos": self.completed,
+            "erros": self.failed,
+            "workers": {
+                "total": self.workers,
+                "ocupados": self.busy,
+                "utilizacao": round(self.busy / self.workers, 4) if self.workers else 0.0,
+                "utilizacao_media": round(min(self._busy_seconds / (elapsed * self.workers), 1.0), 4)
+                if self.workers else 0.0,
+            },
+            "webhooks": self.webhook_stats.snapshot(),
+        }
+
+        if wait_times:
+            summary["espera_ms"] = {
+                "media": round(sum(wait_times) / len(wait_times), 2),
+                "p50": round(wait_times[int(0.50 * (len(wait_times) - 1))], 2),
+                "p95": round(wait_times[int(0.95 * (len(wait_times) - 1))], 2),
+                "max": round(wait_times[-1], 2),
+            }
+        return summary
@@ -0,0 +1,107 @@
+import json
+import re
+from typing import Dict, Iterator, Tuple, Type
+
+from pydantic import BaseModel, ValidationError
+
+from .metrics import JSON_PARSE_FAILURES
+
+# Motivos de falha (rótulo "motivo" do contador de falhas)
+NO_JSON = "sem_json"
+INVALID_JSON = "json_invalido"
+INVALID_SCHEMA = "esquema_invalido"
+
+# Únicos caracteres que mudam o estado do parser; o restante do texto é pulado pelo regex (em C)
+_STRUCTURAL = re.compile(r'[{}"\\]')
+# Um objeto JSON começa com uma chave entre aspas ou é vazio; "{campo}" em texto livre é descartado sem json.loads
+_OBJECT_START = re.compile(r'\{\s*["}]')
+# Recomeços da varredura após uma chave nunca fechada: cada um percorre o resto do texto, e o limite
+# mantém a varredura linear mesmo em respostas com muitas chaves soltas (ex: "{ { { ...")
+MAX_RESTARTS = 8
+
+
+class JSONParseError(ValueError):
+    """Resposta do LLM sem um objeto JSON válido no esquema esperado"""
+
+    def __init__(self, reason: str, detail: str, raw: str):
+        super().__init__(f"{reason}: {detail}")
+        self.reason = reason
+        self.detail = detail
+        self.raw = raw
+
+
+def iter_json_objects(text: str) -> Iterator[Tuple[int, int]]:
+    """
+    Percorre o texto em uma passada e entrega (início, fim) de cada objeto JSON
+    balanceado no nível mais externo. Chaves dentro de strings são ignoradas, de
+    modo que cercas de código (```json), texto antes/depois e vários objetos
+    seguidos não atrapalham; um objeto truncado no fim do texto não é entregue,
+    nem trechos entre chaves que não começam como um objeto JSON.
+
+    Uma chave aberta e nunca fechada (ex: "{" solto no texto antes do JSON) chega ao
+    fim do texto sem voltar ao nível zero: a varredura recomeça na chave seguinte
+    (no máximo MAX_RESTARTS vezes).
+    """
+    position = 0
+    for _ in range(MAX_RESTARTS + 1):
+        depth = 0
+        start = -1
+        in_string = False
+        escaped_index = -1
+        for match in _STRUCTURAL.finditer(text, position):
+            index = match.start()
+            char = text[index]
+            if in_string:
+                if index == escaped_index:
+                    continue
+                if char == "\\":
+                    escaped_index = index + 1
+                elif char == '"':
+                    in_string = False
+            elif char == '"':
+                # Aspas fora de um objeto (texto em volta) não abrem string
+                in_string = depth > 0
+            elif char == "{":
+                if depth == 0:
+                    start = index
+                depth += 1
+            elif char == "}" and depth > 0:
+                depth -= 1
+                if depth == 0 and _OBJECT_START.match(text, start):
+                    yield start, index + 1
+        if depth == 0:
+            return
+        position = start + 1
+
+
+def parse_json_object(text: str, schema: Type[BaseModel]) -> Dict:
+    """
+    Extrai o primeiro objeto JSON da resposta e valida no esquema pydantic
+
+    Returns:
+        Dict com os campos do esquema (valores padrão preenchidos)
+
+    Raises:
+        JSONParseError: sem objeto JSON, JSON inválido ou fora do esquema (a falha é contada no /metrics)
+    """
+    found = False
+    error = INVALID_JSON
+    detail = ""
+    for start, end in iter_json_objects(text):
+        found = True
+        try:
+            value = json.loads(text[start:end])
+        except json.JSONDecodeError as e:
+            detail = str(e)
+            continue
+        try:
+            return schema.model_validate(value).model_dump()
+        except ValidationError as e:
+            error = INVALID_SCHEMA
+            detail = "; ".join(f"{'.'.join(str(part) for part in item['loc']) or 'objeto'}: {item['msg']}"
+                               for item in e.errors())
+
+    if not found:
+        error, detail = NO_JSON, "nenhum objeto JSON completo na resposta"
+    JSON_PARSE_FAILURES.labels(error).inc()
+    raise JSONParseError(error, detail, text)
@@ -0,0 +1,221 @@
+import json
+import os
+import re
+import threading
+import unicodedata
+from collections import Counter, defaultdict
+from typing import Dict, FrozenSet, List, Optional
+
+# Palavras sem valor para a classificação (já sem acentos)
+STOPWORDS = frozenset("""
+a ao aos as com como contra da das de do dos e em entre essa esse esta este isso na nas no nos o os ou
+para pela pelas pelo pelos por que se sem sob sobre um uma umas uns ja foi ser sao tem ter nao mais
+caso casos quando qual quais onde sua seu suas seus lhe the of
+""".split())
+
+# Sufixos removidos pelo stemmer leve, do mais longo para o mais curto
+SUFFIXES = (
+    "amentos", "imentos", "amento", "imento", "mente", "acoes", "icoes", "acao", "icao", "idades", "idade",
+    "ismos", "ismo", "istas", "ista", "aveis", "iveis", "avel", "ivel", "antes", "entes", "ante", "ente",
+    "adores", "ador", "edores", "edor", "idos", "idas", "ados", "adas", "ido", "ida", "ado", "ada",
+    "ivos", "ivas", "ivo", "iva", "osos", "osas", "oso", "osa", "oes", "aes", "ais", "eis",
+    "ar", "er", "ir", "ia", "ao", "os", "as", "es", "a", "o", "e", "s",
+)
+
+
+def strip_accents(text: str) -> str:
+    """Remove acentos e cedilhas (NFKD sem os caracteres combinantes)"""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def stem(word: str) -> str:
+    """Stemmer leve para português: remove o sufixo mais longo mantendo ao menos 3 letras"""
+    for suffix in SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[:-len(suffix)]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    """Tokens sem acentos, em minúsculas, sem stopwords e reduzidos ao radical"""
+    words = re.findall(r"[a-z0-9]+", strip_accents(text).lower())
+    return [stem(word) for word in words if word not in STOPWORDS and len(word) > 1]
+
+
+class LexicalIndex:
+    """
+    Vocabulário jurídico aprendido com as extrações do LLM (conceitos_chave e area_direito).
+
+    Textos curtos e já com cara de query, cujos termos são quase todos conceitos conhecidos
+    e apontam para uma área do direito com folga, são classificados localmente e a query
+    é montada de forma determinística, sem chamar o LLM.
+    """
+
+    def __init__(self, max_words: int = 25, min_concepts: int = 2, min_coverage: float = 0.7,
+                 min_area_share: float = 0.6, min_observations: int = 2, router=None):
+        """
+        Args:
+            router: TribunalRouter que reconhece os tribunais citados no texto, levados para a query
+                (default: os tribunais de routing.TRIBUNAL_NAMES, sem catálogo)
+        """
+        if router is None:
+            # Importado aqui: routing usa strip_accents deste módulo
+            from .routing import TRIBUNAL_NAMES, TribunalRouter
+            router = TribunalRouter({name: name.upper() for name in TRIBUNAL_NAMES})
+        self.router = router
+        self.max_words = max_words
+        self.min_concepts = min_concepts
+        self.min_coverage = min_coverage
+        self.min_area_share = min_area_share
+        self.min_observations = min_observations
+        self._lock = threading.Lock()
+
+        # radicais do conceito -> formas observadas e áreas em que apareceu
+        self._concepts: Dict[FrozenSet[str], Counter] = defaultdict(Counter)
+        self._concept_areas: Dict[FrozenSet[str], Counter] = defaultdict(Counter)
+        # radicais que identificam a área -> forma observada da área
+        self._areas: Dict[FrozenSet[str], Counter] = defaultdict(Counter)
+
+        self.fast_hits = 0
+        self.llm_fallbacks = 0
+        self._fast_ms = 0.0
+        self._llm_ms = 0.0
+
+    def learn(self, elements: Dict) -> None:
+        """Incorpora ao vocabulário os conceitos e a área de uma extração feita pelo LLM"""
+        area = (elements.get("area_direito") or "").strip()
+        concepts = [concept.strip() for concept in elements.get("conceitos_chave") or [] if concept.strip()]
+        area_key = frozenset(tokenize(area))
+        if not area_key:
+            return
+
+        with self._lock:
+            self._areas[area_key][area.lower()] += 1
+            for concept in concepts:
+                key = frozenset(tokenize(concept))
+                if key:
+                    self._concepts[key][concept.lower()] += 1
+                    self._concept_areas[key][area.lower()] += 1
+
+    def classify(self, text: str) -> Optional[Dict]:
+        """
+        Classifica o texto localmente
+
+        Returns:
+            Dict com area_direito, conceitos_chave, tribunal, query_text e confiança,
+            ou None quando a confiança é baixa e o texto deve seguir para o LLM
+        """
+        # O tribunal citado (pela sigla ou por extenso, com os nomes do catálogo) vai para a query pelo nome curto,
+        # que o LegalSearchAgent reconhece; seus termos não contam na cobertura
+        collections = self.router.find(text)
+        tribunal = (self.router.short_name(collections[0]) or "").upper() if collections else ""
+        if collections:
+            text = self.router.strip(text)
+
+        tokens = tokenize(text)
+        if not tokens or len(tokens) > self.max_words:
+            return None
+        token_set = set(tokens)
+
+        with self._lock:
+            matched = [key for key, forms in self._concepts.items()
+                       if key <= token_set and sum(forms.values()) >= self.min_observations]
+            # Conceitos mais específicos (mais radicais) primeiro; descarta os contidos em outro já escolhido
+            matched.sort(key=len, reverse=True)
+            chosen: List[FrozenSet[str]] = []
+            for key in matched:
+                if not any(key <= other for other in chosen):
+                    chosen.append(key)
+
+            # Cada conceito vota nas áreas em que foi visto; a área citada no próprio texto pesa em dobro
+            votes: Counter = Counter()
+            covered = set().union(*chosen) if chosen else set()
+            for key in chosen:
+                votes.update(self._concept_areas[key])
+            for key, forms in self._areas.items():
+                if key <= token_set:
+                    votes.update({form: count * 2 for form, count in forms.items()})
+                    covered |= key
+            concepts = [self._concepts[key].most_common(1)[0][0] for key in chosen]
+
+        if len(concepts) < self.min_concepts or not votes:
+            return None
+        coverage = len(covered & token_set) / len(token_set)
+        area, area_votes = votes.most_common(1)[0]
+        area_share = area_votes / sum(votes.values())
+        if coverage < self.min_coverage or area_share < self.min_area_share:
+            return None
+
+        return {
+            "tribunal": tribunal,
+            "area_direito": area,
+            "conceitos_chave": concepts,
+            "query_text": self.build_query(concepts, area, tribunal),
+            "confianca": round(coverage * area_share, 4),
+        }
+
+    @staticmethod
+    def build_query(concepts: List[str], area: str, tribunal: str = "") -> str:
+        """Query determinística no mesmo estilo das geradas pelo LLM (linguagem natural com conectores)"""
+        query = ", ".join(concepts[:-1]) + f" e {concepts[-1]}" if len(concepts) > 1 else concepts[0]
+        query = f"{query} no {area}"
+        if tribunal:
+            query = f"{query} no {tribunal}"
+        return query
+
+    def record(self, fast_path: bool, elapsed_ms: float) -> None:
+        """Registra se a extração usou o caminho rápido ou o LLM, e quanto tempo levou"""
+        with self._lock:
+            if fast_path:
+                self.fast_hits += 1
+                self._fast_ms += elapsed_ms
+            else:
+                self.llm_fallbacks += 1
+                self._llm_ms += elapsed_ms
+
+    def stats(self) -> Dict:
+        """Fração do tráfego atendida pelo caminho rápido e latência economizada (estimada pela média do LLM)"""
+        with self._lock:
+            total = self.fast_hits + self.llm_fallbacks
+            llm_avg = self._llm_ms / self.llm_fallbacks if self.llm_fallbacks else 0.0
+            fast_avg = self._fast_ms / self.fast_hits if self.fast_hits else 0.0
+            return {
+                "conceitos": len(self._concepts),
+                "areas": len(self._areas),
+                "caminho_rapido": self.fast_hits,
+                "llm": self.llm_fallbacks,
+                "fracao_caminho_rapido": round(self.fast_hits / total, 4) if total else 0.0,
+                "latencia_media_ms": {"caminho_rapido": round(fast_avg, 2), "llm": round(llm_avg, 2)},
+                "latencia_economizada_ms": round(self.fast_hits * max(llm_avg - fast_avg, 0.0), 1),
+            }
+
+    def save(self, path: str) -> None:
+        """Grava o vocabulário aprendido em JSON"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            data = {
+                "conceitos": [{"radicais": sorted(key), "formas": dict(forms), "areas": dict(self._concept_areas[key])}
+                              for key, forms in self._concepts.items()],
+                "areas": [{"radicais": sorted(key), "formas": dict(forms)} for key, forms in self._areas.items()],
+            }
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def load(self, path: str) -> None:
+        """Carrega um vocabulário gravado com save(); arquivo ausente é ignorado"""
+        if not os.path.exists(path):
+            return
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        with self._lock:
+            for item in data.get("conceitos", []):
+                key = frozenset(item["radicais"])
+                self._concepts[key].update(item["formas"])
+                self._concept_areas[key].update(item["areas"])
+            for item in data.get("areas", []):
+                self._areas[frozenset(item["radicais"])].update(item["formas"])
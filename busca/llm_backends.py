@@ -0,0 +1,265 @@
+import json
+import os
+import threading
+from collections import deque
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from .metrics import LLM_CALL_SECONDS, LLM_CALLS, LLM_COST, LLM_HEDGES, LLM_TOKENS
+
+# Etapas que chamam o LLM (mesmos nomes das etapas em /metrics e nos tempos da requisição)
+STAGES = ("extract_elements", "build_query", "single_pass", "json_repair")
+
+# Preço de tabela da OpenAI em USD por milhão de tokens (entrada, saída), usado nos backends da OpenAI sem
+# input_cost/output_cost no LLM_BACKENDS; modelos fora da tabela e servidores locais ficam sem custo estimado
+MODEL_PRICES = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+}
+
+# Classe de LLM do CrewAI, importada na criação do primeiro LLM: importar o CrewAI leva segundos e
+# só é necessário quando uma etapa chama o LLM (o benchmark offline a substitui pelo FakeLLM)
+LLM = None
+
+
+def llm_class():
+    global LLM
+    if LLM is None:
+        from crewai import LLM
+    return LLM
+
+
+@lru_cache(maxsize=1)
+def fallback_errors() -> Tuple[type, ...]:
+    """
+    Erros em que a chamada é repetida no próximo backend da cadeia: prazo esgotado, backend
+    fora do ar ou sobrecarregado. Erros de requisição (chave inválida, prompt recusado) não mudam de backend.
+    """
+    from litellm.exceptions import (APIConnectionError, InternalServerError, RateLimitError, ServiceUnavailableError,
+                                    Timeout)
+    return (Timeout, APIConnectionError, ServiceUnavailableError, InternalServerError, RateLimitError,
+            TimeoutError, ConnectionError)
+
+
+def is_fallback_error(error: BaseException) -> bool:
+    return isinstance(error, fallback_errors())
+
+
+class LLMBackend:
+    """
+    Um modelo acessível pelo LiteLLM: OpenAI ou qualquer servidor compatível com a
+    API da OpenAI (vLLM, Ollama, llama.cpp) indicado por `base_url`, com o custo
+    por milhão de tokens usado na contabilidade
+    """
+
+    def __init__(self, name: str, model: str, base_url: Optional[str] = None, api_key: Optional[str] = None,
+                 timeout: Optional[float] = None, temperature: Optional[float] = None,
+                 input_cost: Optional[float] = None, output_cost: Optional[float] = None,
+                 max_retries: Optional[int] = None, window: int = 1000):
+        self.name = name
+        self.model = model
+        self.base_url = base_url
+        self.api_key = api_key
+        self.timeout = timeout
+        self.temperature = temperature
+        # Sem preço configurado, o da tabela para os modelos da OpenAI; sem nenhum, o custo não é informado
+        if input_cost is None and output_cost is None and base_url is None:
+            input_cost, output_cost = MODEL_PRICES.get(model.removeprefix("openai/"), (None, None))
+        self.priced = input_cost is not None or output_cost is not None
+        self.input_cost = input_cost or 0.0
+        self.output_cost = output_cost or 0.0
+        self.max_retries = max_retries
+
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=window)  # janela das últimas chamadas bem-sucedidas (s)
+        self.calls = 0
+        self.failures = 0
+        self.fallbacks = 0
+        self.seconds = 0.0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cost = 0.0
+        self.hedges = 0
+        self.hedges_won = 0
+
+    @property
+    def local(self) -> bool:
+        return self.base_url is not None
+
+    def create_llm(self, temperature: float, api_key: Optional[str] = None):
+        """LLM do CrewAI para este backend (a temperatura do backend, se definida, prevalece)"""
+        # Retentativas do próprio cliente antes de desistir do backend (0 passa logo ao próximo da cadeia)
+        options = {"max_retries": self.max_retries} if self.max_retries is not None else {}
+        return llm_class()(
+            model=self.model,
+            temperature=self.temperature if self.temperature is not None else temperature,
+            api_key=self.api_key or api_key,
+            base_url=self.base_url,
+            timeout=self.timeout,
+            **options
+        )
+
+    def record_success(self, seconds: float, prompt_tokens: int, completion_tokens: int) -> None:
+        cost = (prompt_tokens * self.input_cost + completion_tokens * self.output_cost) / 1_000_000
+        with self._lock:
+            self.calls += 1
+            self.seconds += seconds
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+            self.cost += cost
+            self._latencies.append(seconds)
+        LLM_CALLS.labels(self.name, "ok").inc()
+        LLM_CALL_SECONDS.labels(self.name).observe(seconds)
+        # Tokens somados a cada chamada: o agente de extração é compartilhado entre requisições simultâneas
+        LLM_TOKENS.labels("prompt").inc(max(prompt_tokens, 0))
+        LLM_TOKENS.labels("completion").inc(max(completion_tokens, 0))
+        if cost:
+            LLM_COST.labels(self.name).inc(cost)
+
+    def record_failure(self, seconds: float, fallback: bool) -> None:
+        with self._lock:
+            self.calls += 1
+            self.failures += 1
+            self.fallbacks += fallback
+            self.seconds += seconds
+        LLM_CALLS.labels(self.name, "fallback" if fallback else "erro").inc()
+        LLM_CALL_SECONDS.labels(self.name).observe(seconds)
+
+    def record_hedge(self, won: bool) -> None:
+        """Registra uma chamada duplicada e se foi ela (e não a original) que respondeu primeiro"""
+        with self._lock:
+            self.hedges += 1
+            self.hedges_won += won
+        LLM_HEDGES.labels(self.name, "duplicata" if won else "original").inc()
+
+    def latency_percentile(self, percentile: float, min_samples: int = 1) -> Optional[float]:
+        """Percentil da latência das últimas chamadas bem-sucedidas (s), ou None com poucas amostras"""
+        with self._lock:
+            if len(self._latencies) < max(min_samples, 1):
+                return None
+            latencies = sorted(self._latencies)
+        return latencies[int(percentile / 100 * (len(latencies) - 1))]
+
+    def stats(self) -> Dict:
+        p95 = self.latency_percentile(95)
+        with self._lock:
+            return {
+                "modelo": self.model,
+                "base_url": self.base_url,
+                "chamadas": self.calls,
+                "falhas": self.failures,
+                "fallbacks": self.fallbacks,
+                "latencia_media_ms": round(self.seconds / self.calls * 1000, 2) if self.calls else None,
+                "latencia_p95_ms": round(p95 * 1000, 2) if p95 is not None else None,
+                "tokens_entrada": self.prompt_tokens,
+                "tokens_saida": self.completion_tokens,
+                "custo_usd": round(self.cost, 6) if self.priced else None,
+                "duplicatas": self.hedges,
+                "duplicatas_vencedoras": self.hedges_won,
+            }
+
+
+class LLMRouter:
+    """
+    Escolha do modelo por etapa: cada etapa tem uma cadeia de backends, e a chamada
+    passa ao próximo backend da cadeia quando o anterior esgota o prazo ou está fora do ar.
+    Com `hedge_percentile`, uma chamada que passa desse percentil da latência do backend
+    ganha uma duplicata, e vale a resposta que chegar primeiro.
+    """
+
+    def __init__(self, backends: Dict[str, LLMBackend], routes: Optional[Dict[str, List[str]]] = None,
+                 default: Optional[str] = None, hedge_percentile: Optional[float] = None,
+                 hedge_min_samples: int = 20):
+        if not backends:
+            raise ValueError("Nenhum backend de LLM configurado")
+        self.backends = backends
+        self.default = default or next(iter(backends))
+        self.routes = routes or {}
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        for stage_name, chain in [("padrao", [self.default]), *self.routes.items()]:
+            if stage_name not in STAGES and stage_name != "padrao":
+                raise ValueError(f"Etapa desconhecida na rota de LLM: {stage_name}")
+            for name in chain:
+                if name not in backends:
+                    raise ValueError(f"Backend de LLM desconhecido na rota de {stage_name}: {name}")
+
+    def chain(self, stage_name: str) -> List[LLMBackend]:
+        """Backends tentados, em ordem, nas chamadas da etapa"""
+        return [self.backends[name] for name in self.routes.get(stage_name) or [self.default]]
+
+    def hedge_delay(self, backend: LLMBackend) -> Optional[float]:
+        """Espera (s) antes de duplicar uma chamada ao backend, ou None sem duplicatas (ou poucas amostras)"""
+        if not self.hedge_percentile:
+            return None
+        return backend.latency_percentile(self.hedge_percentile, self.hedge_min_samples)
+
+    def expected_latency(self, stage_name: str) -> Optional[float]:
+        """Latência mediana (s) do primeiro backend da etapa, ou None se ele ainda não foi chamado"""
+        return self.chain(stage_name)[0].latency_percentile(50)
+
+    def signature(self) -> str:
+        """
+        Modelos que atendem as etapas (o primeiro de cada cadeia), para compor a chave
+        dos caches: trocar o modelo de uma etapa invalida as extrações anteriores
+        """
+        models = sorted({self.chain(stage_name)[0].model for stage_name in STAGES})
+        return "+".join(models)
+
+    def stats(self) -> Dict:
+        return {
+            "duplicata_percentil": self.hedge_percentile,
+            "rotas": {stage_name: [backend.name for backend in self.chain(stage_name)] for stage_name in STAGES},
+            "backends": {name: backend.stats() for name, backend in self.backends.items()},
+        }
+
+
+def parse_routes(spec: str) -> Dict[str, List[str]]:
+    """
+    Converte "extract_elements=local>openai,build_query=openai" em
+    {"extract_elements": ["local", "openai"], "build_query": ["openai"]}
+    """
+    routes = {}
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        stage_name, _, chain = item.partition("=")
+        routes[stage_name.strip()] = [name.strip() for name in chain.split(">") if name.strip()]
+    return routes
+
+
+def parse_backends(spec: str, default_model: str, timeout: Optional[float] = None) -> Dict[str, LLMBackend]:
+    """
+    Backends a partir do JSON de configuração, ex:
+    {"local": {"model": "openai/qwen2.5-7b", "base_url": "http://localhost:8000/v1", "timeout": 5, "max_retries": 0},
+     "openai": {"model": "gpt-4o-mini", "input_cost": 0.15, "output_cost": 0.6}}
+
+    A chave da API de cada backend vem da variável indicada em "api_key_env". Sem
+    configuração, um único backend "openai" com o modelo padrão do agente.
+    """
+    if not spec.strip():
+        return {"openai": LLMBackend("openai", default_model, timeout=timeout)}
+    backends = {}
+    for name, options in json.loads(spec).items():
+        api_key_env = options.get("api_key_env")
+        base_url = options.get("base_url")
+        backends[name] = LLMBackend(
+            name,
+            options.get("model", default_model),
+            base_url=base_url,
+            # Servidores locais costumam ignorar a chave, mas o cliente da OpenAI exige uma
+            api_key=os.getenv(api_key_env) if api_key_env else ("sem-chave" if base_url else None),
+            timeout=options.get("timeout", timeout),
+            temperature=options.get("temperature"),
+            input_cost=float(options["input_cost"]) if "input_cost" in options else None,
+            output_cost=float(options["output_cost"]) if "output_cost" in options else None,
+            max_retries=options.get("max_retries")
+        )
+    return backends
+
+
+def create_router(backends_spec: str, routes_spec: str, default_model: str, default: str = "",
+                  timeout: Optional[float] = None, hedge_percentile: Optional[float] = None,
+                  hedge_min_samples: int = 20) -> LLMRouter:
+    return LLMRouter(parse_backends(backends_spec, default_model, timeout), parse_routes(routes_spec),
+                     default or None, hedge_percentile, hedge_min_samples)
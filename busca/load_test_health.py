@@ -0,0 +1,92 @@
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+from .bench_utils import percentile
+
+# URL base da API
+BASE_URL = "http://127.0.0.1:8000"
+
+TEXTO_EXEMPLO = """Deste modo, nao havendo possibilidade de devolucao em
+dobro do valor correspondente a Tarifa de Cadastro cobrada, que
+seja ao menos devolvido o valor pago em excesso de forma dobrada.
+Vale destacar que, o presente caso esta sendo vedado ao
+consumidor o direito minimo a informacao, sendo esta cobranca
+claramente abusiva."""
+
+
+def summarize(label, latencies):
+    """Imprime p50, p95 e máximo de uma lista de latências (em ms)"""
+    print(f"{label}: n={len(latencies)} p50={statistics.median(latencies):.1f} ms "
+          f"p95={percentile(latencies, 95):.1f} ms max={max(latencies):.1f} ms")
+
+
+async def sample_health(client, base_url, stop_event, interval):
+    """Mede a latência do /health periodicamente até stop_event ser sinalizado"""
+    latencies = []
+    while not stop_event.is_set():
+        start = time.perf_counter()
+        response = await client.get(f"{base_url}/health")
+        response.raise_for_status()
+        latencies.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(interval)
+    return latencies
+
+
+async def call_processar(client, base_url, texto):
+    """Faz uma chamada ao /processar e retorna o status HTTP"""
+    response = await client.post(f"{base_url}/processar", json={"texto": texto})
+    return response.status_code
+
+
+async def run_load_test(base_url, concurrency, interval, timeout):
+    async with httpx.AsyncClient(timeout=timeout, limits=httpx.Limits(max_connections=concurrency + 5)) as client:
+        # Latência do /health sem carga
+        stop = asyncio.Event()
+        baseline_task = asyncio.create_task(sample_health(client, base_url, stop, interval))
+        await asyncio.sleep(interval * 20)
+        stop.set()
+        baseline = await baseline_task
+
+        # Latência do /health com `concurrency` chamadas ao /processar em andamento
+        stop = asyncio.Event()
+        loaded_task = asyncio.create_task(sample_health(client, base_url, stop, interval))
+        start = time.perf_counter()
+        statuses = await asyncio.gather(
+            *(call_processar(client, base_url, TEXTO_EXEMPLO) for _ in range(concurrency)),
+            return_exceptions=True
+        )
+        elapsed = time.perf_counter() - start
+        stop.set()
+        loaded = await loaded_task
+
+    print(f"\n=== /processar: {concurrency} chamadas simultâneas em {elapsed:.1f} s ===")
+    ok = sum(1 for status in statuses if status == 200)
+    print(f"Respostas 200: {ok}/{concurrency}")
+
+    print("\n=== Latência do /health ===")
+    summarize("Sem carga", baseline)
+    summarize("Com carga", loaded)
+
+    # O /health deve continuar respondendo rápido, mesmo com o LLM e a busca em andamento
+    ratio = percentile(loaded, 95) / max(percentile(baseline, 95), 1.0)
+    print(f"\nRazao p95 com carga / sem carga: {ratio:.2f}")
+    return ratio
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Teste de carga: latência do /health com /processar em andamento")
+    parser.add_argument("--url", default=BASE_URL, help="URL base da API")
+    parser.add_argument("--concorrencia", type=int, default=50, help="Chamadas simultâneas ao /processar")
+    parser.add_argument("--intervalo", type=float, default=0.05, help="Intervalo entre amostras do /health (s)")
+    parser.add_argument("--timeout", type=float, default=300.0, help="Timeout de cada chamada (s)")
+    parser.add_argument("--limite", type=float, default=5.0, help="Razão máxima aceitável entre os p95")
+    args = parser.parse_args()
+
+    ratio = asyncio.run(run_load_test(args.url, args.concorrencia, args.intervalo, args.timeout))
+    if ratio > args.limite:
+        raise SystemExit(f"FALHOU: o /health ficou {ratio:.1f}x mais lento sob carga")
+    print("OK: latência do /health estável sob carga")
@@ -0,0 +1,93 @@
+import argparse
+import json
+import sys
+
+from . import config
+from .documents import make_snippet
+from .pipeline import OUTPUT_FORMATS, Pipeline
+from .prompts import PROMPT_VARIANTS
+
+# Texto jurídico de exemplo, processado quando nenhum texto é informado
+TEXTO_EXEMPLO = """
+Deste modo, nao havendo possibilidade de devolucao em
+dobro do valor correspondente a Tarifa de Cadastro cobrada, que
+seja ao menos devolvido o valor pago em excesso de forma dobrada.
+Vale destacar que, o presente caso esta sendo vedado ao
+consumidor o direito minimo a informacao, sendo esta cobranca
+claramente abusiva, tendo em vista que exige vantagem
+manifestamente excessiva, ja que no contrato a fonte da letra nao
+respeita a previsao legal, tornando mais dificultoso a leitura de
+clausulas e valores, bem como a cobranca por servico que nao se
+sabe o que e e que nao fora utilizado pelo consumidor.
+"""
+
+
+def process_legal_text(texto: str, pipeline: Pipeline, limit: int = 5, search: bool = True, expansion: int = 0) -> None:
+    """
+    Processa um texto jurídico pelo mesmo pipeline da API:
+    1. KeywordExtractionAgent: gera a query (no formato de saída do pipeline)
+    2. LegalSearchAgent: faz a busca nos tribunais roteados (com as queries alternativas, se pedidas)
+    """
+    print("\n=== Processando texto juridico ===")
+
+    print(f"\n1. Gerando query ({pipeline.output.name})...")
+    if not search:
+        print(json.dumps(pipeline.extract(texto, expansion=expansion), ensure_ascii=False, indent=2))
+        return
+    result = pipeline.run(texto, limit=limit, expansion=expansion)
+
+    query = result.get("query_estruturada")
+    if query is not None:
+        print("\nQuery estruturada gerada:")
+        print(f"Tribunal: {query['tribunal'] or '-'}")
+        print(f"Área do Direito: {query['area_direito']}")
+        print(f"Conceitos-chave: {', '.join(query['conceitos_chave'])}")
+        print(f"Situação: {query['situacao']}")
+        print(f"Query principal: {query['query_text']}")
+    else:
+        print(f"\nQuery gerada: {result['query']}")
+    for alternative in (query or {}).get("queries_alternativas") or []:
+        print(f"Query alternativa: {alternative}")
+
+    print(f"\n2. Busca em {result['tribunal'] or ', '.join(result['tribunais'] or {})}...")
+    if result["resultados"]:
+        print("\nResultados encontrados:")
+        for idx, item in enumerate(result["resultados"], 1):
+            print(f"\nResultado {idx}:")
+            print(f"ID: {item.get('id_documento')}")
+            print(f"Ministro Relator: {item.get('ministroRelator')}")
+            print(f"Ementa: {make_snippet(item.get('ementa') or '', 200)}")  # Mostra apenas o início da ementa
+    else:
+        print("\nNenhum resultado encontrado.")
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Gera a query de busca de um texto jurídico e busca a jurisprudência")
+    parser.add_argument("arquivo", nargs="?",
+                        help="Arquivo com o texto jurídico ('-' lê da entrada padrão; sem arquivo, usa um exemplo)")
+    parser.add_argument("--prompts", default=config.PROMPT_VARIANT, choices=sorted(PROMPT_VARIANTS),
+                        help="Variante de prompt (padrão: PROMPT_VARIANT)")
+    parser.add_argument("--formato", default=config.OUTPUT_FORMAT, choices=sorted(OUTPUT_FORMATS),
+                        help="Formato de saída da query (padrão: OUTPUT_FORMAT)")
+    parser.add_argument("--modo", default=config.EXTRACTION_MODE, choices=["two_pass", "single_pass"],
+                        help="Modo de extração (padrão: EXTRACTION_MODE)")
+    parser.add_argument("--limite", type=int, default=5, help="Resultados da busca")
+    parser.add_argument("--consultas-alternativas", type=int, default=config.QUERY_EXPANSION,
+                        help="Queries alternativas geradas e buscadas junto com a principal (padrão: QUERY_EXPANSION)")
+    parser.add_argument("--sem-busca", action="store_true", help="Apenas gera a query, sem buscar a jurisprudência")
+    args = parser.parse_args(argv)
+
+    if args.arquivo == "-":
+        texto = sys.stdin.read()
+    elif args.arquivo:
+        with open(args.arquivo, encoding="utf-8") as f:
+            texto = f.read()
+    else:
+        texto = TEXTO_EXEMPLO
+
+    pipeline = Pipeline.from_config(args.prompts, args.formato, args.modo)
+    process_legal_text(texto, pipeline, args.limite, not args.sem_busca, args.consultas_alternativas)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+import contextvars
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, Optional
+
+from prometheus_client import Counter, Gauge, Histogram
+
+# Faixas dos histogramas de latência (s): chamadas ao LLM e buscas levam de dezenas de ms a dezenas de s
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+
+STAGE_SECONDS = Histogram(
+    "busca_etapa_segundos",
+    "Duração de cada etapa do pipeline",
+    ["etapa"],
+    buckets=LATENCY_BUCKETS
+)
+LLM_TOKENS = Counter(
+    "busca_llm_tokens_total",
+    "Tokens consumidos nas chamadas ao LLM",
+    ["tipo"]
+)
+HTTP_RESPONSES = Counter(
+    "busca_http_respostas_total",
+    "Respostas recebidas dos backends HTTP, por status (erro_conexao quando não houve resposta)",
+    ["backend", "status"]
+)
+HTTP_SECONDS = Histogram(
+    "busca_http_segundos",
+    "Latência das chamadas HTTP aos backends, incluindo retentativas",
+    ["backend"],
+    buckets=LATENCY_BUCKETS
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "busca_requisicoes_em_andamento",
+    "Requisições HTTP em andamento na API"
+)
+PIPELINES_IN_FLIGHT = Gauge(
+    "busca_pipelines_em_andamento",
+    "Pipelines (extração + busca) em andamento, incluindo os que aguardam vaga, lotes e jobs"
+)
+PREPROCESS_TOKENS_SAVED = Counter(
+    "busca_preprocessamento_tokens_economizados",
+    "Tokens deixados fora dos prompts pelo pré-processamento do texto (estimativa)"
+)
+JSON_PARSE_FAILURES = Counter(
+    "busca_json_falhas",
+    "Respostas do LLM sem JSON válido no esquema esperado, por motivo",
+    ["motivo"]
+)
+JSON_REPAIRS = Counter(
+    "busca_json_reparos",
+    "Chamadas de reparo do JSON feitas ao LLM, por resultado",
+    ["resultado"]
+)
+LLM_CALLS = Counter(
+    "busca_llm_chamadas",
+    "Chamadas a cada backend de LLM, por resultado (fallback quando a chamada passou ao próximo backend)",
+    ["backend", "resultado"]
+)
+LLM_CALL_SECONDS = Histogram(
+    "busca_llm_segundos",
+    "Latência das chamadas a cada backend de LLM",
+    ["backend"],
+    buckets=LATENCY_BUCKETS
+)
+LLM_COST = Counter(
+    "busca_llm_custo_dolares",
+    "Custo estimado das chamadas a cada backend de LLM (preços configurados por milhão de tokens)",
+    ["backend"]
+)
+LLM_HEDGES = Counter(
+    "busca_llm_duplicatas",
+    "Chamadas duplicadas (hedge) disparadas após o atraso do percentil, por vencedor",
+    ["backend", "vencedor"]
+)
+DEGRADATIONS = Counter(
+    "busca_degradacoes",
+    "Degradações aplicadas por falta de orçamento de latência, por tipo",
+    ["tipo"]
+)
+EXTRACTED_FILTERS = Counter(
+    "busca_filtros_extraidos",
+    "Filtros extraídos do texto, por origem (texto ou llm) e status (aplicado ou descartado)",
+    ["origem", "status"]
+)
+JOB_WAIT_SECONDS = Histogram(
+    "busca_job_espera_segundos",
+    "Tempo que os jobs aguardam na fila até um worker começar a executá-los",
+    buckets=LATENCY_BUCKETS
+)
+
+# Tempos das etapas da requisição atual (ms), preenchidos por stage()
+_request_timings: contextvars.ContextVar[Optional[Dict[str, float]]] = contextvars.ContextVar(
+    "request_timings", default=None
+)
+
+# Contadores da requisição atual (ex: tokens economizados no pré-processamento)
+_request_counters: contextvars.ContextVar[Optional[Dict[str, int]]] = contextvars.ContextVar(
+    "request_counters", default=None
+)
+
+
+def start_request_timings() -> Dict[str, float]:
+    """Inicia a coleta dos tempos por etapa (e dos contadores) para a requisição (tarefa) atual"""
+    timings: Dict[str, float] = {}
+    _request_timings.set(timings)
+    _request_counters.set({})
+    return timings
+
+
+def current_request_timings() -> Optional[Dict[str, float]]:
+    """Tempos por etapa coletados na requisição atual, ou None fora de uma requisição"""
+    return _request_timings.get()
+
+
+def current_request_counters() -> Optional[Dict[str, int]]:
+    """Contadores da requisição atual, ou None fora de uma requisição"""
+    return _request_counters.get()
+
+
+def observe_stage(name: str, seconds: float, detail: Optional[str] = None) -> None:
+    """Registra a duração de uma etapa no histograma e nos tempos da requisição atual"""
+    STAGE_SECONDS.labels(name).observe(seconds)
+    timings = _request_timings.get()
+    if timings is not None:
+        key = f"{name}.{detail}" if detail else name
+        timings[key] = round(timings.get(key, 0.0) + seconds * 1000, 2)
+
+
+@contextmanager
+def stage(name: str, detail: Optional[str] = None) -> Iterator[None]:
+    """
+    Mede a duração de uma etapa do pipeline: registra no histograma da etapa e,
+    dentro de uma requisição, soma o tempo em `name` (ou `name.detail`) nos tempos da requisição
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(name, time.perf_counter() - start, detail)
+
+
+def record_tokens_saved(saved: int) -> None:
+    """Soma os tokens economizados pelo pré-processamento no contador e na requisição atual"""
+    PREPROCESS_TOKENS_SAVED.inc(saved)
+    counters = _request_counters.get()
+    if counters is not None:
+        counters["tokens_economizados"] = counters.get("tokens_economizados", 0) + saved
+
+
+def server_timing_header(timings: Dict[str, float]) -> str:
+    """Formata os tempos por etapa no cabeçalho padrão Server-Timing"""
+    return ", ".join(f"{name};dur={duration}" for name, duration in timings.items())
+
+
+class StateCollector:
+    """
+    Coletor chamado a cada leitura do /metrics, para exportar contadores que já
+    são mantidos pelos próprios componentes (caches, pools de agentes, fila de jobs)
+    """
+
+    def __init__(self, collect: Callable[[], Iterable]):
+        self._collect = collect
+
+    def collect(self) -> Iterable:
+        return self._collect()
@@ -0,0 +1,525 @@
+import asyncio
+import contextvars
+from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager, contextmanager
+from functools import partial
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple, Union
+
+from . import config
+from .agent_busca import TRIBUNAL_COLLECTIONS, LegalSearchAgent, expansion_status
+from .agent_pool import AgentPool
+from .agent_query import KeywordExtractionAgent
+from .cache import create_cache
+from .deadline import current_deadline, use_deadline
+from .filters import FilterExtractor, merge_filters, to_client_format, validate_extracted
+from .fusion import fuse_expanded_results, reciprocal_rank_fusion
+from .metrics import EXTRACTED_FILTERS, stage
+from .prompts import PromptVariant
+from .rerank import HybridReranker
+from .routing import TribunalRouter
+from .search_cache import SearchCache, parse_tribunal_ttls
+
+
+class OutputFormat(ABC):
+    """Forma em que o resultado da extração é entregue (estratégia escolhida por chamada)"""
+
+    name = ""
+    # Campo da resposta da API com o resultado ("query" sempre traz a query em texto)
+    field = "query"
+
+    @abstractmethod
+    def render(self, query: str, elements: Optional[Dict] = None, alternatives: Optional[List[str]] = None,
+               hints: Optional[Dict] = None) -> Any:
+        """
+        Args:
+            query: Query principal
+            elements: Elementos extraídos do texto (None quando a query veio do início do texto)
+            alternatives: Queries alternativas (None sem busca expandida)
+            hints: Período e relator devolvidos pelo LLM (None sem extração de filtros)
+        """
+        ...
+
+
+class QueryFormat(OutputFormat):
+    """Apenas a query, em texto simples"""
+
+    name = "query"
+
+    def render(self, query: str, elements: Optional[Dict] = None, alternatives: Optional[List[str]] = None,
+               hints: Optional[Dict] = None) -> str:
+        return query
+
+
+class StructuredFormat(OutputFormat):
+    """
+    Query estruturada: query_text com tribunal, área do direito, conceitos-chave e situação
+    (e as queries_alternativas e os filtros, quando pedidos)
+    """
+
+    name = "estruturada"
+    field = "query_estruturada"
+
+    def render(self, query: str, elements: Optional[Dict] = None, alternatives: Optional[List[str]] = None,
+               hints: Optional[Dict] = None) -> Dict:
+        elements = elements or {}
+        result = {
+            "query_text": query,
+            "tribunal": elements.get("tribunal", ""),
+            "area_direito": elements.get("area_direito", ""),
+            "conceitos_chave": elements.get("conceitos_chave", []),
+            "situacao": elements.get("situacao", ""),
+        }
+        if alternatives is not None:
+            result["queries_alternativas"] = alternatives
+        if hints is not None:
+            result["filtros"] = hints
+        return result
+
+
+# Formatos disponíveis, pelo nome usado na configuração e nas requisições
+OUTPUT_FORMATS: Dict[str, OutputFormat] = {output.name: output for output in (QueryFormat(), StructuredFormat())}
+
+
+def get_output_format(name: str) -> OutputFormat:
+    if name not in OUTPUT_FORMATS:
+        raise ValueError(f"Formato de saída desconhecido: {name} (use {', '.join(OUTPUT_FORMATS)})")
+    return OUTPUT_FORMATS[name]
+
+
+def create_search_cache() -> Optional[SearchCache]:
+    """Cache de buscas configurado pelas variáveis SEARCH_CACHE_* (None quando desligado)"""
+    if not config.SEARCH_CACHE_ENABLED:
+        return None
+    return SearchCache(
+        max_items=config.SEARCH_CACHE_SIZE,
+        default_ttl=config.SEARCH_CACHE_TTL,
+        stale_ttl=config.SEARCH_CACHE_STALE_TTL,
+        tribunal_ttls=parse_tribunal_ttls(config.SEARCH_CACHE_TRIBUNAL_TTLS)
+    )
+
+
+def create_reranker() -> Optional[HybridReranker]:
+    """Reordenação local configurada pelas variáveis RERANK_* (None quando desligada)"""
+    if not config.RERANK_ENABLED:
+        return None
+    return HybridReranker(
+        candidates=config.RERANK_CANDIDATES,
+        lexical_weight=config.RERANK_LEXICAL_WEIGHT,
+        dense_weight=config.RERANK_DENSE_WEIGHT,
+        concept_boost=config.RERANK_CONCEPT_BOOST,
+        area_boost=config.RERANK_AREA_BOOST,
+        dense_query_type=config.RERANK_DENSE_QUERY_TYPE,
+        dense_retry_after=config.RERANK_DENSE_RETRY
+    )
+
+
+def create_filter_extractor() -> FilterExtractor:
+    """Extração dos filtros pedidos no texto, configurada pelas variáveis FILTER_*"""
+    return FilterExtractor(
+        date_field=config.FILTER_DATE_FIELD,
+        relator_field=config.FILTER_RELATOR_FIELD,
+        utc_offset=config.FILTER_UTC_OFFSET
+    )
+
+
+class Pipeline:
+    """
+    Pipeline de um texto: filtros pedidos no texto, extração da query pelo
+    KeywordExtractionAgent e busca pelo LegalSearchAgent, com a variante de prompt e o
+    formato de saída escolhidos na criação ou por chamada. É o mesmo pipeline na API
+    (agentes do CrewAI construídos na inicialização, pool de agentes de busca e executor
+    dedicado às chamadas ao LLM, pelas entradas assíncronas),
+    no CLI e nos benchmarks (um agente de cada, pelas entradas síncronas).
+    """
+
+    def __init__(self, extractor: Union[KeywordExtractionAgent, AgentPool, None] = None,
+                 search_agent: Union[LegalSearchAgent, AgentPool, None] = None,
+                 prompts: Union[str, PromptVariant] = "busca", output: str = "query", executor=None,
+                 filter_extractor: Optional[FilterExtractor] = None, catalog=None,
+                 router: Optional[TribunalRouter] = None):
+        """
+        Args:
+            extractor: Agente de extração ou pool de agentes (default: um agente com `prompts`)
+            search_agent: Agente de busca ou pool de agentes (default: um agente sem cache)
+            prompts: Variante de prompt padrão
+            output: Formato de saída padrão
+            executor: Executor das chamadas bloqueantes ao LLM (default: o do event loop)
+            filter_extractor: Extração dos filtros pedidos no texto (None = sem filtros extraídos)
+            catalog: Catálogo de tribunais, usado na validação dos filtros extraídos
+            router: Roteamento de tribunais, cujos nomes são reconhecidos nos filtros do texto
+        """
+        # Os agentes não importam o CrewAI na criação: só a primeira etapa que chama o LLM o carrega
+        self.router = router or TribunalRouter(TRIBUNAL_COLLECTIONS, catalog,
+                                               max_tribunals=config.TRIBUNAL_ROUTING_MAX)
+        self.extractor = extractor or KeywordExtractionAgent(prompts=prompts)
+        self.search_agent = search_agent or LegalSearchAgent(catalog=catalog, router=self.router)
+        self.prompts = prompts
+        self.output = get_output_format(output)
+        self.executor = executor
+        self.filter_extractor = filter_extractor
+        self.catalog = catalog
+
+    @classmethod
+    def from_config(cls, prompts: Union[str, PromptVariant, None] = None, output: Optional[str] = None,
+                    mode: Optional[str] = None) -> "Pipeline":
+        """
+        Pipeline com um agente de cada, configurado pelas mesmas variáveis de ambiente da API
+        (cache de extrações, cache de buscas, reordenação e filtros extraídos do texto)
+        """
+        prompts = prompts or config.PROMPT_VARIANT
+        router = TribunalRouter(TRIBUNAL_COLLECTIONS, max_tribunals=config.TRIBUNAL_ROUTING_MAX)
+        extractor = KeywordExtractionAgent(
+            cache=create_cache(
+                config.EXTRACTION_CACHE_BACKEND,
+                max_items=config.EXTRACTION_CACHE_SIZE,
+                ttl=config.EXTRACTION_CACHE_TTL,
+                path=config.EXTRACTION_CACHE_PATH
+            ),
+            extraction_mode=mode or config.EXTRACTION_MODE,
+            prompts=prompts
+        )
+        search_agent = LegalSearchAgent(search_cache=create_search_cache(), reranker=create_reranker(), router=router)
+        return cls(extractor, search_agent, prompts, output or config.OUTPUT_FORMAT,
+                   filter_extractor=create_filter_extractor(), router=router)
+
+    @staticmethod
+    @asynccontextmanager
+    async def _borrow(source):
+        """Empresta um agente do pool ou, com um agente avulso, usa o próprio agente"""
+        if isinstance(source, AgentPool):
+            async with source.acquire() as agent:
+                yield agent
+        else:
+            yield source
+
+    async def _run_blocking(self, func, *args):
+        """Executa uma função bloqueante (chamadas ao LLM) no executor, sem bloquear o event loop"""
+        loop = asyncio.get_running_loop()
+        # Copia o contexto para que os tempos e o prazo da requisição valham na thread
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(self.executor, partial(context.run, func, *args))
+
+    @staticmethod
+    @contextmanager
+    def _extraction_deadline() -> Iterator[None]:
+        """Prazo da extração: o orçamento da requisição menos o tempo reservado para a busca"""
+        deadline = current_deadline()
+        with use_deadline(deadline.reserve(config.LATENCY_BUDGET_SEARCH_RESERVE) if deadline is not None else None):
+            yield
+
+    def render(self, query: str, elements: Optional[Dict] = None, alternatives: Optional[List[str]] = None,
+               hints: Optional[Dict] = None, output: Optional[str] = None) -> Dict:
+        """
+        Campos da query no formato de saída (padrão: o do pipeline): "query" sempre e, no
+        formato estruturado, também a "query_estruturada"
+        """
+        output_format = get_output_format(output) if output else self.output
+        return {"query": query, output_format.field: output_format.render(query, elements, alternatives, hints)}
+
+    def extract_text_filters(self, text: str, enabled: Optional[bool] = None, multi_tribunal: bool = False) -> Dict:
+        """
+        Filtros pedidos no texto, reconhecidos localmente antes do LLM (que só é consultado
+        sobre os pedidos que as expressões regulares não reconhecem)
+
+        Args:
+            enabled: Extrai os filtros (default: FILTER_EXTRACTION)
+            multi_tribunal: No modo multi-tribunal os tribunais são os do cliente, não os do texto
+
+        Returns:
+            Dict com "filtros", "tribunais" e "pendente" (vazio com a extração desligada)
+        """
+        if enabled is None:
+            enabled = config.FILTER_EXTRACTION
+        if not enabled or self.filter_extractor is None:
+            return {"filtros": [], "tribunais": [], "pendente": False}
+        with stage("filters"):
+            extracted = self.filter_extractor.extract(text, self.router.aliases())
+        if multi_tribunal:
+            extracted["tribunais"] = []
+        return extracted
+
+    def request_filters(self, extracted: Dict, hints: Optional[Dict], filters: Optional[List[Dict]] = None,
+                        tribunais: Optional[List[str]] = None) -> Tuple[List[Dict], List[Dict]]:
+        """
+        Filtros da busca: os do cliente, os reconhecidos no texto e os devolvidos pelo LLM,
+        nessa ordem de prioridade por campo. Os extraídos são validados no catálogo e os
+        inválidos descartados, sem erro.
+
+        Args:
+            extracted: Resultado de extract_text_filters
+            hints: Período e relator devolvidos pelo LLM
+            filters: Filtros do cliente no formato da API
+            tribunais: Tribunais consultados (validação dos filtros extraídos)
+
+        Returns:
+            Tupla (filtros no formato da API, filtros extraídos aplicados no formato dos `filtros`, com a `origem`)
+        """
+        merged = list(filters or [])
+        applied = []
+        if self.filter_extractor is None:
+            return merged, applied
+        for origin, found in (("texto", extracted["filtros"]), ("llm", self.filter_extractor.from_hints(hints))):
+            accepted, _ = validate_extracted(found, self.catalog, tribunais)
+            added = merge_filters(merged, accepted)[len(merged):]
+            EXTRACTED_FILTERS.labels(origin, "aplicado").inc(len(added))
+            EXTRACTED_FILTERS.labels(origin, "descartado").inc(len(found) - len(added))
+            merged.extend(added)
+            applied.extend(to_client_format(added, origin))
+        return merged, applied
+
+    async def extract_async(self, text: str, prompts: Union[str, PromptVariant, None] = None, expansion: int = 0,
+                            use_cache: bool = True, mode: Optional[str] = None,
+                            filters: bool = False) -> Tuple[List[str], Optional[Dict], Dict]:
+        """
+        Extrai as queries do texto (a chamada ao LLM roda no executor, dentro do prazo da extração)
+
+        Returns:
+            Tupla (queries, elementos, filtros devolvidos pelo LLM), como KeywordExtractionAgent.extract_queries
+        """
+        async with self._borrow(self.extractor) as extractor:
+            with self._extraction_deadline():
+                result = await self._run_blocking(extractor.extract_queries, text, expansion, use_cache, mode,
+                                                  filters, prompts or self.prompts)
+        return result
+
+    async def iter_extract_async(self, text: str, prompts: Union[str, PromptVariant, None] = None,
+                                 expansion: int = 0, use_cache: bool = True, mode: Optional[str] = None,
+                                 filters: bool = False) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Etapas da extração assim que ficam prontas, como KeywordExtractionAgent.iter_extraction
+        (cada etapa, uma chamada ao LLM, roda no executor)
+        """
+        async with self._borrow(self.extractor) as extractor:
+            with self._extraction_deadline():
+                steps = extractor.iter_extraction(text, use_cache, mode, expansion, filters, prompts or self.prompts)
+                while True:
+                    step = await self._run_blocking(next, steps, None)
+                    if step is None:
+                        break
+                    yield step
+
+    @staticmethod
+    def _route(search_agent: LegalSearchAgent, query: str, elements: Optional[Dict],
+               requested: Optional[List[str]]) -> List[str]:
+        """
+        Tribunais consultados fora do modo multi-tribunal: os pedidos no texto, senão o
+        extraído pelo LLM, senão os citados na query, senão o padrão
+        """
+        return search_agent.route_tribunals(query, (elements or {}).get("tribunal"), requested)
+
+    async def search_async(self, query: str, alternatives: Optional[List[str]] = None,
+                           elements: Optional[Dict] = None, multi_tribunal: bool = False,
+                           tribunais: Optional[List[str]] = None, requested: Optional[List[str]] = None,
+                           limit: int = 5, offset: int = 0, features: Optional[List[str]] = None,
+                           filters: Optional[List[Dict]] = None) -> Optional[Dict]:
+        """
+        Busca nos tribunais roteados ou, no modo multi-tribunal, nos `tribunais` (default: todos
+        os do catálogo). Vários tribunais são consultados em paralelo, com prazo global e fusão
+        dos resultados; com queries alternativas, todas são executadas em paralelo e os
+        resultados combinados. Os elementos extraídos ajustam a reordenação.
+
+        Args:
+            requested: Coleções dos tribunais pedidos no texto (roteamento fora do modo multi-tribunal)
+            limit, offset: Página de resultados
+
+        Returns:
+            Dict com "results" (a página), "tribunal" (a coleção, quando apenas uma foi consultada),
+            e o status de "tribunais" e "consultas" (vários tribunais, busca expandida), ou None sem resposta
+        """
+        async with self._borrow(self.search_agent) as search_agent:
+            if not multi_tribunal:
+                tribunais = self._route(search_agent, query, elements, requested)
+            if alternatives:
+                results = await search_agent.search_expanded_async(
+                    [query, *alternatives],
+                    tribunais=tribunais,
+                    deadline=config.QUERY_EXPANSION_DEADLINE,
+                    limit=limit,
+                    rrf_k=config.RRF_K,
+                    features=features,
+                    offset=offset,
+                    filters=filters,
+                    elements=elements,
+                    max_fanout=config.QUERY_EXPANSION_MAX_FANOUT
+                )
+            elif multi_tribunal or len(tribunais) > 1:
+                results = await search_agent.search_multi_async(
+                    query,
+                    tribunais=tribunais,
+                    deadline=config.SEARCH_DEADLINE,
+                    limit=limit,
+                    rrf_k=config.RRF_K,
+                    features=features,
+                    offset=offset,
+                    filters=filters,
+                    elements=elements
+                )
+            else:
+                results = await search_agent.search_async(query, limit=limit, features=features, offset=offset,
+                                                          filters=filters, elements=elements, tribunal=tribunais[0])
+        if not results:
+            return None
+        tribunal = tribunais[0] if not multi_tribunal and len(tribunais) == 1 else None
+        return {**results, "tribunal": tribunal}
+
+    async def iter_search_async(self, query: str, alternatives: Optional[List[str]] = None,
+                                elements: Optional[Dict] = None, multi_tribunal: bool = False,
+                                tribunais: Optional[List[str]] = None, requested: Optional[List[str]] = None,
+                                limit: int = 5, offset: int = 0, features: Optional[List[str]] = None,
+                                filters: Optional[List[Dict]] = None) -> AsyncIterator[Tuple[str, Dict]]:
+        """
+        Mesma busca de search_async, entregando cada tribunal (e cada query, na busca expandida)
+        assim que responde
+
+        Yields:
+            ("resultados", {"tribunal", "consulta" (busca expandida), "status", "resultados"}) por busca
+            e, por último, ("fim", {"resultados", "tribunal", "tribunais", "consultas" (busca expandida)})
+            com a página dos resultados combinados
+        """
+        async with self._borrow(self.search_agent) as search_agent:
+            if multi_tribunal:
+                deadline = config.SEARCH_DEADLINE
+            else:
+                # Apenas um tribunal: sem prazo; vários: em paralelo, com prazo global e fusão dos resultados
+                tribunais = self._route(search_agent, query, elements, requested)
+                multi_tribunal = len(tribunais) > 1
+                deadline = config.SEARCH_DEADLINE if multi_tribunal else None
+
+            # A API não pagina: cada tribunal devolve as páginas anteriores e a atual, e a página é recortada aqui
+            status = {}
+            statuses = []
+            result_lists = {}
+            if alternatives:
+                async for tribunal, search_query, search_status, results in search_agent.iter_search_expanded_async(
+                    [query, *alternatives], tribunais=tribunais, deadline=config.QUERY_EXPANSION_DEADLINE,
+                    limit=offset + limit, features=features, filters=filters, elements=elements,
+                    max_fanout=config.QUERY_EXPANSION_MAX_FANOUT
+                ):
+                    statuses.append((tribunal, search_query, search_status))
+                    if search_status == "ok":
+                        result_lists[(tribunal, search_query)] = results
+                    yield "resultados", {"tribunal": tribunal, "consulta": search_query, "status": search_status,
+                                         "resultados": results[offset:]}
+            else:
+                async for tribunal, tribunal_status, results in search_agent.iter_search_multi_async(
+                    query, tribunais=tribunais, deadline=deadline, limit=offset + limit, features=features,
+                    filters=filters, elements=elements
+                ):
+                    status[tribunal] = tribunal_status
+                    if tribunal_status == "ok":
+                        result_lists[tribunal] = results
+                    yield "resultados", {"tribunal": tribunal, "status": tribunal_status,
+                                         "resultados": results[offset:]}
+
+        if alternatives:
+            status, query_status = expansion_status([query, *alternatives], statuses)
+            fused = fuse_expanded_results(result_lists, k=config.RRF_K, limit=offset + limit)[offset:]
+            yield "fim", {"resultados": fused, "tribunal": None, "tribunais": status, "consultas": query_status}
+        elif multi_tribunal:
+            fused = reciprocal_rank_fusion(result_lists, k=config.RRF_K, limit=offset + limit)[offset:]
+            yield "fim", {"resultados": fused, "tribunal": None, "tribunais": status}
+        else:
+            tribunal, results = next(iter(result_lists.items()), (None, []))
+            yield "fim", {"resultados": results[offset:], "tribunal": tribunal, "tribunais": None}
+
+    async def run_async(self, text: str, prompts: Union[str, PromptVariant, None] = None,
+                        output: Optional[str] = None, limit: int = 5, offset: int = 0, expansion: int = 0,
+                        use_cache: bool = True, mode: Optional[str] = None, multi_tribunal: bool = False,
+                        tribunais: Optional[List[str]] = None, features: Optional[List[str]] = None,
+                        filters: Optional[List[Dict]] = None, extract_filters: Optional[bool] = None) -> Dict:
+        """
+        Executa o pipeline completo de um texto: filtros do texto, extração da query e busca
+
+        Args:
+            prompts, output: Variante de prompt e formato de saída (default: os do pipeline)
+            limit, offset: Página de resultados
+            expansion: Queries alternativas pedidas ao LLM
+            use_cache: Reaproveita extrações anteriores do mesmo texto
+            mode: Modo de extração (default: o do agente)
+            multi_tribunal, tribunais: Consulta os tribunais informados (default: todos) em paralelo
+            features: Metadados de cada resultado (default: os do tribunal)
+            filters: Filtros do cliente no formato da API
+            extract_filters: Aplica os filtros pedidos no texto (default: FILTER_EXTRACTION)
+
+        Returns:
+            Dict com os campos da query no formato de saída, os "resultados" da página, o "tribunal"
+            (quando apenas um foi consultado), o status de "tribunais" e "consultas" e os "filtros_extraidos"
+        """
+        extracted = self.extract_text_filters(text, extract_filters, multi_tribunal)
+        llm_filters = config.FILTER_EXTRACTION_LLM and extracted["pendente"]
+        queries, elements, hints = await self.extract_async(text, prompts, expansion, use_cache, mode, llm_filters)
+        query, alternatives = queries[0], queries[1:]
+        search_filters, applied = self.request_filters(extracted, hints, filters,
+                                                       tribunais if multi_tribunal else extracted["tribunais"] or None)
+        fields = self.render(query, elements, alternatives if expansion else None, hints if llm_filters else None,
+                             output)
+
+        results = await self.search_async(query, alternatives, elements, multi_tribunal, tribunais,
+                                          extracted["tribunais"], limit, offset, features, search_filters) or {}
+        return {
+            **fields,
+            "resultados": results.get('results', []),
+            "tribunal": results.get('tribunal'),
+            "tribunais": results.get('tribunais'),
+            "consultas": results.get('consultas'),
+            "filtros_extraidos": applied or None
+        }
+
+    async def stream_async(self, text: str, prompts: Union[str, PromptVariant, None] = None,
+                           output: Optional[str] = None, limit: int = 5, offset: int = 0, expansion: int = 0,
+                           use_cache: bool = True, mode: Optional[str] = None, multi_tribunal: bool = False,
+                           tribunais: Optional[List[str]] = None, features: Optional[List[str]] = None,
+                           filters: Optional[List[Dict]] = None,
+                           extract_filters: Optional[bool] = None) -> AsyncIterator[Tuple[str, Dict]]:
+        """
+        Executa o pipeline de run_async entregando cada etapa assim que fica pronta
+
+        Yields:
+            (evento, dados) com evento "elementos", "query", "resultados" e "fim" (como em
+            iter_search_async) ou, quando a extração termina sem query, "erro"
+        """
+        extracted = self.extract_text_filters(text, extract_filters, multi_tribunal)
+        llm_filters = config.FILTER_EXTRACTION_LLM and extracted["pendente"]
+        elements = None
+        query = None
+        alternatives = []
+        hints = {}
+        async for step_name, value in self.iter_extract_async(text, prompts, expansion, use_cache, mode, llm_filters):
+            if step_name == "elementos":
+                elements = value
+                yield "elementos", value
+            elif step_name == "filtros":
+                hints = value
+            elif step_name == "consultas":
+                alternatives = value
+            elif step_name == "query":
+                query = value
+                search_filters, applied = self.request_filters(
+                    extracted, hints, filters, tribunais if multi_tribunal else extracted["tribunais"] or None
+                )
+                event = self.render(query, elements, alternatives if expansion else None,
+                                    hints if llm_filters else None, output)
+                if expansion:
+                    event["consultas_alternativas"] = alternatives
+                if applied:
+                    event["filtros_extraidos"] = applied
+                yield "query", event
+
+        # Sem query não há o que buscar: encerra com um evento de erro
+        if query is None:
+            yield "erro", {"detalhe": "Erro no processamento: a extração terminou sem gerar a query"}
+            return
+
+        async for event in self.iter_search_async(query, alternatives, elements, multi_tribunal, tribunais,
+                                                  extracted["tribunais"], limit, offset, features, search_filters):
+            yield event
+
+    def extract(self, text: str, prompts: Union[str, PromptVariant, None] = None, output: Optional[str] = None,
+                expansion: int = 0, use_cache: bool = True, mode: Optional[str] = None) -> Dict:
+        """Versão síncrona da extração: campos da query no formato de saída (padrão: o do pipeline)"""
+        queries, elements, _ = asyncio.run(self.extract_async(text, prompts, expansion, use_cache, mode))
+        return self.render(queries[0], elements, queries[1:] if expansion else None, output=output)
+
+    def run(self, text: str, **options) -> Dict:
+        """Versão síncrona de run_async, para o CLI e scripts (mesmas opções)"""
+        return asyncio.run(self.run_async(text, **options))
@@ -0,0 +1,226 @@
+import math
+import re
+import threading
+from collections import Counter
+from typing import Dict, List
+
+from .lexical import stem, strip_accents, tokenize
+
+# Termos que indicam trechos juridicamente relevantes (comparados pelo radical)
+LEGAL_TERMS = frozenset(stem(word) for word in """
+art artigo lei sumula stj stf cdc codigo constituicao inconstitucional jurisprudencia precedente
+dano moral material indenizacao abusiva abusivo ilegal ilegalidade nulidade nula clausula contrato
+cobranca devolucao repeticao indebito consumidor fornecedor responsabilidade prescricao decadencia
+pedido requer condenacao tutela liminar direito violacao onerosidade vantagem excessiva
+""".split())
+
+# Abreviações seguidas de ponto que não encerram a frase
+ABBREVIATIONS = frozenset("art arts inc n no nº fls fl dr dra sr sra min rel res p pg pag cf ex obs vs".split())
+
+# Linhas curtas de cabeçalho, fecho e assinatura (comparadas sem acentos e em minúsculas)
+BOILERPLATE_PATTERNS = [re.compile(pattern) for pattern in (
+    r"^(excelentissim|exm|ilustrissim|ilm|meritissim|ao (douto |d\. )?juiz|a (douta |d\. )?vara)",
+    r"^(processo|autos|proc\.)\s*(n|no|nº|numero)\b",
+    r"^(termos em que|nestes termos|neste termos|pede deferimento|p\. deferimento|e\. deferimento)",
+    r"\boab\b",
+    r"^(advogad[oa]s?|procurador[a]?)\b",
+    r"^[\w\s.-]+,\s*\d{1,2}\s+de\s+\w+\s+de\s+\d{4}\.?$",
+    r"^(pagina|pag\.|fls?\.)\s*\d+",
+    r"^[\d\s/_.-]*$",
+)]
+BOILERPLATE_MAX_LENGTH = 160
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimativa de tokens (cerca de 4 caracteres por token no português)"""
+    return math.ceil(len(text) / 4)
+
+
+def clean_text(text: str) -> str:
+    """
+    Junta palavras hifenizadas na quebra de linha, remove linhas de cabeçalho,
+    fecho e assinatura e colapsa os espaços
+    """
+    text = re.sub(r"(\w)-[ \t]*\r?\n[ \t]*(\w)", r"\1\2", text)
+    lines = []
+    for line in text.splitlines():
+        normalized = strip_accents(line).strip().lower()
+        if len(normalized) <= BOILERPLATE_MAX_LENGTH and any(
+                pattern.search(normalized) for pattern in BOILERPLATE_PATTERNS):
+            continue
+        lines.append(line)
+    return re.sub(r"\s+", " ", " ".join(lines)).strip()
+
+
+def split_sentences(text: str) -> List[str]:
+    """Divide o texto em frases, sem quebrar em abreviações como "art." e "fls." """
+    sentences: List[str] = []
+    for piece in re.split(r"(?<=[.;!?])\s+", text):
+        previous_word = sentences[-1].rsplit(" ", 1)[-1].rstrip(".").lower() if sentences else ""
+        if sentences and (previous_word in ABBREVIATIONS or not piece[:1].isalpha() and piece[:1] not in "\"“("):
+            sentences[-1] = f"{sentences[-1]} {piece}"
+        elif piece:
+            sentences.append(piece)
+    return sentences
+
+
+def score_sentences(sentences: List[str]) -> List[float]:
+    """
+    Relevância de cada frase: centralidade (frequência no documento dos termos
+    da frase) somada à quantidade de termos jurídicos que ela contém
+    """
+    tokens = [set(tokenize(sentence)) for sentence in sentences]
+    frequencies = Counter(token for sentence_tokens in tokens for token in sentence_tokens)
+    top = max(frequencies.values(), default=1)
+    scores = []
+    for sentence_tokens in tokens:
+        if not sentence_tokens:
+            scores.append(0.0)
+            continue
+        centrality = sum(frequencies[token] for token in sentence_tokens) / (len(sentence_tokens) * top)
+        scores.append(centrality + 0.5 * len(sentence_tokens & LEGAL_TERMS))
+    return scores
+
+
+def select_salient(sentences: List[str], budget: int) -> List[str]:
+    """Frases mais relevantes que cabem no orçamento de tokens, na ordem original"""
+    scores = score_sentences(sentences)
+    chosen = set()
+    used = 0
+    for index in sorted(range(len(sentences)), key=lambda i: scores[i], reverse=True):
+        tokens = estimate_tokens(sentences[index]) + 1
+        if used + tokens <= budget:
+            chosen.add(index)
+            used += tokens
+    if not chosen:
+        # Nenhuma frase cabe sozinha: corta a mais relevante no orçamento
+        best = max(range(len(sentences)), key=lambda i: scores[i])
+        return [sentences[best][:budget * 4]]
+    return [sentences[index] for index in sorted(chosen)]
+
+
+def split_chunks(sentences: List[str], chunk_tokens: int) -> List[str]:
+    """Agrupa frases consecutivas em trechos de até `chunk_tokens` tokens"""
+    chunks: List[str] = []
+    current: List[str] = []
+    used = 0
+    for sentence in sentences:
+        tokens = estimate_tokens(sentence) + 1
+        if current and used + tokens > chunk_tokens:
+            chunks.append(" ".join(current))
+            current, used = [], 0
+        current.append(sentence)
+        used += tokens
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+def merge_elements(elements_list: List[Dict], max_concepts: int = 6) -> Dict:
+    """
+    Junta os elementos extraídos de cada trecho: área do direito mais frequente,
+    conceitos ordenados pela quantidade de trechos em que aparecem, primeiro
+    tribunal citado e as situações distintas
+    """
+    areas = Counter(elements.get("area_direito") for elements in elements_list if elements.get("area_direito"))
+    concepts: Counter = Counter()
+    forms: Dict[str, str] = {}
+    for elements in elements_list:
+        for concept in elements.get("conceitos_chave") or []:
+            key = strip_accents(concept).strip().lower()
+            forms.setdefault(key, concept.strip())
+            concepts[key] += 1
+    situations = list(dict.fromkeys(
+        elements["situacao"].strip() for elements in elements_list if elements.get("situacao")
+    ))
+
+    merged = {
+        "area_direito": areas.most_common(1)[0][0] if areas else "",
+        # most_common mantém a ordem de inserção nos empates, preservando a ordem do documento
+        "conceitos_chave": [forms[key] for key, _ in concepts.most_common(max_concepts)],
+        "situacao": "; ".join(situations),
+    }
+    if any("tribunal" in elements for elements in elements_list):
+        merged["tribunal"] = next((elements["tribunal"] for elements in elements_list if elements.get("tribunal")), "")
+    return merged
+
+
+class PreparedText:
+    """Texto pronto para o prompt: inteiro, resumido ao orçamento ou dividido em trechos"""
+
+    def __init__(self, text: str, chunks: List[str], original_tokens: int):
+        self.text = text
+        self.chunks = chunks
+        self.original_tokens = original_tokens
+        self.sent_tokens = sum(estimate_tokens(chunk) for chunk in chunks) if chunks else estimate_tokens(text)
+
+    @property
+    def tokens_saved(self) -> int:
+        return max(self.original_tokens - self.sent_tokens, 0)
+
+
+class Preprocessor:
+    """
+    Pré-processamento local do texto antes do prompt: limpeza, seleção das
+    frases mais relevantes dentro do orçamento de tokens e, para documentos
+    muito longos, divisão em trechos extraídos em paralelo
+    """
+
+    def __init__(self, token_budget: int = 1500, chunk_threshold: int = 6000, chunk_tokens: int = 1500,
+                 max_chunks: int = 8):
+        self.token_budget = token_budget
+        self.chunk_threshold = chunk_threshold
+        self.chunk_tokens = chunk_tokens
+        self.max_chunks = max_chunks
+        self._lock = threading.Lock()
+        self.documents = 0
+        self.trimmed = 0
+        self.chunked = 0
+        self.original_tokens = 0
+        self.sent_tokens = 0
+
+    def prepare(self, text: str) -> PreparedText:
+        """
+        Returns:
+            PreparedText com o texto limpo (e resumido se passar do orçamento) ou,
+            acima de `chunk_threshold` tokens, com os trechos a extrair separadamente
+        """
+        original_tokens = estimate_tokens(text)
+        cleaned = clean_text(text) or text.strip()
+        tokens = estimate_tokens(cleaned)
+        chunks: List[str] = []
+        trimmed = chunked = False
+
+        if tokens > self.chunk_threshold:
+            sentences = split_sentences(cleaned)
+            if tokens > self.chunk_tokens * self.max_chunks:
+                sentences = select_salient(sentences, self.chunk_tokens * self.max_chunks)
+                trimmed = True
+            chunks = split_chunks(sentences, self.chunk_tokens)
+            chunked = True
+        elif tokens > self.token_budget:
+            cleaned = " ".join(select_salient(split_sentences(cleaned), self.token_budget))
+            trimmed = True
+
+        prepared = PreparedText(cleaned, chunks, original_tokens)
+        with self._lock:
+            self.documents += 1
+            self.trimmed += trimmed
+            self.chunked += chunked
+            self.original_tokens += prepared.original_tokens
+            self.sent_tokens += prepared.sent_tokens
+        return prepared
+
+    def stats(self) -> Dict:
+        """Documentos resumidos/divididos e tokens economizados desde o início"""
+        with self._lock:
+            saved = max(self.original_tokens - self.sent_tokens, 0)
+            return {
+                "documentos": self.documents,
+                "resumidos": self.trimmed,
+                "divididos_em_trechos": self.chunked,
+                "tokens_originais": self.original_tokens,
+                "tokens_enviados": self.sent_tokens,
+                "tokens_economizados": saved,
+                "tokens_economizados_por_documento": round(saved / self.documents, 1) if self.documents else 0.0,
+            }
@@ -0,0 +1,429 @@
+from abc import ABC, abstractmethod
+from typing import Dict, List, Tuple
+
+# Cada prompt devolve a descrição e o expected_output da tarefa do CrewAI
+Prompt = Tuple[str, str]
+
+
+class PromptVariant(ABC):
+    """
+    Prompts, persona do agente e temperatura de uma variante do pipeline. A variante é
+    escolhida por chamada: o mesmo agente de extração atende todas, com um LLM do CrewAI
+    por temperatura e agentes separados por persona.
+    """
+
+    name = ""
+    # Incrementar sempre que os prompts forem alterados, para invalidar o cache
+    version = ""
+    # Temperatura das chamadas (faz parte da chave do cache)
+    temperature = 0.2
+    # Se os prompts pedem o tribunal mencionado no texto (campo "tribunal" dos elementos)
+    extracts_tribunal = False
+
+    role = ""
+    goal = ""
+    backstory = ""
+    # Instrução final do prompt de reparo do JSON ("Corrija a resposta e ...")
+    repair_instruction = "responda APENAS com o objeto JSON."
+
+    @abstractmethod
+    def filters(self, filters: bool) -> Tuple[str, str]:
+        """Campo `filtros` do formato JSON e a instrução correspondente (vazios sem `filters`)"""
+        ...
+
+    @abstractmethod
+    def alternatives(self, expansion: int) -> Tuple[str, str]:
+        """Campo `queries_alternativas` do modo em uma etapa e a instrução correspondente (vazios sem `expansion`)"""
+        ...
+
+    @abstractmethod
+    def elements(self, context: str, filters: bool) -> Prompt:
+        """Prompt da primeira etapa: elementos jurídicos do texto"""
+        ...
+
+    @abstractmethod
+    def query(self, elements: Dict) -> Prompt:
+        """Prompt da segunda etapa: query a partir dos elementos"""
+        ...
+
+    @abstractmethod
+    def queries(self, elements: Dict, expansion: int) -> Prompt:
+        """Prompt da segunda etapa com busca expandida: query principal e alternativas"""
+        ...
+
+    @abstractmethod
+    def single_pass(self, context: str, expansion: int, filters: bool) -> Prompt:
+        """Prompt do modo em uma etapa: elementos e query em uma única chamada"""
+        ...
+
+    def repair(self, fields: List[str], detail: str, response: str) -> Prompt:
+        prompt = f"""
+        A resposta abaixo deveria ser um único objeto JSON com os campos {", ".join(fields)},
+        mas houve um problema: {detail}
+
+        Resposta:
+        {response[:4000]}
+
+        Corrija a resposta e {self.repair_instruction}
+        """
+        return prompt, "Objeto JSON corrigido"
+
+
+class BuscaPrompts(PromptVariant):
+    """Prompts curtos do pipeline de busca: query em texto simples, sem o tribunal"""
+
+    name = "busca"
+    version = "busca-v2"
+    temperature = 0.2
+
+    role = 'Especialista jurídico'
+    goal = '''Gerar queries de busca jurisprudencial eficientes a partir de textos jurídicos'''
+    backstory = """Especialista em análise de textos jurídicos e formulação de queries
+                      com foco em termos técnicos e linguagem jurídica adequada."""
+
+    def filters(self, filters: bool) -> Tuple[str, str]:
+        if not filters:
+            return "", ""
+        return (""",
+            "filtros": {"ano_inicial": null, "ano_final": null, "ultimos_anos": null, "relator": null}""",
+                """
+        - Em filtros, preencha apenas o período (ano_inicial, ano_final ou ultimos_anos) e o relator (nome do ministro)
+          que o texto pede para a jurisprudência buscada; use null no que não for pedido e ignore as datas dos fatos
+          e dos precedentes citados""")
+
+    def alternatives(self, expansion: int) -> Tuple[str, str]:
+        if not expansion:
+            return "", ""
+        return (f""",
+            "queries_alternativas": [{", ".join(f'"query alternativa {index}"' for index in range(1, expansion + 1))}]""",
+                f"""
+        - Construa também {expansion} queries alternativas (queries_alternativas), cada uma enfatizando
+          um grupo diferente de conceitos-chave ou usando sinônimos e termos técnicos equivalentes""")
+
+    def elements(self, context: str, filters: bool) -> Prompt:
+        filters_format, filters_instructions = self.filters(filters)
+        prompt = f"""
+        Texto: {context}
+
+        Analise o texto acima e extraia elementos para construir uma busca jurisprudencial eficiente.
+
+        Formato: {{
+            "area_direito": "área específica do direito identificada",
+            "conceitos_chave": ["conceito1", "conceito2", "conceito3", "conceito4", "conceito5"],
+            "situacao": "descrição concisa da situação jurídica"{filters_format}
+        }}
+
+        Instruções:
+        - Identifique a área do direito específica (ex: "direito do consumidor", "direito penal", etc.)
+        - Extraia 3 a 5 conceitos-chave relevantes para a busca jurisprudencial
+        - Descreva a situação jurídica em uma frase curta
+        - Use termos técnicos jurídicos apropriados{filters_instructions}
+
+        Responda APENAS com o JSON.
+        """
+        return prompt, "JSON com elementos para query"
+
+    def query(self, elements: Dict) -> Prompt:
+        prompt = f"""
+        Elementos jurídicos:
+        - Área do direito: {elements.get('area_direito', 'Direito Geral')}
+        - Conceitos-chave: {', '.join(elements.get('conceitos_chave', ['jurisprudência']))}
+        - Situação: {elements.get('situacao', 'análise jurídica')}
+
+        Construa uma query de busca jurisprudencial otimizada usando os elementos acima.
+
+        Instruções:
+        - Use termos jurídicos relevantes (15-20 palavras)
+        - Use linguagem natural com conectores
+        - Evite operadores booleanos
+        - Inclua termos técnicos da área do direito identificada
+        - Use os conceitos-chave mais relevantes
+        - Contextualize com base na situação jurídica
+
+        Exemplos de queries:
+        - "devolucao em dobro de tarifa bancaria por cobranca abusiva no direito do consumidor"
+        - "indenizacao por danos morais em cobranca indevida de servicos bancarios"
+        - "revisao contratual por clausulas abusivas e onerosidade excessiva"
+
+        Responda APENAS com a query em texto simples, sem formatação ou explicações.
+        """
+        return prompt, "Query textual"
+
+    def queries(self, elements: Dict, expansion: int) -> Prompt:
+        prompt = f"""
+        Elementos jurídicos:
+        - Área do direito: {elements.get('area_direito', 'Direito Geral')}
+        - Conceitos-chave: {', '.join(elements.get('conceitos_chave', ['jurisprudência']))}
+        - Situação: {elements.get('situacao', 'análise jurídica')}
+
+        Construa uma query de busca jurisprudencial otimizada usando os elementos acima
+        e mais {expansion} queries alternativas para a mesma situação.
+
+        Formato: {{
+            "query_text": "query principal",
+            "queries_alternativas": ["query alternativa 1", "query alternativa 2"]
+        }}
+
+        Instruções:
+        - Use termos jurídicos relevantes (15-20 palavras em cada query)
+        - Use linguagem natural com conectores
+        - Evite operadores booleanos
+        - A query principal usa os conceitos-chave mais relevantes
+        - Cada query alternativa enfatiza um grupo diferente de conceitos-chave ou usa sinônimos e termos técnicos equivalentes
+        - Não repita a query principal nas alternativas
+
+        Exemplos de queries:
+        - "devolucao em dobro de tarifa bancaria por cobranca abusiva no direito do consumidor"
+        - "indenizacao por danos morais em cobranca indevida de servicos bancarios"
+        - "revisao contratual por clausulas abusivas e onerosidade excessiva"
+
+        Responda APENAS com o JSON.
+        """
+        return prompt, "JSON com a query principal e as alternativas"
+
+    def single_pass(self, context: str, expansion: int, filters: bool) -> Prompt:
+        alternatives_format, alternatives_instructions = self.alternatives(expansion)
+        filters_format, filters_instructions = self.filters(filters)
+        prompt = f"""
+        Texto: {context}
+
+        Analise o texto acima e construa uma query de busca jurisprudencial eficiente.
+
+        Formato: {{
+            "area_direito": "área específica do direito identificada",
+            "conceitos_chave": ["conceito1", "conceito2", "conceito3", "conceito4", "conceito5"],
+            "situacao": "descrição concisa da situação jurídica",
+            "query_text": "query de busca jurisprudencial"{alternatives_format}{filters_format}
+        }}
+
+        Instruções para os elementos:
+        - Identifique a área do direito específica (ex: "direito do consumidor", "direito penal", etc.)
+        - Extraia 3 a 5 conceitos-chave relevantes para a busca jurisprudencial
+        - Descreva a situação jurídica em uma frase curta
+        - Use termos técnicos jurídicos apropriados{filters_instructions}
+
+        Instruções para a query (query_text):
+        - Construa a query a partir dos elementos acima (15-20 palavras)
+        - Use linguagem natural com conectores
+        - Evite operadores booleanos
+        - Inclua termos técnicos da área do direito identificada{alternatives_instructions}
+
+        Exemplos de queries:
+        - "devolucao em dobro de tarifa bancaria por cobranca abusiva no direito do consumidor"
+        - "indenizacao por danos morais em cobranca indevida de servicos bancarios"
+        - "revisao contratual por clausulas abusivas e onerosidade excessiva"
+
+        Responda APENAS com o JSON.
+        """
+        return prompt, "JSON com elementos e query"
+
+
+class Core2Prompts(PromptVariant):
+    """Prompts detalhados do pipeline core2: pedem o tribunal citado e queries com conectores"""
+
+    name = "core2"
+    version = "core2-v2"
+    temperature = 0.3
+    extracts_tribunal = True
+
+    role = 'Especialista em Analise de Textos Juridicos e Construcao de Queries'
+    goal = '''Analisar textos juridicos escritos por advogados que descrevem situacoes juridicas,
+                    problemas ou argumentos, e extrair os elementos mais relevantes para construir queries
+                    de busca eficientes'''
+    backstory = """Sou um especialista em analise de textos juridicos com profundo conhecimento em:
+                     - Identificacao de problemas juridicos centrais em textos
+                     - Extracao de termos tecnicos juridicos relevantes
+                     - Reconhecimento de direitos em discussao (direito do consumidor, contratos, etc.)
+                     - Identificacao de tipos de cobrancas, servicos ou praticas questionadas
+                     - Compreensao de fundamentos legais (abuso de direito, onus da prova, etc.)
+                     - Construcao de queries estruturadas mantendo linguagem natural e objetiva
+
+                     Minha especialidade e transformar textos juridicos complexos em queries
+                     de busca eficientes, mantendo todos os elementos relevantes de forma organizada."""
+    repair_instruction = "retorne **apenas** o objeto JSON, sem texto adicional."
+
+    def filters(self, filters: bool) -> Tuple[str, str]:
+        if not filters:
+            return "", ""
+        return (""",
+            "filtros": {"ano_inicial": null, "ano_final": null, "ultimos_anos": null, "relator": null}""",
+                """
+        - **Em filtros**, preencha apenas o periodo (ano_inicial, ano_final ou ultimos_anos) e o relator (nome do
+          ministro) que o texto pede para a jurisprudencia buscada; use null no que nao for pedido e ignore as datas
+          dos fatos e dos precedentes citados""")
+
+    def alternatives(self, expansion: int) -> Tuple[str, str]:
+        if not expansion:
+            return "", ""
+        return (f""",
+            "queries_alternativas": [{", ".join(f'"query alternativa {index}"' for index in range(1, expansion + 1))}]""",
+                f"""
+        - Construa tambem {expansion} queries alternativas (queries_alternativas), cada uma enfatizando
+          um grupo diferente de conceitos-chave ou usando sinonimos e termos tecnicos equivalentes""")
+
+    def elements(self, context: str, filters: bool) -> Prompt:
+        filters_format, filters_instructions = self.filters(filters)
+        prompt = f"""
+        Analise o seguinte texto juridico e extraia os elementos fundamentais para uma busca jurisprudencial.
+
+        ### **Formato esperado da resposta**
+        A resposta deve ser um JSON com a seguinte estrutura:
+        {{
+            "tribunal": "tribunal mencionado (se houver)",
+            "area_direito": "area do direito relacionada",
+            "conceitos_chave": ["lista", "de", "conceitos", "juridicos"],
+            "situacao": "descricao da situacao especifica"{filters_format}
+        }}
+
+        ### **Instrucoes**
+        - **Identifique o tribunal** apenas se explicitamente mencionado no texto
+        - **Determine a area do direito** principal relacionada ao caso
+        - **Liste os conceitos_chave** mais relevantes para a busca (4-6 conceitos)
+        - **Descreva a situacao** de forma concisa e especifica
+        - **Nao tente adivinhar informacoes ausentes**{filters_instructions}
+        - **IMPORTANTE**: Retorne APENAS o JSON, sem texto adicional antes ou depois
+
+        Agora, extraia os elementos com base no seguinte contexto:
+
+        ---
+
+        **Texto para analise:**
+        {context}
+
+        ---
+
+        Retorne **apenas** o JSON estruturado, sem explicacoes adicionais.
+        """
+        return prompt, "Elementos extraidos em formato JSON"
+
+    def query(self, elements: Dict) -> Prompt:
+        prompt = f"""
+        Com base nos elementos juridicos extraidos, construa uma query de busca eficiente
+        para encontrar jurisprudencias relevantes.
+
+        ### **Elementos extraidos**
+        - **Area do Direito**: {elements['area_direito']}
+        - **Conceitos-chave**: {', '.join(elements['conceitos_chave'])}
+        - **Situacao**: {elements['situacao']}
+        - **Tribunal** (se especificado): {elements.get('tribunal', '')}
+
+        ### **Instrucoes para construcao da query**
+        - Formule a query como uma busca que um usuario digitaria em um sistema de pesquisa juridica
+        - NÃO use formato de pergunta (não comece com "como", "quais", etc.)
+        - Use preposições e conectores entre os termos (de, em, por, sobre, para, etc.)
+        - A query deve formar uma expressão coesa e natural, não apenas palavras soltas
+        - Priorize os conceitos juridicos mais relevantes
+        - Inclua termos tecnicos especificos da area do direito
+        - Mantenha a query objetiva e direta
+        - Nao use operadores booleanos (AND, OR, NOT)
+        - Limite a query a uma unica frase concisa (maximo 15-20 palavras)
+        - IMPORTANTE: Retorne APENAS o texto da query, sem aspas ou formatacao adicional
+
+        ### **Exemplos de boas queries**
+        - "devolucao em dobro de tarifa bancaria por cobranca abusiva no direito do consumidor"
+        - "tarifa de cadastro em contrato bancario com cobranca indevida e devolucao de valores"
+        - "direito a informacao do consumidor em contratos com clausulas abusivas"
+
+        ### **Exemplos de queries ruins (apenas palavras soltas)**
+        - "devolucao dobro tarifa bancaria cobranca abusiva direito consumidor"
+        - "tarifa cadastro cobranca indevida contrato bancario devolucao valores"
+
+        ### **Formato da resposta**
+        Retorne apenas o texto da query, sem explicacoes adicionais.
+        """
+        return prompt, "Query de busca em texto simples"
+
+    def queries(self, elements: Dict, expansion: int) -> Prompt:
+        prompt = f"""
+        Com base nos elementos juridicos extraidos, construa uma query de busca eficiente
+        para encontrar jurisprudencias relevantes e mais {expansion} queries alternativas.
+
+        ### **Elementos extraidos**
+        - **Area do Direito**: {elements['area_direito']}
+        - **Conceitos-chave**: {', '.join(elements['conceitos_chave'])}
+        - **Situacao**: {elements['situacao']}
+        - **Tribunal** (se especificado): {elements.get('tribunal', '')}
+
+        ### **Formato esperado da resposta**
+        {{
+            "query_text": "query principal",
+            "queries_alternativas": ["query alternativa 1", "query alternativa 2"]
+        }}
+
+        ### **Instrucoes para construcao das queries**
+        - Formule cada query como uma busca que um usuario digitaria em um sistema de pesquisa juridica
+        - NÃO use formato de pergunta (não comece com "como", "quais", etc.)
+        - Use preposições e conectores entre os termos (de, em, por, sobre, para, etc.)
+        - A query principal prioriza os conceitos juridicos mais relevantes
+        - Cada query alternativa enfatiza um grupo diferente de conceitos-chave ou usa sinonimos e termos tecnicos equivalentes
+        - Nao repita a query principal nas alternativas
+        - Nao use operadores booleanos (AND, OR, NOT)
+        - Limite cada query a uma unica frase concisa (maximo 15-20 palavras)
+
+        ### **Exemplos de boas queries**
+        - "devolucao em dobro de tarifa bancaria por cobranca abusiva no direito do consumidor"
+        - "tarifa de cadastro em contrato bancario com cobranca indevida e devolucao de valores"
+        - "direito a informacao do consumidor em contratos com clausulas abusivas"
+
+        Retorne **apenas** o JSON, sem explicacoes adicionais.
+        """
+        return prompt, "Query principal e queries alternativas em formato JSON"
+
+    def single_pass(self, context: str, expansion: int, filters: bool) -> Prompt:
+        alternatives_format, alternatives_instructions = self.alternatives(expansion)
+        filters_format, filters_instructions = self.filters(filters)
+        prompt = f"""
+        Analise o seguinte texto juridico, extraia os elementos fundamentais para uma busca jurisprudencial
+        e construa a query de busca a partir deles.
+
+        ### **Formato esperado da resposta**
+        A resposta deve ser um JSON com a seguinte estrutura:
+        {{
+            "tribunal": "tribunal mencionado (se houver)",
+            "area_direito": "area do direito relacionada",
+            "conceitos_chave": ["lista", "de", "conceitos", "juridicos"],
+            "situacao": "descricao da situacao especifica",
+            "query_text": "query de busca jurisprudencial"{alternatives_format}{filters_format}
+        }}
+
+        ### **Instrucoes para os elementos**
+        - **Identifique o tribunal** apenas se explicitamente mencionado no texto
+        - **Determine a area do direito** principal relacionada ao caso
+        - **Liste os conceitos_chave** mais relevantes para a busca (4-6 conceitos)
+        - **Descreva a situacao** de forma concisa e especifica
+        - **Nao tente adivinhar informacoes ausentes**{filters_instructions}
+
+        ### **Instrucoes para a query (query_text)**
+        - Formule a query como uma busca que um usuario digitaria em um sistema de pesquisa juridica
+        - NÃO use formato de pergunta (não comece com "como", "quais", etc.)
+        - Use preposições e conectores entre os termos (de, em, por, sobre, para, etc.)
+        - Priorize os conceitos juridicos mais relevantes
+        - Nao use operadores booleanos (AND, OR, NOT)
+        - Limite a query a uma unica frase concisa (maximo 15-20 palavras){alternatives_instructions}
+
+        ### **Exemplos de boas queries**
+        - "devolucao em dobro de tarifa bancaria por cobranca abusiva no direito do consumidor"
+        - "direito a informacao do consumidor em contratos com clausulas abusivas"
+
+        **IMPORTANTE**: Retorne APENAS o JSON, sem texto adicional antes ou depois
+
+        ---
+
+        **Texto para analise:**
+        {context}
+
+        ---
+
+        Retorne **apenas** o JSON estruturado, sem explicacoes adicionais.
+        """
+        return prompt, "Elementos extraidos e query em formato JSON"
+
+
+# Variantes disponíveis, pelo nome usado na configuração e nas requisições
+PROMPT_VARIANTS: Dict[str, PromptVariant] = {variant.name: variant for variant in (BuscaPrompts(), Core2Prompts())}
+
+
+def get_prompt_variant(name: str) -> PromptVariant:
+    if name not in PROMPT_VARIANTS:
+        raise ValueError(f"Variante de prompt desconhecida: {name} (use {', '.join(PROMPT_VARIANTS)})")
+    return PROMPT_VARIANTS[name]
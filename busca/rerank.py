@@ -0,0 +1,161 @@
+import re
+import threading
+import time
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .lexical import STOPWORDS, stem, strip_accents, tokenize
+from .semantic_cache import embed_text
+
+# As ementas repetem muito o vocabulário: o radical de cada palavra é calculado uma vez só
+_cached_stem = lru_cache(maxsize=65536)(stem)
+# Os mesmos documentos voltam em muitas buscas: embeddings das ementas mais recentes (2048 x 4 KB)
+_cached_embedding = lru_cache(maxsize=2048)(embed_text)
+
+
+def _minmax(scores: np.ndarray) -> np.ndarray:
+    """Escala os scores para [0, 1]; scores todos iguais viram zero (não diferenciam os candidatos)"""
+    low, high = scores.min(initial=0.0), scores.max(initial=0.0)
+    if high - low <= 1e-12:
+        return np.zeros_like(scores)
+    return (scores - low) / (high - low)
+
+
+def _token_set(text: str) -> frozenset:
+    """Radicais distintos do texto (o mesmo que set(tokenize(text)), sem repetir o stemmer por ocorrência)"""
+    words = set(re.findall(r"[a-z0-9]+", strip_accents(text).lower()))
+    return frozenset(_cached_stem(word) for word in words if word not in STOPWORDS and len(word) > 1)
+
+
+def _rank_scores(hits: List[Dict], index: Dict[str, int], size: int, k: int, id_field: str) -> np.ndarray:
+    """Score 1 / (k + posição) de cada candidato na lista (0 para os ausentes), como no RRF"""
+    scores = np.zeros(size, dtype=np.float64)
+    for rank, hit in enumerate(hits, 1):
+        slot = index.get(hit.get(id_field))
+        if slot is not None and scores[slot] == 0.0:
+            scores[slot] = 1.0 / (k + rank)
+    return scores
+
+
+class HybridReranker:
+    """
+    Reordenação local dos candidatos da API de jurisprudência: combina a posição na
+    busca BM25 (a API devolve só a ordem, não o score BM25) com a similaridade densa
+    (cosseno entre os embeddings locais da query e da ementa ou, se dense_query_type
+    for informado, posição na busca vetorial) e dá um bônus aos documentos que citam
+    os conceitos-chave e a área do direito extraídos do texto. Os scores de todos os
+    candidatos são calculados de uma vez com NumPy.
+    """
+
+    def __init__(self, candidates: int = 30, lexical_weight: float = 0.45, dense_weight: float = 0.35,
+                 concept_boost: float = 0.15, area_boost: float = 0.05, dense_query_type: str = "",
+                 dense_retry_after: float = 300, text_fields: Sequence[str] = ("ementa",), rrf_k: int = 60,
+                 dim: int = 1024, id_field: str = "id_documento"):
+        self.candidates = candidates
+        self.lexical_weight = lexical_weight
+        self.dense_weight = dense_weight
+        self.concept_boost = concept_boost
+        self.area_boost = area_boost
+        self.dense_query_type = dense_query_type
+        self.dense_retry_after = dense_retry_after
+        self.text_fields = tuple(text_fields)
+        self.rrf_k = rrf_k
+        self.dim = dim
+        self.id_field = id_field
+
+        self._lock = threading.Lock()
+        # Coleções em que a busca vetorial falhou -> instante a partir do qual ela é tentada de novo
+        self._dense_disabled_until: Dict[str, float] = {}
+        self.reranked = 0
+        self.dense_failures = 0
+        self.local_dense = 0
+
+    def dense_enabled(self, tribunal: str) -> bool:
+        """Indica se a busca vetorial deve ser pedida à coleção (desligada por um tempo após uma falha)"""
+        if not self.dense_query_type:
+            return False
+        with self._lock:
+            return time.monotonic() >= self._dense_disabled_until.get(tribunal, 0.0)
+
+    def record_dense_failure(self, tribunal: str) -> None:
+        with self._lock:
+            self.dense_failures += 1
+            self._dense_disabled_until[tribunal] = time.monotonic() + self.dense_retry_after
+
+    def _text(self, hit: Dict) -> str:
+        return " ".join(str(hit.get(field) or "") for field in self.text_fields)
+
+    def rerank(self, query: str, lexical_hits: List[Dict], dense_hits: Optional[List[Dict]] = None,
+               elements: Optional[Dict] = None, limit: Optional[int] = None) -> List[Dict]:
+        """
+        Args:
+            query: Query usada na busca
+            lexical_hits: Resultados da busca BM25, na ordem da API
+            dense_hits: Resultados da busca vetorial (None ou vazia: similaridade calculada localmente)
+            elements: Elementos extraídos do texto (conceitos_chave e area_direito), se disponíveis
+            limit: Quantidade de resultados retornados (None = todos os candidatos)
+
+        Returns:
+            Candidatos sem repetição, ordenados pelo score híbrido (campo "score_hibrido")
+        """
+        candidates: Dict[str, Dict] = {}
+        for origin, hits in enumerate((lexical_hits, dense_hits or [])):
+            for rank, hit in enumerate(hits, 1):
+                doc_id = hit.get(self.id_field)
+                if doc_id is None:
+                    # Sem identificador não há como deduplicar: mantém o resultado isolado
+                    doc_id = f"{origin}:{rank}"
+                if doc_id not in candidates:
+                    candidates[doc_id] = hit
+        if not candidates:
+            return []
+        ids = list(candidates)
+        hits = list(candidates.values())
+        index = {doc_id: slot for slot, doc_id in enumerate(ids)}
+        size = len(hits)
+
+        lexical = _rank_scores(lexical_hits, index, size, self.rrf_k, self.id_field)
+        texts = [self._text(hit) for hit in hits]
+        if dense_hits:
+            dense = _rank_scores(dense_hits, index, size, self.rrf_k, self.id_field)
+        else:
+            # Sem busca vetorial: cosseno entre os embeddings locais (um produto matriz-vetor)
+            vectors = np.stack([_cached_embedding(text, self.dim) for text in texts])
+            dense = vectors @ embed_text(query, self.dim)
+
+        scores = self.lexical_weight * _minmax(lexical) + self.dense_weight * _minmax(dense)
+
+        elements = elements or {}
+        concepts = [frozenset(tokenize(concept)) for concept in elements.get("conceitos_chave") or []]
+        concepts = [concept for concept in concepts if concept]
+        area = frozenset(tokenize(elements.get("area_direito") or "")) - {"direit"}
+        if concepts or area:
+            tokens = [_token_set(text) for text in texts]
+            if concepts:
+                # Fração dos conceitos-chave com todos os radicais presentes no documento
+                matches = np.array([[concept <= doc for concept in concepts] for doc in tokens], dtype=np.float64)
+                scores += self.concept_boost * matches.mean(axis=1)
+            if area:
+                matches = np.array([len(area & doc) / len(area) for doc in tokens], dtype=np.float64)
+                scores += self.area_boost * matches
+
+        # Ordem estável: empates mantêm a ordem da busca léxica
+        order = np.argsort(-scores, kind="stable")
+        if limit is not None:
+            order = order[:limit]
+        with self._lock:
+            self.reranked += 1
+            self.local_dense += not dense_hits
+        return [{**hits[slot], "score_hibrido": round(float(scores[slot]), 6)} for slot in order]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "reordenacoes": self.reranked,
+                "candidatos": self.candidates,
+                "busca_vetorial": self.dense_query_type or None,
+                "falhas_busca_vetorial": self.dense_failures,
+                "similaridade_local": self.local_dense,
+            }
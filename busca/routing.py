@@ -0,0 +1,150 @@
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Pattern, Tuple
+
+from .lexical import strip_accents
+
+# Nomes por extenso e apelidos usuais de cada tribunal (sem acentos, em minúsculas), pelo nome curto;
+# valem apenas para os tribunais presentes no catálogo (ou no mapeamento padrão)
+TRIBUNAL_NAMES = {
+    # "supremo" sozinho aparece em prosa ("supremo interesse da criança"): só o nome com "tribunal"
+    "stf": ("supremo tribunal federal", "supremo tribunal", "suprema corte", "excelso pretorio", "pretorio excelso"),
+    "stj": ("superior tribunal de justica", "tribunal da cidadania"),
+    "tst": ("tribunal superior do trabalho",),
+    "tse": ("tribunal superior eleitoral",),
+    "stm": ("superior tribunal militar",),
+}
+
+# Siglas (até 5 letras) também são reconhecidas com pontos, ex: "S.T.J."
+_ACRONYM = re.compile(r"[a-z]{2,5}")
+# Variantes acentuadas de cada letra: o texto é comparado como veio, sem remover os acentos antes
+_ACCENTS = {"a": "aáàâã", "e": "eéê", "i": "ií", "o": "oóôõ", "u": "uúü", "c": "cç"}
+
+
+def _term_key(term: str) -> str:
+    """Forma canônica de um nome: sem acentos, pontos e espaços ("S.T.F." e "stf" viram "stf")"""
+    return re.sub(r"\W+", "", strip_accents(term).lower())
+
+
+def _letters(word: str) -> str:
+    return "".join(f"[{_ACCENTS[char]}]" if char in _ACCENTS else re.escape(char) for char in word)
+
+
+def _term_pattern(term: str) -> str:
+    words = strip_accents(term).lower().split()
+    if len(words) == 1 and _ACRONYM.fullmatch(words[0]):
+        return r"\.?".join(map(re.escape, words[0])) + r"\.?"
+    return r"\s+".join(map(_letters, words))
+
+
+def _names_key(names: Dict[str, Iterable[str]]) -> Tuple[Tuple[str, Tuple[str, ...]], ...]:
+    return tuple(sorted((alias, tuple(terms)) for alias, terms in names.items()))
+
+
+_DEFAULT_NAMES_KEY = _names_key(TRIBUNAL_NAMES)
+
+
+@lru_cache(maxsize=16)
+def _compile(aliases: Tuple[Tuple[str, str], ...],
+             names: Tuple[Tuple[str, Tuple[str, ...]], ...]) -> Tuple[Pattern, Dict[str, str]]:
+    """
+    Expressão única com todos os nomes dos tribunais (palavras inteiras, do mais longo ao
+    mais curto) e a coleção de cada nome. Compilada uma vez por catálogo: o cache devolve
+    a mesma expressão enquanto os nomes não mudam.
+    """
+    names = dict(names)
+    collections: Dict[str, str] = {}
+    patterns = set()
+    for alias, collection in aliases:
+        for term in (alias, *names.get(alias, ())):
+            key = _term_key(term)
+            if key:
+                collections.setdefault(key, collection)
+                patterns.add(_term_pattern(term))
+    if not patterns:
+        return re.compile(r"(?!)"), {}
+    regex = r"(?<!\w)(?:" + "|".join(sorted(patterns, key=len, reverse=True)) + r")(?!\w)"
+    return re.compile(regex, re.IGNORECASE), collections
+
+
+def find_tribunals(text: str, aliases: Dict[str, str],
+                   names: Optional[Dict[str, Iterable[str]]] = None) -> List[str]:
+    """
+    Coleções dos tribunais citados no texto, na ordem da primeira menção e sem repetição
+
+    Args:
+        text: Texto livre (acentos, maiúsculas e pontos nas siglas são ignorados)
+        aliases: Nomes curtos dos tribunais (em minúsculas) -> coleção
+        names: Nomes por extenso de cada nome curto (default: TRIBUNAL_NAMES)
+    """
+    if not text or not aliases:
+        return []
+    regex, collections = _compile(tuple(sorted(aliases.items())),
+                                  _DEFAULT_NAMES_KEY if names is None else _names_key(names))
+    found = (collections.get(_term_key(match.group(0))) for match in regex.finditer(text))
+    return list(dict.fromkeys(collection for collection in found if collection is not None))
+
+
+def strip_tribunals(text: str, aliases: Dict[str, str],
+                    names: Optional[Dict[str, Iterable[str]]] = None) -> str:
+    """Texto sem os nomes dos tribunais citados (cada menção vira um espaço)"""
+    if not text or not aliases:
+        return text
+    regex, _ = _compile(tuple(sorted(aliases.items())),
+                        _DEFAULT_NAMES_KEY if names is None else _names_key(names))
+    return regex.sub(" ", text)
+
+
+class TribunalRouter:
+    """
+    Escolha dos tribunais consultados quando o cliente não os informa. As fontes são
+    consultadas em ordem de confiança e vale a primeira que cita algum tribunal: os
+    tribunais pedidos no texto (ex: "precedentes do STJ"), o tribunal extraído pelo LLM
+    e os citados na query gerada. Uma fonte que cita vários tribunais roteia para todos
+    (até `max_tribunals`); sem nenhuma citação, vale o tribunal padrão.
+    """
+
+    def __init__(self, aliases: Dict[str, str], catalog=None, default: Optional[str] = None,
+                 max_tribunals: int = 3, names: Optional[Dict[str, Iterable[str]]] = None):
+        # Nomes curtos usados enquanto o catálogo não foi carregado (ex: {"stf": "STFCustomVector_e5large"})
+        self.known_aliases = {name.lower(): collection for name, collection in aliases.items()}
+        self.catalog = catalog
+        self.default = default or next(iter(self.known_aliases.values()), None)
+        self.max_tribunals = max(max_tribunals, 1)
+        # Nomes por extenso de cada nome curto (None = TRIBUNAL_NAMES)
+        self.names = names
+
+    def aliases(self) -> Dict[str, str]:
+        """Nomes curtos dos tribunais do catálogo (ou os conhecidos, sem catálogo) -> coleção"""
+        if self.catalog is not None and self.catalog.loaded:
+            return self.catalog.aliases()
+        return dict(self.known_aliases)
+
+    def find(self, text: str) -> List[str]:
+        """Coleções dos tribunais citados no texto, na ordem da primeira menção"""
+        return find_tribunals(text, self.aliases(), self.names)
+
+    def strip(self, text: str) -> str:
+        """Texto sem os nomes dos tribunais citados"""
+        return strip_tribunals(text, self.aliases(), self.names)
+
+    def short_name(self, collection: str) -> Optional[str]:
+        """Nome curto de uma coleção (o mais curto dos seus nomes no catálogo, ex: "stj")"""
+        names = [alias for alias, target in self.aliases().items() if target == collection]
+        return min(names, key=len) if names else None
+
+    def route(self, query: str = "", tribunal: Optional[str] = None,
+              requested: Optional[List[str]] = None) -> List[str]:
+        """
+        Args:
+            query: Query gerada (ou o texto, na busca sem LLM)
+            tribunal: Tribunal extraído pelo LLM (nome curto ou por extenso), se houver
+            requested: Coleções dos tribunais pedidos no texto original, se houver
+
+        Returns:
+            Coleções a consultar (pelo menos uma, se houver tribunal padrão)
+        """
+        for candidates in (list(requested or []), self.find(tribunal or ""), self.find(query)):
+            if candidates:
+                return list(dict.fromkeys(candidates))[:self.max_tribunals]
+        return [self.default] if self.default else []
@@ -0,0 +1,162 @@
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+
+def parse_tribunal_ttls(spec: str) -> Dict[str, float]:
+    """
+    Converte "stf=3600,stj=1800" em {"stf": 3600.0, "stj": 1800.0}
+
+    As chaves podem ser o nome curto do tribunal ou o nome da coleção.
+    """
+    ttls = {}
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        name, _, ttl = item.partition("=")
+        ttls[name.strip().lower()] = float(ttl)
+    return ttls
+
+
+class SearchCache:
+    """
+    Cache dos resultados de busca na API de jurisprudência.
+
+    - TTL por tribunal, com LRU limitado por quantidade de itens
+    - stale-while-revalidate: após o TTL, o resultado ainda é servido por
+      `stale_ttl` segundos enquanto uma atualização roda em segundo plano
+    - coalescência: buscas idênticas simultâneas compartilham a mesma chamada HTTP
+    """
+
+    def __init__(self, max_items: int = 2048, default_ttl: float = 3600, stale_ttl: float = 3600,
+                 tribunal_ttls: Optional[Dict[str, float]] = None):
+        self.max_items = max_items
+        self.default_ttl = default_ttl
+        self.stale_ttl = stale_ttl
+        self.tribunal_ttls = tribunal_ttls or {}
+
+        self._items: "OrderedDict[str, Tuple[Any, float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._background: set = set()
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.refreshes = 0
+
+    @staticmethod
+    def make_key(base_url: str, tribunal: str, data: Dict) -> str:
+        """Chave a partir do backend, tribunal e corpo completo da consulta (query, features, filtros, limite)"""
+        payload = json.dumps([base_url, tribunal, data], ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def ttl_for(self, tribunal: str) -> float:
+        """TTL configurado para o tribunal (nome curto ou nome da coleção)"""
+        tribunal = tribunal.lower()
+        if tribunal in self.tribunal_ttls:
+            return self.tribunal_ttls[tribunal]
+        for name, ttl in self.tribunal_ttls.items():
+            if tribunal.startswith(name):
+                return ttl
+        return self.default_ttl
+
+    def lookup(self, key: str) -> Tuple[Optional[Any], Optional[str]]:
+        """
+        Returns:
+            Tupla (valor, estado), com estado "fresh", "stale" ou None (ausente/expirado)
+        """
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None, None
+
+            value, stored_at, ttl = item
+            age = time.time() - stored_at
+            if age <= ttl:
+                state = "fresh"
+            elif age <= ttl + self.stale_ttl:
+                state = "stale"
+            else:
+                del self._items[key]
+                return None, None
+
+            self._items.move_to_end(key)
+            return value, state
+
+    def store(self, key: str, tribunal: str, value: Any) -> None:
+        """Armazena um resultado, removendo os menos usados quando o limite é ultrapassado"""
+        with self._lock:
+            self._items[key] = (value, time.time(), self.ttl_for(tribunal))
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+    async def get_or_fetch(self, key: str, tribunal: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Retorna o resultado do cache ou executa `fetch` (uma única vez por chave,
+        mesmo com chamadas simultâneas). Resultados vazios (None) não são armazenados.
+        """
+        value, state = self.lookup(key)
+        if state == "fresh":
+            self.hits += 1
+            return value
+
+        if state == "stale":
+            self.stale_hits += 1
+            if key not in self._inflight:
+                self.refreshes += 1
+                task = asyncio.ensure_future(self._fetch_once(key, tribunal, fetch))
+                self._background.add(task)
+                task.add_done_callback(self._background.discard)
+            return value
+
+        self.misses += 1
+        return await self._fetch_once(key, tribunal, fetch)
+
+    async def _fetch_once(self, key: str, tribunal: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Executa `fetch` compartilhando a chamada em andamento para a mesma chave. A chamada
+        roda em uma tarefa própria, que nenhum chamador cancela: se quem a iniciou for
+        cancelado (ex: prazo da requisição), as buscas que aguardam o mesmo resultado
+        continuam esperando por ela.
+        """
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            task = asyncio.ensure_future(self._fetch_and_store(key, tribunal, fetch))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._fetch_done(key, done))
+        return await asyncio.shield(task)
+
+    async def _fetch_and_store(self, key: str, tribunal: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        value = await fetch()
+        if value is not None:
+            self.store(key, tribunal, value)
+        return value
+
+    def _fetch_done(self, key: str, task: asyncio.Future) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Evita o aviso de exceção não recuperada quando todos os chamadores foram cancelados
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict:
+        """Resumo de uso do cache de buscas"""
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "itens": len(self._items),
+            "acertos": self.hits,
+            "acertos_expirados": self.stale_hits,
+            "falhas": self.misses,
+            "coalescidas": self.coalesced,
+            "atualizacoes_em_segundo_plano": self.refreshes,
+            "taxa_acerto": round((self.hits + self.stale_hits) / lookups, 4) if lookups else 0.0,
+        }
@@ -0,0 +1,199 @@
+import json
+import os
+import re
+import threading
+import time
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .lexical import strip_accents
+
+# Políticas de remoção quando o índice está cheio
+LRU = "lru"
+LFU = "lfu"
+
+
+def _features(text: str) -> List[str]:
+    """Palavras, pares de palavras e trigramas de caracteres do texto sem acentos e em minúsculas"""
+    words = re.findall(r"\w+", strip_accents(text).lower())
+    features = [f"w:{word}" for word in words]
+    features += [f"b:{first} {second}" for first, second in zip(words, words[1:])]
+    for word in words:
+        padded = f" {word} "
+        features += [f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2)]
+    return features
+
+
+def embed_text(text: str, dim: int = 1024) -> np.ndarray:
+    """
+    Embedding local e barato (CPU, sem modelo): hashing das features em `dim`
+    posições com peso sublinear (1 + log tf) e norma L2 unitária, de modo que o
+    produto interno entre dois vetores é a similaridade de cosseno dos textos
+    """
+    vector = np.zeros(dim, dtype=np.float32)
+    features = _features(text)
+    if not features:
+        return vector
+    # crc32 é estável entre processos (hash() muda com PYTHONHASHSEED), o que permite persistir o índice
+    buckets = np.fromiter((zlib.crc32(feature.encode("utf-8")) % dim for feature in features),
+                          dtype=np.int64, count=len(features))
+    counts = np.bincount(buckets, minlength=dim).astype(np.float32)
+    nonzero = counts > 0
+    vector[nonzero] = 1.0 + np.log(counts[nonzero])
+    return vector / np.linalg.norm(vector)
+
+
+class SemanticCache:
+    """
+    Cache por similaridade: reaproveita o resultado de um texto já processado
+    quando o novo texto é quase igual (mesmo modelo base com espaços, acentos
+    ou algumas palavras diferentes). Os embeddings ficam em uma matriz NumPy
+    e a busca do vizinho mais próximo é um único produto matriz-vetor.
+    """
+
+    def __init__(self, threshold: float = 0.9, max_items: int = 2048, ttl: float = 604800,
+                 policy: str = LRU, dim: int = 1024):
+        if policy not in (LRU, LFU):
+            raise ValueError(f"Política de remoção inválida: {policy}")
+        self.threshold = threshold
+        self.max_items = max_items
+        self.ttl = ttl
+        self.policy = policy
+        self.dim = dim
+        self._lock = threading.Lock()
+
+        self._vectors = np.zeros((max_items, dim), dtype=np.float32)
+        self._valid = np.zeros(max_items, dtype=bool)
+        self._scopes = np.full(max_items, -1, dtype=np.int32)
+        self._created = np.zeros(max_items, dtype=np.float64)
+        self._last_used = np.zeros(max_items, dtype=np.float64)
+        self._uses = np.zeros(max_items, dtype=np.int64)
+        self._values: List[Optional[str]] = [None] * max_items
+        # escopo (modelo, temperatura, versão do prompt, modo) -> id inteiro comparado na matriz
+        self._scope_ids: Dict[str, int] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self._hit_similarity = 0.0
+
+    def embed(self, text: str) -> np.ndarray:
+        return embed_text(text, self.dim)
+
+    def get(self, vector: np.ndarray, scope: str) -> Optional[str]:
+        """Retorna o valor do vizinho mais próximo do mesmo escopo se a similaridade atingir o limiar"""
+        value, similarity = self.nearest(vector, scope)
+        with self._lock:
+            if value is not None and similarity >= self.threshold:
+                self.hits += 1
+                self._hit_similarity += similarity
+                return value
+            self.misses += 1
+        return None
+
+    def nearest(self, vector: np.ndarray, scope: str) -> Tuple[Optional[str], float]:
+        """Vizinho mais próximo do mesmo escopo e sua similaridade, sem aplicar o limiar"""
+        with self._lock:
+            scope_id = self._scope_ids.get(scope)
+            if scope_id is None:
+                return None, 0.0
+            now = time.time()
+            candidates = self._valid & (self._scopes == scope_id) & (self._created >= now - self.ttl)
+            if not candidates.any():
+                return None, 0.0
+            similarities = self._vectors @ vector
+            similarities[~candidates] = -1.0
+            slot = int(np.argmax(similarities))
+            similarity = float(similarities[slot])
+            if similarity >= self.threshold:
+                self._last_used[slot] = now
+                self._uses[slot] += 1
+            return self._values[slot], similarity
+
+    def set(self, vector: np.ndarray, scope: str, value: str) -> None:
+        """Adiciona o texto (pelo embedding) ao índice, removendo um item pela política se estiver cheio"""
+        with self._lock:
+            scope_id = self._scope_ids.setdefault(scope, len(self._scope_ids))
+            slot = self._free_slot()
+            now = time.time()
+            self._vectors[slot] = vector
+            self._valid[slot] = True
+            self._scopes[slot] = scope_id
+            self._created[slot] = now
+            self._last_used[slot] = now
+            self._uses[slot] = 0
+            self._values[slot] = value
+
+    def _free_slot(self) -> int:
+        """Posição livre ou expirada; sem nenhuma, a menos usada recentemente (lru) ou menos usada (lfu)"""
+        free = ~self._valid | (self._created < time.time() - self.ttl)
+        if free.any():
+            return int(np.argmax(free))
+        if self.policy == LFU:
+            # Menor contagem de usos; empate decidido pelo uso mais antigo
+            return int(np.lexsort((self._last_used, self._uses))[0])
+        return int(np.argmin(self._last_used))
+
+    def stats(self) -> Dict:
+        """Resumo de acertos e falhas do cache, no mesmo formato dos demais caches"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "backend": self.__class__.__name__,
+                "itens": len(self),
+                "acertos": self.hits,
+                "falhas": self.misses,
+                "taxa_acerto": round(self.hits / total, 4) if total else 0.0,
+                "limiar": self.threshold,
+                "similaridade_media_acertos": round(self._hit_similarity / self.hits, 4) if self.hits else None,
+            }
+
+    def __len__(self) -> int:
+        return int(self._valid.sum())
+
+    def save(self, path: str) -> None:
+        """Grava o índice (embeddings e valores) em um arquivo .npz"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            slots = np.flatnonzero(self._valid)
+            meta = {
+                "dim": self.dim,
+                "escopos": self._scope_ids,
+                "valores": [self._values[slot] for slot in slots],
+            }
+            arrays = {
+                "vectors": self._vectors[slots],
+                "scopes": self._scopes[slots],
+                "created": self._created[slots],
+                "last_used": self._last_used[slots],
+                "uses": self._uses[slots],
+                "meta": np.frombuffer(json.dumps(meta, ensure_ascii=False).encode("utf-8"), dtype=np.uint8),
+            }
+        tmp_path = f"{path}.tmp.npz"
+        np.savez_compressed(tmp_path, **arrays)
+        os.replace(tmp_path, path)
+
+    def load(self, path: str) -> None:
+        """Carrega um índice gravado com save(); arquivo ausente ou de outra dimensão é ignorado"""
+        if not os.path.exists(path):
+            return
+        with np.load(path) as data:
+            meta = json.loads(data["meta"].tobytes().decode("utf-8"))
+            if meta["dim"] != self.dim:
+                return
+            # Mantém os itens usados mais recentemente quando o arquivo tem mais itens que o índice
+            order = np.argsort(data["last_used"])[::-1][:self.max_items]
+            count = len(order)
+            with self._lock:
+                self._scope_ids = {scope: int(scope_id) for scope, scope_id in meta["escopos"].items()}
+                self._vectors[:count] = data["vectors"][order]
+                self._valid[:count] = True
+                self._scopes[:count] = data["scopes"][order]
+                self._created[:count] = data["created"][order]
+                self._last_used[:count] = data["last_used"][order]
+                self._uses[:count] = data["uses"][order]
+                for slot, index in enumerate(order):
+                    self._values[slot] = meta["valores"][index]